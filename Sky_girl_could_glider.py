@@ -1,16 +1,35 @@
 import pygame
-import random
+import argparse
+import json
 import math
+import random
 import sys
+import time
 from enum import Enum
+from functools import cached_property
 
-# Initialize Pygame
-pygame.init()
+from background import SkyBackground
+from capture import FrameCapture, ffmpeg_command
+from dirty_render import DirtyRectRenderer
+from latency import FramePacer, InputLatency
+from particles import ParticleSystem
+from pipeline import SimulationPipeline
+from profiler import FrameProfiler, ProfilerOverlay
+from quality import QUALITY_TIERS, QualityController, tier_by_name
+from replay import ReplayRecorder, replay_path
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, COLLISION_MODES, SkyGirl, World, make_collider
+from sprites import SpriteCache
+from telemetry import GAME_OVER, GAME_QUIT, GAME_SAMPLE, GAME_START, TelemetryStore
+from text_cache import TextCache
+from timestep import FixedTimestep, lerp
+from viewport import Viewport
+from worldgen import BackgroundSpawnSchedule
 
-# Constants
-SCREEN_WIDTH = 1024
-SCREEN_HEIGHT = 768
-FPS = 60
+# Pygame modules are started by Game, and only the ones it uses, so
+# importing this module has no side effects
+
+# Milliseconds of each idle menu frame spent pre-rendering caches
+WARM_BUDGET_MS = 2.0
 
 # Colors
 WHITE = (255, 255, 255)
@@ -31,454 +50,400 @@ class GameState(Enum):
     PLAYING = 2
     GAME_OVER = 3
 
-class Particle:
-    def __init__(self, x, y, color, size, velocity_x, velocity_y, life):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.size = size
-        self.velocity_x = velocity_x
-        self.velocity_y = velocity_y
-        self.life = life
-        self.max_life = life
-        self.alpha = 255
-    
-    def update(self):
-        self.x += self.velocity_x
-        self.y += self.velocity_y
-        self.life -= 1
-        self.alpha = int(255 * (self.life / self.max_life))
-        self.size = max(1, int(self.size * (self.life / self.max_life)))
-        return self.life > 0
-    
-    def draw(self, screen):
-        if self.alpha > 0:
-            # Create a surface with per-pixel alpha
-            particle_surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-            color_with_alpha = (*self.color, self.alpha)
-            pygame.draw.circle(particle_surface, color_with_alpha, (self.size, self.size), self.size)
-            screen.blit(particle_surface, (self.x - self.size, self.y - self.size))
+# Pre-rendered entity frames shared by every draw function
+sprite_cache = SpriteCache()
 
-class SkyGirl:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.width = 48
-        self.height = 48
-        self.velocity_y = 0
-        self.gravity = 0.5
-        self.flap_power = -8
-        self.max_fall_speed = 10
-        
-        # Animation
-        self.flap_animation = 0
-        self.wing_angle = 0
-        self.is_flapping = False
-        self.flap_timer = 0
-        
-        # Create a simple sprite representation
-        self.create_sprite()
-    
-    def create_sprite(self):
-        """Create a simple sprite surface for the sky girl"""
-        self.sprite = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        
-        # Body (pink dress)
-        pygame.draw.ellipse(self.sprite, PINK, (16, 20, 16, 20))
-        
-        # Head
-        pygame.draw.circle(self.sprite, (255, 220, 177), (24, 16), 8)
-        
-        # Hair
-        pygame.draw.circle(self.sprite, (139, 69, 19), (24, 12), 10)
-        
-        # Eyes
-        pygame.draw.circle(self.sprite, BLACK, (21, 14), 2)
-        pygame.draw.circle(self.sprite, BLACK, (27, 14), 2)
-        
-        # Wings (will be drawn separately for animation)
-        self.wing_color = (255, 255, 255, 180)
-    
-    def flap(self):
-        """Make the girl flap upward"""
-        self.velocity_y = self.flap_power
-        self.is_flapping = True
-        self.flap_timer = 10
-    
-    def update(self):
-        """Update girl's position and animation"""
-        # Apply gravity
-        self.velocity_y += self.gravity
-        if self.velocity_y > self.max_fall_speed:
-            self.velocity_y = self.max_fall_speed
-        
-        # Update position
-        self.y += self.velocity_y
-        
-        # Keep on screen
-        if self.y < 0:
-            self.y = 0
-            self.velocity_y = 0
-        elif self.y > SCREEN_HEIGHT - self.height:
-            self.y = SCREEN_HEIGHT - self.height
-            self.velocity_y = 0
-        
-        # Update animation
-        if self.flap_timer > 0:
-            self.flap_timer -= 1
-            self.wing_angle = math.sin(self.flap_timer * 0.5) * 30
-        else:
-            self.is_flapping = False
-            self.wing_angle = math.sin(pygame.time.get_ticks() * 0.01) * 15
-    
-    def draw(self, screen):
-        """Draw the sky girl with animated wings"""
-        # Draw wings behind the body
-        wing_surface = pygame.Surface((60, 30), pygame.SRCALPHA)
-        
-        # Left wing
-        wing_points_left = [
-            (15, 15),
-            (5, 5 + self.wing_angle),
-            (0, 15),
-            (5, 25 - self.wing_angle),
-            (15, 15)
-        ]
-        pygame.draw.polygon(wing_surface, self.wing_color, wing_points_left)
-        
-        # Right wing
-        wing_points_right = [
-            (45, 15),
-            (55, 5 + self.wing_angle),
-            (60, 15),
-            (55, 25 - self.wing_angle),
-            (45, 15)
-        ]
-        pygame.draw.polygon(wing_surface, self.wing_color, wing_points_right)
-        
-        # Add wing glow effect
-        if self.is_flapping:
-            glow_surface = pygame.Surface((60, 30), pygame.SRCALPHA)
-            pygame.draw.polygon(glow_surface, (255, 255, 255, 100), wing_points_left)
-            pygame.draw.polygon(glow_surface, (255, 255, 255, 100), wing_points_right)
-            screen.blit(glow_surface, (self.x - 6, self.y + 5))
-        
-        screen.blit(wing_surface, (self.x - 6, self.y + 5))
-        
-        # Draw the main sprite
-        screen.blit(self.sprite, (self.x, self.y))
-    
-    def get_rect(self):
-        """Get collision rectangle"""
-        return pygame.Rect(self.x + 8, self.y + 8, self.width - 16, self.height - 16)
+# Draw functions take alpha, how far (0..1) to interpolate from the previous
+# simulation step to the current one
 
-class Cloud:
-    def __init__(self, x, y, cloud_type="normal"):
-        self.x = x
-        self.y = y
-        self.type = cloud_type
-        self.speed = random.uniform(2, 4)
-        
-        if cloud_type == "storm":
-            self.width = random.randint(80, 120)
-            self.height = random.randint(50, 70)
-            self.color = DARK_GRAY
-        else:
-            self.width = random.randint(60, 100)
-            self.height = random.randint(40, 60)
-            self.color = WHITE
-        
-        # Lightning animation for storm clouds
-        self.lightning_timer = 0
-        self.show_lightning = False
-    
-    def update(self, game_speed):
-        """Update cloud position"""
-        self.x -= self.speed * game_speed
-        
-        # Lightning animation for storm clouds
-        if self.type == "storm":
-            self.lightning_timer += 1
-            if self.lightning_timer > 60:
-                self.show_lightning = random.random() < 0.1
-                if self.show_lightning:
-                    self.lightning_timer = 0
-    
-    def draw(self, screen):
-        """Draw the cloud"""
-        # Draw cloud body
-        pygame.draw.ellipse(screen, self.color, (self.x, self.y, self.width, self.height))
-        pygame.draw.ellipse(screen, self.color, (self.x + 20, self.y - 10, self.width - 20, self.height - 10))
-        pygame.draw.ellipse(screen, self.color, (self.x + 10, self.y + 10, self.width - 30, self.height - 20))
-        
-        # Draw lightning for storm clouds
-        if self.type == "storm" and self.show_lightning:
-            lightning_x = self.x + self.width // 2
-            lightning_y = self.y + self.height
-            pygame.draw.lines(screen, YELLOW, False, [
-                (lightning_x, lightning_y),
-                (lightning_x - 10, lightning_y + 20),
-                (lightning_x + 5, lightning_y + 20),
-                (lightning_x - 5, lightning_y + 40)
-            ], 3)
-    
-    def get_rect(self):
-        """Get collision rectangle"""
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+def draw_sky_girl(screen, girl, alpha=1.0):
+    """Draw the sky girl with animated wings"""
+    frame = sprite_cache.sky_girl_frame(girl.wing_angle, girl.is_flapping)
+    return sprite_cache.blit(screen, frame, girl.x, lerp(girl.prev_y, girl.y, alpha))
 
-class Star:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.size = random.randint(8, 12)
-        self.speed = random.uniform(1, 3)
-        self.glow_timer = 0
-        self.collected = False
-    
-    def update(self, game_speed):
-        """Update star position"""
-        self.x -= self.speed * game_speed
-        self.glow_timer += 0.2
-    
-    def draw(self, screen):
-        """Draw the glowing star"""
-        if self.collected:
-            return
-            
-        # Glow effect
-        glow_size = self.size + int(math.sin(self.glow_timer) * 3)
-        glow_surface = pygame.Surface((glow_size * 4, glow_size * 4), pygame.SRCALPHA)
-        pygame.draw.circle(glow_surface, (255, 255, 0, 50), (glow_size * 2, glow_size * 2), glow_size * 2)
-        screen.blit(glow_surface, (self.x - glow_size * 2, self.y - glow_size * 2))
-        
-        # Star shape
-        star_points = []
-        for i in range(10):
-            angle = i * math.pi / 5
-            if i % 2 == 0:
-                radius = self.size
-            else:
-                radius = self.size // 2
-            
-            x = self.x + math.cos(angle) * radius
-            y = self.y + math.sin(angle) * radius
-            star_points.append((x, y))
-        
-        pygame.draw.polygon(screen, GOLD, star_points)
-        pygame.draw.polygon(screen, YELLOW, star_points, 2)
-    
-    def get_rect(self):
-        """Get collision rectangle"""
-        return pygame.Rect(self.x - self.size, self.y - self.size, self.size * 2, self.size * 2)
+def draw_cloud(screen, cloud, alpha=1.0):
+    """Draw the cloud"""
+    return sprite_cache.blit(screen, sprite_cache.cloud_frame(cloud), lerp(cloud.prev_x, cloud.x, alpha), cloud.y)
+
+def draw_star(screen, star, alpha=1.0):
+    """Draw the glowing star"""
+    if star.collected:
+        return None
+    return sprite_cache.blit(screen, sprite_cache.star_frame(star), lerp(star.prev_x, star.x, alpha), star.y)
 
-class Bird:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.width = 30
-        self.height = 20
-        self.speed = random.uniform(3, 5)
-        self.wing_flap = 0
-        self.vertical_movement = random.uniform(0.5, 1.5)
-        self.vertical_offset = 0
-    
-    def update(self, game_speed):
-        """Update bird position"""
-        self.x -= self.speed * game_speed
-        self.wing_flap += 0.3
-        self.vertical_offset = math.sin(self.wing_flap) * self.vertical_movement
-    
-    def draw(self, screen):
-        """Draw the bird"""
-        # Bird body
-        bird_y = self.y + self.vertical_offset
-        pygame.draw.ellipse(screen, BLACK, (self.x, bird_y, self.width, self.height))
-        
-        # Wings
-        wing_offset = int(math.sin(self.wing_flap * 2) * 5)
-        pygame.draw.ellipse(screen, DARK_GRAY, (self.x - 5, bird_y - wing_offset, 15, 10))
-        pygame.draw.ellipse(screen, DARK_GRAY, (self.x + 20, bird_y - wing_offset, 15, 10))
-        
-        # Beak
-        pygame.draw.polygon(screen, YELLOW, [
-            (self.x + self.width, bird_y + self.height // 2),
-            (self.x + self.width + 8, bird_y + self.height // 2 - 3),
-            (self.x + self.width + 8, bird_y + self.height // 2 + 3)
-        ])
-    
-    def get_rect(self):
-        """Get collision rectangle"""
-        return pygame.Rect(self.x, self.y + self.vertical_offset, self.width, self.height)
+def draw_bird(screen, bird, alpha=1.0):
+    """Draw the bird"""
+    return sprite_cache.blit(screen, sprite_cache.bird_frame(bird), lerp(bird.prev_x, bird.x, alpha),
+                             bird.y + lerp(bird.prev_offset, bird.vertical_offset, alpha))
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    def __init__(self, dirty_rects=False, max_fps=FPS, time_scale=1.0, record_path=None,
+                 profile_path=None, quality="auto", render_scale=1.0, smooth_upscale=False,
+                 native_hud=True, pipelined=False, capture=None, low_latency=False,
+                 latency_report=False, scores_path=None, collision="rect"):
+        pygame.display.init()
+        self.window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Sky Girl - Cloud Glider")
+        
+        # The scene is drawn in world coordinates through a viewport into
+        # self.screen; below scale 1 that is an offscreen surface which is
+        # upscaled into the window once per frame
+        self.viewport = Viewport(SCREEN_WIDTH, SCREEN_HEIGHT, render_scale)
+        if self.viewport.identity:
+            self.screen = self.window
+        else:
+            self.screen = pygame.Surface(self.viewport.size).convert(self.window)
+        self.smooth_upscale = smooth_upscale
+        
+        # Text goes either on the window at full resolution after the
+        # upscale, or into the scene at the viewport's scale
+        if native_hud or self.viewport.identity:
+            self.ui_viewport = Viewport(SCREEN_WIDTH, SCREEN_HEIGHT)
+            self.ui_deferred = not self.viewport.identity
+        else:
+            self.ui_viewport = self.viewport
+            self.ui_deferred = False
+        self.ui_calls = []
+        
         self.clock = pygame.time.Clock()
         self.state = GameState.MENU
         
-        # Game objects
-        self.sky_girl = SkyGirl(100, SCREEN_HEIGHT // 2)
-        self.clouds = []
-        self.stars = []
-        self.birds = []
-        self.particles = []
-        
-        # Game variables
-        self.score = 0
-        self.game_speed = 1.0
-        self.spawn_timer = 0
-        self.background_offset = 0
-        
-        # Fonts
-        self.font_large = pygame.font.Font(None, 48)
-        self.font_medium = pygame.font.Font(None, 36)
-        self.font_small = pygame.font.Font(None, 24)
-        
-        # Background clouds for decoration
-        self.bg_clouds = []
-        for _ in range(8):
-            self.bg_clouds.append({
-                'x': random.randint(0, SCREEN_WIDTH),
-                'y': random.randint(50, SCREEN_HEIGHT - 100),
-                'size': random.randint(40, 80),
-                'speed': random.uniform(0.2, 0.8)
-            })
+        # Simulation runs at a fixed FPS steps per second of game time;
+        # rendering runs at up to max_fps (0 = uncapped) and interpolates
+        self.timestep = FixedTimestep(FPS, time_scale=time_scale)
+        self.max_fps = max_fps
+        self.alpha = 1.0
+        
+        # Events polled so far this frame with when they were seen. In low
+        # latency mode the frame starts as late as it can and input is
+        # polled while waiting for it (needs a max_fps to pace against)
+        self.events = []
+        self.pacer = FramePacer(max_fps) if low_latency and max_fps > 0 else None
+        self.input_latency = InputLatency()
+        self.latency_report = latency_report
+        
+        # Game simulation (pygame-free) and visual-only effects; spawns are
+        # rolled ahead on a producer thread instead of mid-frame, and
+        # obstacles collide by hitbox rectangle unless collision is "pixel"
+        self.collision = collision
+        self.world = World(spawns=BackgroundSpawnSchedule(), collider=make_collider(collision))
+        self.view = self.world
+        self.particles = ParticleSystem()
+        self.particles.scale = self.viewport.scale
+        
+        # Optional replay recording of each game's seed and flaps
+        self.record_path = record_path
+        self.recorder = None
+        
+        # Optional session telemetry and high scores, written by a
+        # background thread so the loop never waits on the disk
+        self.telemetry = TelemetryStore(scores_path) if scores_path is not None else None
+        
+        # Optional video capture of every presented frame (a FrameCapture)
+        self.capture = capture
+        
+        # Optional worker thread simulating one batch ahead of rendering;
+        # self.view is what gets drawn, the world or a snapshot of it
+        self.pipeline = SimulationPipeline(self.world, self.step_world) if pipelined else None
+        
+        # Fonts are loaded on first use
+        self.text_cache = TextCache()
+        
+        # Background gradient and decoration clouds (baked once)
+        self.background = SkyBackground(*self.viewport.size, scale=self.viewport.scale)
+        
+        # Sprite frames and HUD glyphs are rendered a little at a time while
+        # the menu is idle, so the first menu frame isn't held up by them
+        # and play rarely hits a cache miss
+        sprite_cache.set_viewport(self.viewport)
+        self.warmer = self.warm_steps()
+        
+        # Optional dirty-rect presentation instead of full flips; a scaled
+        # render target is upscaled whole every frame, so it always flips
+        if dirty_rects and self.viewport.identity:
+            self.renderer = DirtyRectRenderer(self.screen)
+        else:
+            self.renderer = None
+        
+        # Effects detail, fixed or adapted to frame time
+        if quality == "auto":
+            self.quality = QualityController(FPS)
+        else:
+            self.quality = QualityController(FPS, tier_by_name(quality), adaptive=False)
+        self.apply_quality(self.quality.tier)
+        
+        # Frame profiler (F3 toggles it and its overlay)
+        self.profiler = FrameProfiler()
+        self.profiler_overlay = None
+        self.profile_path = profile_path
+        if profile_path is not None:
+            self.set_profiling(True)
+    
+    def load_font(self, size):
+        """Load the default font at a world size, starting the font module if needed"""
+        if not pygame.font.get_init():
+            pygame.font.init()
+        return pygame.font.Font(None, self.ui_viewport.length(size))
+    
+    @cached_property
+    def font_large(self):
+        return self.load_font(48)
+    
+    @cached_property
+    def font_medium(self):
+        return self.load_font(36)
+    
+    @cached_property
+    def font_small(self):
+        return self.load_font(24)
+    
+    def warm_steps(self):
+        """Pre-render sprite frames, then the glyphs the HUD is built from, one piece per step"""
+        yield from sprite_cache.warm_steps()
+        digits = tuple("0123456789")
+        self.text_cache.warm_glyphs(self.font_medium, ("Score: ",) + digits, WHITE)
+        yield
+        self.text_cache.warm_glyphs(self.font_medium, ("Score: ",) + digits, BLACK)
+        yield
+        self.text_cache.warm_glyphs(self.font_small, ("Speed: ", ".", "x") + digits, WHITE)
+    
+    def warm_caches(self, budget_ms=WARM_BUDGET_MS):
+        """Spend up to budget_ms pre-rendering; return True once everything is warm"""
+        if self.warmer is None:
+            return True
+        deadline = time.perf_counter() + budget_ms / 1000
+        for _ in self.warmer:
+            if time.perf_counter() >= deadline:
+                return False
+        self.warmer = None
+        return True
+    
+    def apply_quality(self, tier):
+        """Switch effects detail to a quality tier"""
+        self.particles.max_count = tier.max_particles
+        sprite_cache.star_glow = tier.star_glow
+        sprite_cache.wing_glow = tier.wing_glow
+        sprite_cache.simple_clouds = tier.simple_clouds
+        self.background.set_cloud_count(tier.background_clouds)
+    
+    def telemetry_rows(self):
+        """Quality and pipeline telemetry rows for the profiler overlay"""
+        stats = self.quality.stats()
+        mode = "auto" if stats["adaptive"] else "fixed"
+        rows = [("quality", f"{stats['tier']} ({mode})"),
+                ("work avg", f"{stats['average_ms']:.2f} ms"),
+                ("tier changes", str(len(stats["changes"])))]
+        if self.pipeline is not None:
+            stats = self.pipeline.stats()
+            rows.append(("pipeline sim / wait", f"{stats['sim_ms']:.2f} / {stats['wait_ms']:.2f} ms"))
+        stats = self.input_latency.stats()
+        for label, key in (("input>update p50 / p95", "input_to_update"), ("input>flip p50 / p95", "input_to_flip")):
+            rows.append((label, f"{stats[key]['p50_ms']:.1f} / {stats[key]['p95_ms']:.1f} ms"))
+        return rows
+    
+    def set_profiling(self, enabled):
+        """Start or stop timing the phases of each frame"""
+        profiler = self.profiler
+        if enabled == profiler.enabled:
+            return
+        if not enabled:
+            profiler.remove()
+            return
+        if self.profiler_overlay is None:
+            self.profiler_overlay = ProfilerOverlay(profiler, self.font_small, 1000 / FPS,
+                                                    self.telemetry_rows)
+        profiler.instrument(self, "handle_events", "events")
+        profiler.instrument(self, "update_game", "update")
+        profiler.instrument(self, "update_pipelined", "update")
+        profiler.instrument(self.world, "update_clouds", "clouds")
+        profiler.instrument(self.world, "update_stars", "stars")
+        profiler.instrument(self.world, "update_birds", "birds")
+        profiler.instrument(self.world, "check_collisions", "collision")
+        profiler.instrument(self.particles, "update", "particles")
+        profiler.instrument(self, "draw_menu")
+        profiler.instrument(self, "draw_game")
+        profiler.instrument(self, "draw_game_over")
+        profiler.instrument(pygame.display, "flip", "display.flip")
+        profiler.instrument(pygame.display, "update", "display.update")
+    
+    def latency_stats(self):
+        """Input latency percentiles, plus pacing counters in low latency mode"""
+        stats = self.input_latency.stats()
+        stats["mode"] = "low_latency" if self.pacer is not None else "default"
+        if self.pacer is not None:
+            stats["pacer"] = self.pacer.stats()
+        return stats
+    
+    def export_profile(self):
+        """Write the profile as PATH.json (Chrome trace) and PATH.csv"""
+        if self.profile_path is None or not self.profiler.frames:
+            return
+        self.profiler.export_chrome_trace(self.profile_path + ".json")
+        self.profiler.export_csv(self.profile_path + ".csv")
     
     def reset_game(self):
-        """Reset game to initial state"""
-        self.sky_girl = SkyGirl(100, SCREEN_HEIGHT // 2)
-        self.clouds.clear()
-        self.stars.clear()
-        self.birds.clear()
+        """Reset game to initial state with a fresh seed"""
+        self.sync_simulation()
+        seed = random.getrandbits(64)
+        self.world.reset(seed)
         self.particles.clear()
-        self.score = 0
-        self.game_speed = 1.0
-        self.spawn_timer = 0
-    
-    def spawn_objects(self):
-        """Spawn clouds, stars, and birds"""
-        self.spawn_timer += 1
-        
-        # Spawn clouds
-        if self.spawn_timer % max(60, 120 - int(self.score / 10)) == 0:
-            cloud_type = "storm" if random.random() < 0.3 else "normal"
-            y_pos = random.randint(50, SCREEN_HEIGHT - 150)
-            self.clouds.append(Cloud(SCREEN_WIDTH, y_pos, cloud_type))
-        
-        # Spawn stars
-        if self.spawn_timer % max(30, 80 - int(self.score / 5)) == 0:
-            y_pos = random.randint(50, SCREEN_HEIGHT - 50)
-            self.stars.append(Star(SCREEN_WIDTH, y_pos))
-        
-        # Spawn birds
-        if self.spawn_timer % max(120, 200 - int(self.score / 8)) == 0:
-            y_pos = random.randint(100, SCREEN_HEIGHT - 200)
-            self.birds.append(Bird(SCREEN_WIDTH, y_pos))
+        self.input_latency.clear()
+        self.view = self.world
+        if self.record_path is not None:
+            self.recorder = ReplayRecorder(seed, self.collision)
+        self.push_telemetry(GAME_START)
+    
+    def push_telemetry(self, kind):
+        """Queue a telemetry record about the game on screen, if telemetry is on"""
+        if self.telemetry is not None:
+            view = self.view
+            self.telemetry.push(kind, self.world.seed, view.frame, view.score, view.game_speed)
+    
+    def high_scores(self, count=None):
+        """Best scores so far, or none without telemetry"""
+        return self.telemetry.top(count) if self.telemetry is not None else []
+    
+    def save_replay(self):
+        """Write the game being recorded, if any, next to the record path under its seed"""
+        if self.recorder is None:
+            return
+        self.sync_simulation()
+        replay = self.recorder.finish(self.world)
+        replay.save(replay_path(self.record_path, replay.seed))
+        self.recorder = None
     
     def create_star_particles(self, x, y):
         """Create particle effect when collecting a star"""
-        for _ in range(15):
-            particle = Particle(
-                x + random.randint(-10, 10),
-                y + random.randint(-10, 10),
-                random.choice([GOLD, YELLOW, WHITE]),
-                random.randint(2, 6),
-                random.uniform(-3, 3),
-                random.uniform(-3, 3),
-                random.randint(20, 40)
-            )
-            self.particles.append(particle)
+        self.particles.emit(x, y, 15, [GOLD, YELLOW, WHITE])
+    
+    def flap(self, stamp=None):
+        """Make the sky girl flap, via the pipeline when it owns the world"""
+        self.input_latency.pressed(stamp)
+        if self.pipeline is not None:
+            self.pipeline.flap()
+        else:
+            self.world.flap()
+    
+    def sync_simulation(self):
+        """Wait out any pipelined batch so the world can be used directly"""
+        if self.pipeline is not None:
+            self.pipeline.drain()
     
     def update_game(self):
-        """Update game logic"""
+        """Advance game logic by one fixed step"""
+        self.background.update(self.world.game_speed)
         if self.state != GameState.PLAYING:
             return
         
-        # Update sky girl
-        self.sky_girl.update()
+        self.step_world()
+        self.apply_steps(self.world.collected, self.world.game_over, 1)
+    
+    def update_pipelined(self, steps):
+        """Hand the next steps to the worker and take the previous batch to draw"""
+        for _ in range(steps):
+            self.background.update(self.view.game_speed)
+        if self.state != GameState.PLAYING:
+            return
         
-        # Update game speed based on score
-        self.game_speed = 1.0 + (self.score / 100)
+        # Only this thread touches input_latency: the inputs of the batch
+        # just collected count as applied now that it is about to be drawn
+        self.view = self.pipeline.exchange(steps)
+        self.input_latency.returned()
+        self.input_latency.submitted()
+        self.apply_steps(self.view.collected, self.view.game_over, self.view.steps)
+    
+    def step_world(self):
+        """Run one simulation step, recording its input for the replay"""
+        if self.recorder is not None:
+            self.recorder.record(self.world)
+        # Pipelined, this runs on the worker; update_pipelined accounts instead
+        if self.pipeline is None and self.world.flapped:
+            self.input_latency.applied()
+        self.world.step()
+    
+    def apply_steps(self, collected, game_over, steps):
+        """React to simulated steps: star effects, game over, particle motion"""
+        for x, y in collected:
+            self.create_star_particles(x, y)
         
-        # Spawn objects
-        self.spawn_objects()
+        # A progress sample every second of game time
+        frame = self.view.frame
+        if frame // FPS != (frame - steps) // FPS:
+            self.push_telemetry(GAME_SAMPLE)
         
-        # Update clouds
-        for cloud in self.clouds[:]:
-            cloud.update(self.game_speed)
-            if cloud.x < -cloud.width:
-                self.clouds.remove(cloud)
-            
-            # Check collision with sky girl
-            if self.sky_girl.get_rect().colliderect(cloud.get_rect()):
-                self.state = GameState.GAME_OVER
-        
-        # Update stars
-        for star in self.stars[:]:
-            star.update(self.game_speed)
-            if star.x < -star.size:
-                self.stars.remove(star)
-            
-            # Check collection
-            if not star.collected and self.sky_girl.get_rect().colliderect(star.get_rect()):
-                star.collected = True
-                self.score += 10
-                self.create_star_particles(star.x, star.y)
-                self.stars.remove(star)
-        
-        # Update birds
-        for bird in self.birds[:]:
-            bird.update(self.game_speed)
-            if bird.x < -bird.width:
-                self.birds.remove(bird)
-            
-            # Check collision with sky girl
-            if self.sky_girl.get_rect().colliderect(bird.get_rect()):
-                self.state = GameState.GAME_OVER
+        if game_over:
+            self.state = GameState.GAME_OVER
+            self.push_telemetry(GAME_OVER)
+            self.save_replay()
         
         # Update particles
-        for particle in self.particles[:]:
-            if not particle.update():
-                self.particles.remove(particle)
-        
-        # Update background
-        self.background_offset -= self.game_speed
-        if self.background_offset <= -100:
-            self.background_offset = 0
-    
-    def draw_background(self):
-        """Draw scrolling sky background"""
-        # Sky gradient
-        for y in range(SCREEN_HEIGHT):
-            color_ratio = y / SCREEN_HEIGHT
-            r = int(135 + (70 * color_ratio))
-            g = int(206 + (50 * color_ratio))
-            b = int(235 + (20 * color_ratio))
-            pygame.draw.line(self.screen, (r, g, b), (0, y), (SCREEN_WIDTH, y))
-        
-        # Background clouds
-        for cloud in self.bg_clouds:
-            cloud['x'] -= cloud['speed'] * self.game_speed
-            if cloud['x'] < -cloud['size']:
-                cloud['x'] = SCREEN_WIDTH + random.randint(0, 200)
-                cloud['y'] = random.randint(50, SCREEN_HEIGHT - 100)
-            
-            # Draw background cloud
-            alpha_surface = pygame.Surface((cloud['size'], cloud['size'] // 2), pygame.SRCALPHA)
-            pygame.draw.ellipse(alpha_surface, (255, 255, 255, 100), 
-                              (0, 0, cloud['size'], cloud['size'] // 2))
-            self.screen.blit(alpha_surface, (cloud['x'], cloud['y']))
+        for _ in range(steps):
+            self.particles.update()
     
-    def draw_menu(self):
-        """Draw main menu"""
-        self.draw_background()
+    def draw_background(self, static=None, key=None):
+        """Draw scrolling sky background, then any static screen content"""
+        if self.renderer is None:
+            self.background.draw(self.screen)
+            if static is not None:
+                self.draw_ui(static)
+            return
         
+        # Static content is baked into the renderer's cached layer
+        def build(layer):
+            self.background.draw_gradient(layer)
+            if static is not None:
+                static(layer)
+        
+        self.renderer.begin(key, build)
+        self.mark_dirty(self.background.draw_clouds(self.screen))
+    
+    def mark_dirty(self, rect):
+        """Report an area drawn this frame to the dirty-rect renderer"""
+        if self.renderer is not None:
+            self.renderer.add(rect)
+    
+    def draw_ui(self, draw):
+        """Run draw(surface) for text and overlays, now or after the upscale"""
+        if self.ui_deferred:
+            self.ui_calls.append(draw)
+        else:
+            self.mark_dirty(draw(self.screen))
+    
+    def present(self):
+        """Show the finished frame"""
+        if self.renderer is not None:
+            if self.pacer is not None:
+                self.pacer.flipping()
+            self.renderer.present()
+            return
+        if self.screen is not self.window:
+            if self.smooth_upscale:
+                pygame.transform.smoothscale(self.screen, self.window.get_size(), self.window)
+            else:
+                pygame.transform.scale(self.screen, self.window.get_size(), self.window)
+        for draw in self.ui_calls:
+            draw(self.window)
+        self.ui_calls.clear()
+        if self.pacer is not None:
+            self.pacer.flipping()
+        pygame.display.flip()
+    
+    def blit_text(self, surface, font, text, color, x, y, shadow=0, centered=False):
+        """Blit cached text (with a black shadow if shadow > 0) at a world point; return the covered rect"""
+        x, y = self.ui_viewport.to_screen(x, y)
+        if shadow:
+            image = self.text_cache.render_shadowed(font, text, color, BLACK, shadow)
+        else:
+            image = self.text_cache.render(font, text, color)
+        if centered:
+            x -= (image.get_width() - shadow) // 2
+        return surface.blit(image, (x, y))
+    
+    def draw_menu_text(self, surface):
+        """Draw the static menu title and instructions"""
         # Title
-        title = self.font_large.render("Sky Girl - Cloud Glider", True, WHITE)
-        title_shadow = self.font_large.render("Sky Girl - Cloud Glider", True, BLACK)
-        self.screen.blit(title_shadow, (SCREEN_WIDTH//2 - title.get_width()//2 + 2, 152))
-        self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 150))
+        self.blit_text(surface, self.font_large, "Sky Girl - Cloud Glider", WHITE,
+                       SCREEN_WIDTH//2, 150, shadow=2, centered=True)
         
         # Instructions
         instructions = [
@@ -493,72 +458,98 @@ class Game:
         y_offset = 300
         for instruction in instructions:
             if instruction:
-                text = self.font_small.render(instruction, True, WHITE)
-                text_shadow = self.font_small.render(instruction, True, BLACK)
-                self.screen.blit(text_shadow, (SCREEN_WIDTH//2 - text.get_width()//2 + 1, y_offset + 1))
-                self.screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, y_offset))
+                self.blit_text(surface, self.font_small, instruction, WHITE,
+                               SCREEN_WIDTH//2, y_offset, shadow=1, centered=True)
             y_offset += 35
         
+        # High scores
+        scores = self.high_scores(5)
+        if scores:
+            self.blit_text(surface, self.font_small, "High Scores", GOLD,
+                           SCREEN_WIDTH//2, 540, shadow=1, centered=True)
+            for rank, entry in enumerate(scores, 1):
+                self.blit_text(surface, self.font_small, f"{rank}.  {entry.score}", WHITE,
+                               SCREEN_WIDTH//2, 540 + rank * 30, shadow=1, centered=True)
+    
+    def draw_menu(self):
+        """Draw main menu"""
+        version = self.telemetry.version if self.telemetry is not None else 0
+        self.draw_background(self.draw_menu_text, ("menu", version))
+        
         # Draw a demo sky girl
         demo_girl = SkyGirl(SCREEN_WIDTH//2 - 24, 250)
-        demo_girl.wing_angle = math.sin(pygame.time.get_ticks() * 0.01) * 20
-        demo_girl.draw(self.screen)
+        demo_girl.wing_angle = math.sin(time.perf_counter() * 10) * 20
+        self.mark_dirty(draw_sky_girl(self.screen, demo_girl))
     
     def draw_game(self):
         """Draw game screen"""
-        self.draw_background()
+        self.draw_background(key="game")
         
-        # Draw game objects
-        for cloud in self.clouds:
-            cloud.draw(self.screen)
+        # Draw game objects between the last two simulation steps
+        alpha = self.alpha
+        view = self.view
+        for cloud in view.clouds:
+            self.mark_dirty(draw_cloud(self.screen, cloud, alpha))
         
-        for star in self.stars:
-            star.draw(self.screen)
+        for star in view.stars:
+            self.mark_dirty(draw_star(self.screen, star, alpha))
         
-        for bird in self.birds:
-            bird.draw(self.screen)
+        for bird in view.birds:
+            self.mark_dirty(draw_bird(self.screen, bird, alpha))
         
         # Draw particles
-        for particle in self.particles:
-            particle.draw(self.screen)
+        self.mark_dirty(self.particles.draw(self.screen))
         
         # Draw sky girl
-        self.sky_girl.draw(self.screen)
+        self.mark_dirty(draw_sky_girl(self.screen, view.sky_girl, alpha))
         
         # Draw UI
-        score_text = self.font_medium.render(f"Score: {self.score}", True, WHITE)
-        score_shadow = self.font_medium.render(f"Score: {self.score}", True, BLACK)
-        self.screen.blit(score_shadow, (21, 21))
-        self.screen.blit(score_text, (20, 20))
-        
-        speed_text = self.font_small.render(f"Speed: {self.game_speed:.1f}x", True, WHITE)
-        self.screen.blit(speed_text, (20, 60))
+        self.draw_ui(self.draw_hud)
     
-    def draw_game_over(self):
-        """Draw game over screen"""
-        self.draw_background()
-        
+    def draw_hud(self, surface):
+        """Draw score and speed; return the rects covered"""
+        return [
+            self.blit_text(surface, self.font_medium, f"Score: {self.view.score}", WHITE, 20, 20, shadow=1),
+            self.blit_text(surface, self.font_small, f"Speed: {self.view.game_speed:.1f}x", WHITE, 20, 60),
+        ]
+    
+    def draw_game_over_text(self, surface):
+        """Draw the static game over text"""
         # Game over text
-        game_over = self.font_large.render("Game Over!", True, RED)
-        game_over_shadow = self.font_large.render("Game Over!", True, BLACK)
-        self.screen.blit(game_over_shadow, (SCREEN_WIDTH//2 - game_over.get_width()//2 + 2, 252))
-        self.screen.blit(game_over, (SCREEN_WIDTH//2 - game_over.get_width()//2, 250))
+        self.blit_text(surface, self.font_large, "Game Over!", RED,
+                       SCREEN_WIDTH//2, 250, shadow=2, centered=True)
         
         # Final score
-        final_score = self.font_medium.render(f"Final Score: {self.score}", True, WHITE)
-        final_score_shadow = self.font_medium.render(f"Final Score: {self.score}", True, BLACK)
-        self.screen.blit(final_score_shadow, (SCREEN_WIDTH//2 - final_score.get_width()//2 + 1, 321))
-        self.screen.blit(final_score, (SCREEN_WIDTH//2 - final_score.get_width()//2, 320))
+        self.blit_text(surface, self.font_medium, f"Final Score: {self.view.score}", WHITE,
+                       SCREEN_WIDTH//2, 320, shadow=1, centered=True)
+        
+        # Best score so far
+        best = self.high_scores(1)
+        if best:
+            self.blit_text(surface, self.font_small, f"Best: {best[0].score}", GOLD,
+                           SCREEN_WIDTH//2, 360, shadow=1, centered=True)
         
         # Restart instructions
-        restart_text = self.font_small.render("Press SPACE to play again or ESC to return to menu", True, WHITE)
-        restart_shadow = self.font_small.render("Press SPACE to play again or ESC to return to menu", True, BLACK)
-        self.screen.blit(restart_shadow, (SCREEN_WIDTH//2 - restart_text.get_width()//2 + 1, 401))
-        self.screen.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2, 400))
+        self.blit_text(surface, self.font_small, "Press SPACE to play again or ESC to return to menu", WHITE,
+                       SCREEN_WIDTH//2, 400, shadow=1, centered=True)
+    
+    def draw_game_over(self):
+        """Draw game over screen"""
+        best = self.high_scores(1)
+        self.draw_background(self.draw_game_over_text,
+                             ("game_over", self.view.score, best[0].score if best else None))
+    
+    def poll_events(self):
+        """Take pending events off the queue, stamped with when they were seen"""
+        now = time.perf_counter()
+        self.events.extend((event, now) for event in pygame.event.get())
     
     def handle_events(self):
         """Handle game events"""
-        for event in pygame.event.get():
+        self.poll_events()
+        events = self.events
+        self.events = []
+        for event, stamp in events:
             if event.type == pygame.QUIT:
                 return False
             
@@ -568,13 +559,19 @@ class Game:
                         self.state = GameState.PLAYING
                         self.reset_game()
                     elif self.state == GameState.PLAYING:
-                        self.sky_girl.flap()
+                        self.flap(stamp)
                     elif self.state == GameState.GAME_OVER:
                         self.state = GameState.PLAYING
                         self.reset_game()
                 
+                elif event.key == pygame.K_F3:
+                    self.set_profiling(not self.profiler.enabled)
+                
                 elif event.key == pygame.K_ESCAPE:
                     if self.state == GameState.PLAYING or self.state == GameState.GAME_OVER:
+                        if self.state == GameState.PLAYING:
+                            self.push_telemetry(GAME_QUIT)
+                        self.save_replay()
                         self.state = GameState.MENU
         
         return True
@@ -582,10 +579,27 @@ class Game:
     def run(self):
         """Main game loop"""
         running = True
+        self.clock.tick()
         
         while running:
+            if self.pacer is not None:
+                self.pacer.wait(self.poll_events)
+            frame_start = time.perf_counter()
+            self.profiler.tick()
             running = self.handle_events()
-            self.update_game()
+            
+            # Run however many fixed steps the elapsed real time calls for
+            # Whole milliseconds from the clock; the pacer times frames exactly
+            if self.pacer is not None:
+                steps = self.timestep.advance(self.pacer.frame_seconds)
+            else:
+                steps = self.timestep.advance(self.clock.get_time() / 1000)
+            if self.pipeline is not None:
+                self.update_pipelined(steps)
+            else:
+                for _ in range(steps):
+                    self.update_game()
+            self.alpha = self.timestep.alpha
             
             # Draw current state
             if self.state == GameState.MENU:
@@ -595,12 +609,107 @@ class Game:
             elif self.state == GameState.GAME_OVER:
                 self.draw_game_over()
             
-            pygame.display.flip()
-            self.clock.tick(FPS)
-        
+            if self.profiler.enabled:
+                self.draw_ui(self.profiler_overlay.draw)
+            
+            self.present()
+            self.input_latency.presented()
+            if self.pacer is not None:
+                self.pacer.done()
+            if self.pipeline is not None:
+                self.pipeline.presented(self.view)
+            if self.capture is not None:
+                self.capture.capture(self.window)
+            
+            # Adapt effects to how long the frame took, not counting the wait below
+            tier = self.quality.record((time.perf_counter() - frame_start) * 1000)
+            if tier is not None:
+                self.apply_quality(tier)
+            
+            # Idle menu time goes to pre-rendering; it is left out of the
+            # work measured above so it can't push quality down
+            if self.state == GameState.MENU:
+                self.warm_caches()
+            
+            # The pacer has already waited at the top of the frame
+            self.clock.tick(0 if self.pacer is not None else self.max_fps)
+        
+        self.save_replay()
+        if self.pipeline is not None:
+            self.pipeline.close()
+        self.world.spawns.close()
+        if self.telemetry is not None:
+            if self.state == GameState.PLAYING:
+                self.push_telemetry(GAME_QUIT)
+            self.telemetry.close()
+        if self.capture is not None:
+            self.capture.close()
+        self.set_profiling(False)
+        self.export_profile()
+        if self.latency_report:
+            print(json.dumps(self.latency_stats()))
         pygame.quit()
         sys.exit()
 
+def render_scale(text):
+    """argparse type for --render-scale: a fraction of the window in (0, 1]"""
+    try:
+        scale = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {text}") from None
+    if not 0 < scale <= 1:
+        raise argparse.ArgumentTypeError(f"must be above 0 and at most 1, got {text}")
+    return scale
+
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Sky Girl - Cloud Glider")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only push changed screen areas to the display")
+    parser.add_argument("--max-fps", type=int, default=FPS,
+                        help="cap on rendered frames per second, 0 for uncapped (default: %(default)s)")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="game seconds simulated per real second (default: %(default)s)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save a replay of each game, game.sgr as game-SEED.sgr (see replay.py)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="profile from the start and write PATH.json (Chrome trace) and PATH.csv on exit")
+    parser.add_argument("--quality", choices=["auto"] + [tier.name for tier in QUALITY_TIERS], default="auto",
+                        help="effects detail; auto steps down when frames run long (default: %(default)s)")
+    parser.add_argument("--render-scale", type=render_scale, default=1.0,
+                        help="draw the scene at this fraction of the window size, then upscale (default: %(default)s)")
+    parser.add_argument("--smooth-upscale", action="store_true",
+                        help="filter the upscale with smoothscale instead of plain pixel scaling")
+    parser.add_argument("--scaled-hud", action="store_true",
+                        help="draw text at the reduced resolution too instead of at full window resolution")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="simulate on a worker thread one frame ahead of rendering")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="stream every frame as raw RGB to PATH (- for stdout); frames are dropped, "
+                             "never waited for, if writing falls behind")
+    parser.add_argument("--capture-ffmpeg", action="store_true",
+                        help="encode the capture with ffmpeg into PATH instead of writing raw RGB")
+    parser.add_argument("--low-latency", action="store_true",
+                        help="sleep before polling input instead of after drawing, so flaps apply and show sooner")
+    parser.add_argument("--scores", metavar="PATH",
+                        help="keep high scores and session telemetry in PATH (see telemetry.py)")
+    parser.add_argument("--latency-report", action="store_true",
+                        help="print input-to-update and input-to-flip latency percentiles as JSON on exit")
+    parser.add_argument("--collision", choices=COLLISION_MODES, default="rect",
+                        help="obstacle collision by sprite mask or by hitbox rectangle (default: %(default)s)")
+    args = parser.parse_args()
+    
+    capture = None
+    if args.capture is not None:
+        size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        if args.capture_ffmpeg:
+            capture = FrameCapture.to_command(size, ffmpeg_command(size, FPS, args.capture))
+        else:
+            capture = FrameCapture.to_file(size, args.capture)
+    
+    game = Game(dirty_rects=args.dirty_rects, max_fps=args.max_fps, time_scale=args.time_scale,
+                record_path=args.record, profile_path=args.profile, quality=args.quality,
+                render_scale=args.render_scale, smooth_upscale=args.smooth_upscale,
+                native_hud=not args.scaled_hud, pipelined=args.pipelined, capture=capture,
+                low_latency=args.low_latency, latency_report=args.latency_report,
+                scores_path=args.scores, collision=args.collision)
     game.run()
@@ -0,0 +1,130 @@
+import random
+
+import pygame
+
+# Background cloud tuning
+BG_CLOUD_COUNT = 8
+BG_CLOUD_ALPHA = 100
+
+# Gradient surfaces baked once per resolution
+_gradient_cache = {}
+
+# Background cloud sprites baked once per size
+_cloud_sprite_cache = {}
+
+
+def sky_color(ratio):
+    """Get the sky gradient color at a vertical ratio between 0 and 1"""
+    r = int(135 + (70 * ratio))
+    g = int(206 + (50 * ratio))
+    b = int(235 + (20 * ratio))
+    return (r, g, b)
+
+
+def get_gradient(width, height):
+    """Get the baked sky gradient surface for a resolution"""
+    key = (width, height)
+    surface = _gradient_cache.get(key)
+    if surface is None:
+        # One column is enough, the gradient only varies vertically
+        column = pygame.Surface((1, height))
+        for y in range(height):
+            column.set_at((0, y), sky_color(y / height))
+        surface = pygame.transform.scale(column, (width, height))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        _gradient_cache[key] = surface
+    return surface
+
+
+def get_cloud_sprite(size):
+    """Get the pre-rendered translucent background cloud of a given size"""
+    surface = _cloud_sprite_cache.get(size)
+    if surface is None:
+        surface = pygame.Surface((size, size // 2), pygame.SRCALPHA)
+        pygame.draw.ellipse(surface, (255, 255, 255, BG_CLOUD_ALPHA), (0, 0, size, size // 2))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        _cloud_sprite_cache[size] = surface
+    return surface
+
+
+def clear_caches():
+    """Drop every baked background surface (e.g. after a display mode change)"""
+    _gradient_cache.clear()
+    _cloud_sprite_cache.clear()
+
+
+class ParallaxLayer:
+    """A set of background clouds that drift left at their own speeds"""
+
+    def __init__(self, width, height, count, rng=random, scale=1.0):
+        self.width = width
+        self.height = height
+        self.rng = rng
+        self.scale = scale
+        self.clouds = []
+        self.visible = count
+        for _ in range(count):
+            size = max(2, round(rng.randint(40, 80) * scale))
+            self.clouds.append([
+                rng.randint(0, width),
+                self.random_y(),
+                size,
+                rng.uniform(0.2, 0.8) * scale,
+                get_cloud_sprite(size)
+            ])
+
+    def random_y(self):
+        """Pick a height for a cloud (re)entering the layer"""
+        return self.rng.randint(round(50 * self.scale), self.height - round(100 * self.scale))
+
+    def update(self, game_speed):
+        """Scroll the layer and wrap clouds that left the screen"""
+        for cloud in self.clouds:
+            cloud[0] -= cloud[3] * game_speed
+            if cloud[0] < -cloud[2]:
+                cloud[0] = self.width + self.rng.randint(0, round(200 * self.scale))
+                cloud[1] = self.random_y()
+
+    def draw(self, screen, doreturn=False):
+        """Blit the cached cloud sprites at their current offsets"""
+        return screen.blits([(cloud[4], (cloud[0], cloud[1])) for cloud in self.clouds[:self.visible]], doreturn)
+
+
+class SkyBackground:
+    """Sky gradient plus parallax cloud layers composited from cached surfaces"""
+
+    def __init__(self, width, height, cloud_count=BG_CLOUD_COUNT, rng=random, scale=1.0):
+        """width and height are in target pixels; scale is target pixels per world unit"""
+        self.width = width
+        self.height = height
+        self.gradient = get_gradient(width, height)
+        self.layers = [ParallaxLayer(width, height, cloud_count, rng, scale)]
+
+    def update(self, game_speed):
+        """Advance every parallax layer"""
+        for layer in self.layers:
+            layer.update(game_speed)
+
+    def set_cloud_count(self, count):
+        """Draw only the first count clouds of each layer (they all keep drifting)"""
+        for layer in self.layers:
+            layer.visible = min(count, len(layer.clouds))
+
+    def draw(self, screen):
+        """Composite the gradient and cloud layers onto the screen"""
+        self.draw_gradient(screen)
+        for layer in self.layers:
+            layer.draw(screen)
+
+    def draw_gradient(self, surface):
+        """Blit just the static sky gradient"""
+        surface.blit(self.gradient, (0, 0))
+
+    def draw_clouds(self, screen):
+        """Blit the cloud layers; return the rects they covered"""
+        rects = []
+        for layer in self.layers:
+            rects.extend(layer.draw(screen, True))
+        return rects
@@ -0,0 +1,309 @@
+"""Vectorized batch environment that steps N Sky Girl games in lockstep
+
+The rules mirror simulation.World.step, but every game lives in a row of
+NumPy arrays and each entity kind in a fixed number of slots per game,
+so one step() advances all N games with a handful of array operations.
+Spawns come from a SpawnSchedule per game, so game i of a BatchEnv plays
+out exactly like World(seed=env.seeds[i]) with rect collision.
+"""
+import math
+
+import numpy as np
+
+from simulation import DEFAULT_DIFFICULTY, SCREEN_HEIGHT, SCREEN_WIDTH, SpawnSchedule
+
+# Sky girl constants (see simulation.SkyGirl)
+GIRL_X = 100
+GIRL_SIZE = 48
+GIRL_INSET = 8
+GRAVITY = 0.5
+FLAP_POWER = -8
+MAX_FALL_SPEED = 10
+
+BIRD_WIDTH = 30
+BIRD_HEIGHT = 20
+
+# Widest cloud, largest star radius and slowest speed of each kind (see
+# simulation.roll_cloud and friends), which bound how long one stays on screen
+MAX_CLOUD_WIDTH = 120
+MAX_STAR_SIZE = 12
+MIN_CLOUD_SPEED = 2
+MIN_STAR_SPEED = 1
+MIN_BIRD_SPEED = 3
+
+STAR_REWARD = 10
+
+# girl y, girl velocity, game speed, then (dx, y, height) of the nearest
+# cloud, bird and star ahead of the girl
+OBSERVATION_SIZE = 12
+
+# Per-slot arrays of each entity kind, grown together when a game runs out of slots
+_SLOT_ARRAYS = {
+    "cloud": ("cloud_active", "cloud_x", "cloud_y", "cloud_w", "cloud_h", "cloud_speed", "cloud_storm"),
+    "star": ("star_active", "star_x", "star_y", "star_size", "star_speed"),
+    "bird": ("bird_active", "bird_x", "bird_y", "bird_speed", "bird_phase", "bird_amplitude"),
+}
+
+
+def entity_slots(interval_floor, extent, min_speed, speed_start):
+    """Slots one game needs for a kind spawned at most every interval_floor frames"""
+    frames_on_screen = math.ceil((SCREEN_WIDTH + extent) / (min_speed * speed_start)) + 1
+    return frames_on_screen // interval_floor + 1
+
+
+class BatchEnv:
+    """N independent games stored as arrays and advanced together"""
+
+    def __init__(self, num_games, seed=None, auto_reset=True, difficulty=DEFAULT_DIFFICULTY):
+        self.num_games = num_games
+        self.auto_reset = auto_reset
+        self.difficulty = d = difficulty
+        self.rng = np.random.default_rng(seed)
+        n = num_games
+
+        # Spawn seed and upcoming spawns of each game
+        self.seeds = np.zeros(n, dtype=np.int64)
+        self.schedules = [SpawnSchedule() for _ in range(n)]
+
+        # Slots per game: enough for an entity spawned every interval floor
+        # to leave the screen. A score-driven interval change can bring two
+        # spawns closer than the floor, so a game that still runs out gets
+        # more slots (see _free_slots) rather than losing the spawn
+        cloud_slots = entity_slots(d.cloud_interval_floor, MAX_CLOUD_WIDTH, MIN_CLOUD_SPEED, d.speed_start)
+        star_slots = entity_slots(d.star_interval_floor, MAX_STAR_SIZE, MIN_STAR_SPEED, d.speed_start)
+        bird_slots = entity_slots(d.bird_interval_floor, BIRD_WIDTH, MIN_BIRD_SPEED, d.speed_start)
+
+        self.girl_y = np.zeros(n, dtype=np.float64)
+        self.girl_vy = np.zeros(n, dtype=np.float64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.spawn_timer = np.zeros(n, dtype=np.int64)
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+
+        # Score and length of the last finished game in each slot
+        self.final_score = np.zeros(n, dtype=np.int64)
+        self.final_frame = np.zeros(n, dtype=np.int64)
+
+        self.cloud_active = np.zeros((n, cloud_slots), dtype=bool)
+        self.cloud_x = np.zeros((n, cloud_slots), dtype=np.float64)
+        self.cloud_y = np.zeros((n, cloud_slots), dtype=np.int64)
+        self.cloud_w = np.zeros((n, cloud_slots), dtype=np.int64)
+        self.cloud_h = np.zeros((n, cloud_slots), dtype=np.int64)
+        self.cloud_speed = np.zeros((n, cloud_slots), dtype=np.float64)
+        self.cloud_storm = np.zeros((n, cloud_slots), dtype=bool)
+
+        self.star_active = np.zeros((n, star_slots), dtype=bool)
+        self.star_x = np.zeros((n, star_slots), dtype=np.float64)
+        self.star_y = np.zeros((n, star_slots), dtype=np.int64)
+        self.star_size = np.zeros((n, star_slots), dtype=np.int64)
+        self.star_speed = np.zeros((n, star_slots), dtype=np.float64)
+
+        self.bird_active = np.zeros((n, bird_slots), dtype=bool)
+        self.bird_x = np.zeros((n, bird_slots), dtype=np.float64)
+        self.bird_y = np.zeros((n, bird_slots), dtype=np.int64)
+        self.bird_speed = np.zeros((n, bird_slots), dtype=np.float64)
+        self.bird_phase = np.zeros((n, bird_slots), dtype=np.float64)
+        self.bird_amplitude = np.zeros((n, bird_slots), dtype=np.float64)
+
+        # Statistics
+        self.slot_growths = 0
+
+        self.reset()
+
+    def reset(self, mask=None, seeds=None):
+        """Reset every game (or only those selected by a boolean mask); return observations
+
+        Each game gets a spawn seed from the env's RNG unless seeds gives one
+        per selected game.
+        """
+        if mask is None:
+            mask = np.ones(self.num_games, dtype=bool)
+        rows = np.flatnonzero(mask)
+        if seeds is None:
+            seeds = self.rng.integers(0, 2**63 - 1, len(rows))
+        elif len(seeds) != len(rows):
+            raise ValueError(f"{len(seeds)} seeds for {len(rows)} games")
+        self.seeds[rows] = seeds
+        for row, seed in zip(rows.tolist(), self.seeds[rows].tolist()):
+            self.schedules[row].reset(seed, self.difficulty)
+        self.girl_y[mask] = SCREEN_HEIGHT // 2
+        self.girl_vy[mask] = 0
+        self.score[mask] = 0
+        self.spawn_timer[mask] = 0
+        self.frame[mask] = 0
+        self.done[mask] = False
+        self.cloud_active[mask] = False
+        self.star_active[mask] = False
+        self.bird_active[mask] = False
+        return self.observe()
+
+    @property
+    def game_speed(self):
+        """Per-game scroll speed multiplier"""
+        return self.difficulty.speed_start + self.score / self.difficulty.speed_divisor
+
+    def _grow(self, kind):
+        """Double the slots of one entity kind in every game"""
+        for name in _SLOT_ARRAYS[kind]:
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)], axis=1))
+        self.slot_growths += 1
+
+    def _free_slots(self, kind, spawn):
+        """Pick the first free slot of a kind in each spawning game; return (rows, slots)"""
+        rows = np.flatnonzero(spawn)
+        active = getattr(self, f"{kind}_active")[rows]
+        slots = np.argmin(active, axis=1)
+        if active[np.arange(len(rows)), slots].any():
+            self._grow(kind)
+            return self._free_slots(kind, spawn)
+        return rows, slots
+
+    def _due(self, live, start, floor, divisor):
+        """Live games whose spawn timer hits a kind's interval, as in World.spawn_objects"""
+        interval = np.maximum(floor, start - (self.score / divisor).astype(np.int64))
+        return live & (self.spawn_timer % interval == 0)
+
+    def _next_spawns(self, kind, rows):
+        """Take the next spawn of a kind for each row, as columns"""
+        schedules = self.schedules
+        return zip(*[schedules[row].next(kind) for row in rows.tolist()])
+
+    def _spawn(self, live):
+        """Spawn clouds, stars and birds on the same schedule as World.spawn_objects, in live games"""
+        d = self.difficulty
+        self.spawn_timer += live
+
+        # Clouds
+        rows, slots = self._free_slots("cloud", self._due(
+            live, d.cloud_interval_start, d.cloud_interval_floor, d.cloud_interval_divisor))
+        if len(rows):
+            y, cloud_type, width, height, speed = self._next_spawns("cloud", rows)
+            self.cloud_active[rows, slots] = True
+            self.cloud_storm[rows, slots] = np.array(cloud_type) == "storm"
+            self.cloud_x[rows, slots] = SCREEN_WIDTH
+            self.cloud_y[rows, slots] = y
+            self.cloud_speed[rows, slots] = speed
+            self.cloud_w[rows, slots] = width
+            self.cloud_h[rows, slots] = height
+
+        # Stars
+        rows, slots = self._free_slots("star", self._due(
+            live, d.star_interval_start, d.star_interval_floor, d.star_interval_divisor))
+        if len(rows):
+            y, size, speed = self._next_spawns("star", rows)
+            self.star_active[rows, slots] = True
+            self.star_x[rows, slots] = SCREEN_WIDTH
+            self.star_y[rows, slots] = y
+            self.star_size[rows, slots] = size
+            self.star_speed[rows, slots] = speed
+
+        # Birds
+        rows, slots = self._free_slots("bird", self._due(
+            live, d.bird_interval_start, d.bird_interval_floor, d.bird_interval_divisor))
+        if len(rows):
+            y, speed, vertical_movement = self._next_spawns("bird", rows)
+            self.bird_active[rows, slots] = True
+            self.bird_x[rows, slots] = SCREEN_WIDTH
+            self.bird_y[rows, slots] = y
+            self.bird_speed[rows, slots] = speed
+            self.bird_phase[rows, slots] = 0
+            self.bird_amplitude[rows, slots] = vertical_movement
+
+    def step(self, actions):
+        """Advance every game one frame; actions is a length-N flap mask
+
+        Returns (observations, rewards, dones). With auto_reset, finished
+        games are restarted and their result kept in final_score/final_frame;
+        without it they stay frozen, with no reward and no further dones,
+        until reset().
+        """
+        # Finished games take no part in the step
+        live = ~self.done
+        moving = live[:, None]
+        actions = np.asarray(actions, dtype=bool) & live
+        self.frame += live
+
+        # Sky girl physics
+        self.girl_vy[actions] = FLAP_POWER
+        girl_vy = np.minimum(self.girl_vy + GRAVITY, MAX_FALL_SPEED)
+        girl_y = self.girl_y + girl_vy
+        clamped = (girl_y < 0) | (girl_y > SCREEN_HEIGHT - GIRL_SIZE)
+        np.clip(girl_y, 0, SCREEN_HEIGHT - GIRL_SIZE, out=girl_y)
+        girl_vy[clamped] = 0
+        np.copyto(self.girl_vy, girl_vy, where=live)
+        np.copyto(self.girl_y, girl_y, where=live)
+
+        girl_left = GIRL_X + GIRL_INSET
+        girl_right = girl_left + GIRL_SIZE - 2 * GIRL_INSET
+        girl_top = (self.girl_y + GIRL_INSET).astype(np.int64)[:, None]
+        girl_bottom = girl_top + GIRL_SIZE - 2 * GIRL_INSET
+
+        speed = self.game_speed[:, None]
+        self._spawn(live)
+
+        # Clouds
+        self.cloud_x -= self.cloud_speed * speed * moving
+        self.cloud_active &= self.cloud_x >= -self.cloud_w
+        left = self.cloud_x.astype(np.int64)
+        hit = (self.cloud_active & moving
+               & (left < girl_right) & (girl_left < left + self.cloud_w)
+               & (self.cloud_y < girl_bottom) & (girl_top < self.cloud_y + self.cloud_h))
+        crashed = hit.any(axis=1)
+
+        # Stars
+        self.star_x -= self.star_speed * speed * moving
+        self.star_active &= self.star_x >= -self.star_size
+        left = (self.star_x - self.star_size).astype(np.int64)
+        top = self.star_y - self.star_size
+        collected = (self.star_active & moving
+                     & (left < girl_right) & (girl_left < left + 2 * self.star_size)
+                     & (top < girl_bottom) & (girl_top < top + 2 * self.star_size))
+        self.star_active &= ~collected
+        rewards = collected.sum(axis=1) * STAR_REWARD
+        self.score += rewards
+
+        # Birds
+        self.bird_x -= self.bird_speed * speed * moving
+        self.bird_phase += 0.3 * moving
+        left = self.bird_x.astype(np.int64)
+        self.bird_active &= self.bird_x >= -BIRD_WIDTH
+        top = (self.bird_y + np.sin(self.bird_phase) * self.bird_amplitude).astype(np.int64)
+        hit = (self.bird_active & moving
+               & (left < girl_right) & (girl_left < left + BIRD_WIDTH)
+               & (top < girl_bottom) & (girl_top < top + BIRD_HEIGHT))
+        crashed |= hit.any(axis=1)
+
+        dones = crashed & live
+        self.done |= dones
+        if self.auto_reset and dones.any():
+            self.final_score[dones] = self.score[dones]
+            self.final_frame[dones] = self.frame[dones]
+            self.reset(dones)
+        return self.observe(), rewards.astype(np.float32), dones
+
+    def _nearest(self, active, x, extent, y, height):
+        """(dx, y, height) of the nearest active entity whose right edge is ahead of the girl"""
+        ahead = active & (x + extent > GIRL_X)
+        dx = np.where(ahead, x - GIRL_X, np.inf)
+        index = np.argmin(dx, axis=1)
+        rows = np.arange(self.num_games)
+        found = ahead[rows, index]
+        return (np.where(found, dx[rows, index], SCREEN_WIDTH),
+                np.where(found, y[rows, index], 0),
+                np.where(found, height[rows, index], 0))
+
+    def observe(self):
+        """Build the (N, OBSERVATION_SIZE) observation matrix"""
+        obs = np.empty((self.num_games, OBSERVATION_SIZE), dtype=np.float32)
+        obs[:, 0] = self.girl_y
+        obs[:, 1] = self.girl_vy
+        obs[:, 2] = self.game_speed
+        obs[:, 3:6] = np.stack(self._nearest(
+            self.cloud_active, self.cloud_x, self.cloud_w, self.cloud_y, self.cloud_h), axis=1)
+        bird_height = np.full(self.bird_y.shape, BIRD_HEIGHT)
+        obs[:, 6:9] = np.stack(self._nearest(
+            self.bird_active, self.bird_x, BIRD_WIDTH, self.bird_y, bird_height), axis=1)
+        obs[:, 9:12] = np.stack(self._nearest(
+            self.star_active, self.star_x, self.star_size, self.star_y, 2 * self.star_size), axis=1)
+        return obs
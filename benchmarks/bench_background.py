@@ -0,0 +1,85 @@
+"""Compare per-frame background cost of the legacy renderer and the cached one
+
+Run from the repository root:
+    python benchmarks/bench_background.py [frames]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from background import SkyBackground
+
+WIDTH = 1024
+HEIGHT = 768
+
+
+def make_legacy_clouds(rng):
+    """Build background clouds the way the original Game did"""
+    return [{
+        'x': rng.randint(0, WIDTH),
+        'y': rng.randint(50, HEIGHT - 100),
+        'size': rng.randint(40, 80),
+        'speed': rng.uniform(0.2, 0.8)
+    } for _ in range(8)]
+
+
+def draw_legacy(screen, bg_clouds, rng, game_speed):
+    """The original per-frame draw_background"""
+    for y in range(HEIGHT):
+        color_ratio = y / HEIGHT
+        r = int(135 + (70 * color_ratio))
+        g = int(206 + (50 * color_ratio))
+        b = int(235 + (20 * color_ratio))
+        pygame.draw.line(screen, (r, g, b), (0, y), (WIDTH, y))
+
+    for cloud in bg_clouds:
+        cloud['x'] -= cloud['speed'] * game_speed
+        if cloud['x'] < -cloud['size']:
+            cloud['x'] = WIDTH + rng.randint(0, 200)
+            cloud['y'] = rng.randint(50, HEIGHT - 100)
+        alpha_surface = pygame.Surface((cloud['size'], cloud['size'] // 2), pygame.SRCALPHA)
+        pygame.draw.ellipse(alpha_surface, (255, 255, 255, 100),
+                            (0, 0, cloud['size'], cloud['size'] // 2))
+        screen.blit(alpha_surface, (cloud['x'], cloud['y']))
+
+
+def time_frames(frames, draw):
+    """Return mean milliseconds per call of draw()"""
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+
+    rng = random.Random(1)
+    bg_clouds = make_legacy_clouds(rng)
+    legacy_ms = time_frames(frames, lambda: draw_legacy(screen, bg_clouds, rng, 1.0))
+
+    background = SkyBackground(WIDTH, HEIGHT, rng=random.Random(1))
+
+    def draw_cached():
+        background.update(1.0)
+        background.draw(screen)
+
+    cached_ms = time_frames(frames, draw_cached)
+
+    print(f"frames:  {frames}")
+    print(f"legacy:  {legacy_ms:.3f} ms/frame")
+    print(f"cached:  {cached_ms:.3f} ms/frame")
+    print(f"speedup: {legacy_ms / cached_ms:.1f}x")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
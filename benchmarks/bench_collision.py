@@ -0,0 +1,115 @@
+"""Compare per-frame collision cost of naive rect tests, the broad phase,
+and the broad phase followed by the pixel mask narrow phase
+
+Run from the repository root:
+    python benchmarks/bench_collision.py [obstacles ...]
+"""
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collision import CollisionIndex
+from masks import PixelCollider
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, Cloud, SkyGirl
+
+FRAMES = 300
+
+
+def make_clouds(count, rng):
+    """Scatter clouds across the screen, as in stress mode"""
+    clouds = []
+    for _ in range(count):
+        cloud = Cloud(rng.uniform(0, SCREEN_WIDTH), rng.randint(50, SCREEN_HEIGHT - 150), "storm", rng)
+        clouds.append(cloud)
+    return clouds
+
+
+def scroll(clouds):
+    """Move clouds left and wrap them, keeping the count constant"""
+    for cloud in clouds:
+        cloud.update(1.0)
+        if cloud.x < -cloud.width:
+            cloud.x += SCREEN_WIDTH + cloud.width
+            cloud.hitbox.x = int(cloud.x)
+
+
+def bench_naive(count):
+    """Rebuild a rect per entity per frame and test each one"""
+    rng = random.Random(count)
+    girl = SkyGirl(100, SCREEN_HEIGHT // 2)
+    clouds = make_clouds(count, rng)
+    elapsed = 0.0
+    for _ in range(FRAMES):
+        scroll(clouds)
+        start = time.perf_counter()
+        girl_rect = girl.get_rect()
+        for cloud in clouds:
+            gx, gy, gw, gh = girl_rect
+            cx, cy, cw, ch = int(cloud.x), int(cloud.y), cloud.width, cloud.height
+            if gx < cx + cw and cx < gx + gw and gy < cy + ch and cy < gy + gh:
+                pass
+        elapsed += time.perf_counter() - start
+    return elapsed * 1e6 / FRAMES
+
+
+def bench_index(count):
+    """Refresh the sweep-and-prune index and query it once"""
+    rng = random.Random(count)
+    girl = SkyGirl(100, SCREEN_HEIGHT // 2)
+    clouds = make_clouds(count, rng)
+    index = CollisionIndex()
+    for cloud in clouds:
+        index.add(cloud.hitbox)
+    elapsed = 0.0
+    for _ in range(FRAMES):
+        scroll(clouds)
+        start = time.perf_counter()
+        index.refresh()
+        index.first_hit(girl.hitbox)
+        elapsed += time.perf_counter() - start
+    return elapsed * 1e6 / FRAMES
+
+
+def bench_pixel(count):
+    """Refresh the index and run the mask narrow phase; also count rect and mask hits"""
+    rng = random.Random(count)
+    girl = SkyGirl(100, SCREEN_HEIGHT // 2)
+    clouds = make_clouds(count, rng)
+    index = CollisionIndex()
+    for cloud in clouds:
+        index.add(cloud.hitbox)
+    world = SimpleNamespace(sky_girl=girl, obstacles=index)
+    collider = PixelCollider()
+    # Build the masks up front; steady state is what matters
+    for cloud in clouds:
+        collider.cache.cloud(cloud)
+    collider.cache.girl()
+    elapsed = 0.0
+    rect_hits = pixel_hits = 0
+    for _ in range(FRAMES):
+        scroll(clouds)
+        start = time.perf_counter()
+        index.refresh()
+        hit = collider.first_hit(world)
+        elapsed += time.perf_counter() - start
+        rect_hits += index.first_hit(girl.hitbox) is not None
+        pixel_hits += hit is not None
+    return elapsed * 1e6 / FRAMES, rect_hits, pixel_hits
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 100, 500, 2000]
+    print(f"{'obstacles':>10} {'naive us':>10} {'index us':>10} {'pixel us':>10} "
+          f"{'rect hits':>10} {'mask hits':>10}")
+    for count in counts:
+        pixel_us, rect_hits, pixel_hits = bench_pixel(count)
+        print(f"{count:>10} {bench_naive(count):>10.1f} {bench_index(count):>10.1f} {pixel_us:>10.1f} "
+              f"{rect_hits:>10} {pixel_hits:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Measure update and draw cost of the array-backed particle system
+
+Run from the repository root:
+    python benchmarks/bench_particles.py [live_particles]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+
+from particles import ParticleSystem
+
+WIDTH = 1024
+HEIGHT = 768
+COLORS = [(255, 215, 0), (255, 255, 0), (255, 255, 255)]
+
+
+def main():
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    frames = 120
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    system = ParticleSystem(rng=np.random.default_rng(1))
+    rng = np.random.default_rng(2)
+
+    # Emit bursts every frame so the live count settles near the target
+    bursts = max(1, target // (15 * 30))
+    update_time = draw_time = 0.0
+    for _ in range(frames):
+        for x, y in rng.uniform((0, 0), (WIDTH, HEIGHT), (bursts, 2)):
+            system.emit(x, y, 15, COLORS)
+        start = time.perf_counter()
+        system.update()
+        update_time += time.perf_counter() - start
+        start = time.perf_counter()
+        system.draw(screen)
+        draw_time += time.perf_counter() - start
+
+    update_ms = update_time * 1000 / frames
+    draw_ms = draw_time * 1000 / frames
+    print(f"live particles: {len(system)}")
+    print(f"update: {update_ms:.3f} ms/frame")
+    print(f"draw:   {draw_ms:.3f} ms/frame")
+    print(f"total:  {update_ms + draw_ms:.3f} ms/frame (budget {1000 / 60:.1f})")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
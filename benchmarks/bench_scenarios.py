@@ -0,0 +1,268 @@
+"""Run scripted stress scenarios through the real Game under the dummy driver
+
+Each scenario drives Game.update_game and the draw methods exactly as the
+main loop does and records per-frame update and draw time. A second pass
+under tracemalloc records bytes allocated per frame and peak traced
+memory. Results can be saved as JSON and compared against a saved
+baseline; the run fails if any scenario got slower or allocates more
+than the threshold allows.
+
+Run from the repository root:
+    python benchmarks/bench_scenarios.py [--save results.json]
+    python benchmarks/bench_scenarios.py --baseline results.json [--threshold 0.15]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from Sky_girl_could_glider import Game, GameState
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, roll_cloud
+
+FRAMES = 300
+WARMUP_FRAMES = 30
+ALLOC_FRAMES = 60
+SEED = 1
+
+# Relative slowdown (or allocation growth) counted as a regression
+REGRESSION_THRESHOLD = 0.15
+
+# Differences smaller than this are noise whatever the ratio
+MIN_REGRESSION_MS = 0.05
+MIN_REGRESSION_BYTES = 1024
+
+
+def keep_alive(game):
+    """Autopilot: flap when sinking into the lower half and ignore game over"""
+    world = game.world
+    if world.sky_girl.y > SCREEN_HEIGHT // 2 and world.sky_girl.velocity_y > 0:
+        world.flap()
+    if game.state == GameState.GAME_OVER:
+        world.game_over = False
+        game.state = GameState.PLAYING
+
+
+def setup_playing(game):
+    """Start a seeded game"""
+    game.state = GameState.PLAYING
+    game.world.reset(SEED)
+    game.particles.clear()
+
+
+def scenario_menu_idle(game):
+    """Main menu with nothing pressed"""
+    game.state = GameState.MENU
+    return None
+
+
+def scenario_normal_play(game):
+    """Ordinary play with the autopilot"""
+    setup_playing(game)
+    return keep_alive
+
+
+def scenario_particles_10k(game):
+    """Star bursts every frame, about 10k live particles"""
+    setup_playing(game)
+    rng = random.Random(SEED)
+
+    def script(game):
+        keep_alive(game)
+        # About 330 new particles a frame with 20-40 frame lives keeps ~10k alive
+        for _ in range(22):
+            game.create_star_particles(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT))
+    return script
+
+
+def scenario_storm_clouds(game):
+    """Three hundred storm clouds on screen at all times"""
+    setup_playing(game)
+    world = game.world
+    rng = random.Random(SEED)
+
+    def fill(count):
+        for _ in range(count):
+            cloud = world.cloud_pool.spawn(rng.uniform(0, SCREEN_WIDTH), roll_cloud(rng, storm_chance=1.0),
+                                           world.rng)
+            world.obstacles.add(cloud.hitbox)
+
+    fill(300)
+
+    def script(game):
+        keep_alive(game)
+        fill(300 - len(world.clouds))
+    return script
+
+
+def scenario_max_speed(game):
+    """Score pinned high: top game speed and fastest spawn schedule"""
+    setup_playing(game)
+    game.world.score = 10000
+
+    def script(game):
+        keep_alive(game)
+        game.world.score = 10000
+    return script
+
+
+SCENARIOS = {
+    "menu_idle": scenario_menu_idle,
+    "normal_play": scenario_normal_play,
+    "particles_10k": scenario_particles_10k,
+    "storm_clouds": scenario_storm_clouds,
+    "max_speed": scenario_max_speed,
+}
+
+
+def draw(game):
+    """Draw the current state the way Game.run does"""
+    if game.state == GameState.MENU:
+        game.draw_menu()
+    elif game.state == GameState.PLAYING:
+        game.draw_game()
+    elif game.state == GameState.GAME_OVER:
+        game.draw_game_over()
+    game.present()
+
+
+def frame(game, script):
+    """Run one frame; return (update seconds, draw seconds)"""
+    if script is not None:
+        script(game)
+    start = time.perf_counter()
+    game.update_game()
+    middle = time.perf_counter()
+    draw(game)
+    return middle - start, time.perf_counter() - middle
+
+
+def stats(values):
+    """Mean and tail of per-frame milliseconds"""
+    values = sorted(v * 1000 for v in values)
+    return {
+        "mean": sum(values) / len(values),
+        "p50": values[len(values) // 2],
+        "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+        "max": values[-1],
+    }
+
+
+def run_scenario(game, name, frames):
+    """Time a scenario, then rerun it under tracemalloc for allocation figures"""
+    random.seed(SEED)
+    script = SCENARIOS[name](game)
+    for _ in range(WARMUP_FRAMES):
+        frame(game, script)
+
+    update_times = []
+    draw_times = []
+    for _ in range(frames):
+        update_time, draw_time = frame(game, script)
+        update_times.append(update_time)
+        draw_times.append(draw_time)
+
+    tracemalloc.start()
+    allocated = peak = 0
+    try:
+        for _ in range(ALLOC_FRAMES):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            frame(game, script)
+            frame_peak = tracemalloc.get_traced_memory()[1]
+            allocated += frame_peak - before
+            peak = max(peak, frame_peak)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "frames": frames,
+        "update_ms": stats(update_times),
+        "draw_ms": stats(draw_times),
+        "frame_ms": stats([u + d for u, d in zip(update_times, draw_times)]),
+        "alloc_bytes_per_frame": allocated / ALLOC_FRAMES,
+        "peak_traced_kib": peak / 1024,
+        "particles": len(game.particles),
+        "clouds": len(game.world.clouds),
+    }
+
+
+def compare(results, baseline, threshold):
+    """List human-readable regressions of results against baseline"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("update_ms", "draw_ms", "frame_ms"):
+            for key in ("mean", "p95"):
+                old, new = previous[metric][key], current[metric][key]
+                if new > old * (1 + threshold) and new - old > MIN_REGRESSION_MS:
+                    regressions.append(f"{name}: {metric} {key} {old:.3f} -> {new:.3f} ms")
+        old, new = previous["alloc_bytes_per_frame"], current["alloc_bytes_per_frame"]
+        if new > old * (1 + threshold) and new - old > MIN_REGRESSION_BYTES:
+            regressions.append(f"{name}: alloc {old:.0f} -> {new:.0f} bytes/frame")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Sky Girl stress scenarios")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--frames", type=int, default=FRAMES, help="timed frames per scenario")
+    parser.add_argument("--dirty-rects", action="store_true", help="use the dirty-rect renderer")
+    parser.add_argument("--quality", default="high", help="fixed quality tier to run at (default: %(default)s)")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="fail on regressions against these results")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed relative slowdown (default: %(default)s)")
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+
+    game = Game(dirty_rects=args.dirty_rects, quality=args.quality)
+    # Measure steady-state frames, not the one-off cache warm-up
+    game.warm_caches(float("inf"))
+    results = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+        "dirty_rects": args.dirty_rects,
+        "quality": args.quality,
+        "scenarios": {},
+    }
+    print(f"{'scenario':<16}{'update ms':>12}{'draw ms':>12}{'p95 frame':>12}{'alloc B/f':>12}{'peak KiB':>10}")
+    for name in args.scenarios or SCENARIOS:
+        result = run_scenario(game, name, args.frames)
+        results["scenarios"][name] = result
+        print(f"{name:<16}{result['update_ms']['mean']:>12.3f}{result['draw_ms']['mean']:>12.3f}"
+              f"{result['frame_ms']['p95']:>12.3f}{result['alloc_bytes_per_frame']:>12.0f}"
+              f"{result['peak_traced_kib']:>10.0f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
+        print("no regressions")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
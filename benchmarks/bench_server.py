@@ -0,0 +1,269 @@
+"""Load-test server.py: how many sessions one core keeps at 60 ticks/s
+
+Starts server.py in a child process, pinned to one CPU with this client
+on the others where the machine has more than one (on a single CPU the
+two share it, so the result is a lower bound), or uses --connect.
+Then adds bots level by level. Each bot plays its own session: it
+reads every snapshot, flaps to hover around mid-screen and starts a new
+game after each game over. A few bots also decode every snapshot in
+full, which checks that the deltas apply cleanly.
+
+After each level settles, the server's own counters are sampled over a
+window. A level is sustained if the server ticked at the full rate
+without dropping ticks, kept its 95th percentile tick inside the budget,
+and deferred or skipped next to no snapshots (a preempted tick defers a
+few even far below capacity). Snapshots received per bot
+are reported too, but on a shared CPU they also reflect how well the
+bots keep up. The ramp stops at the first level that fails or is
+refused.
+
+Run from the repository root:
+    python benchmarks/bench_server.py [--levels 25,50,100,200] [--window 5] [--save server.json]
+    python benchmarks/bench_server.py --connect 127.0.0.1:7777
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from protocol import (DELTA, ERROR, FLAP, GAME_OVER_FLAG, JOIN, KEYFRAME, SNAPSHOT_HEADER, STATS,
+                      STATS_REPLY, WELCOME, SnapshotDecoder, pack_message, read_message)
+from server import TICK_RATE
+from simulation import SCREEN_HEIGHT
+
+LEVELS = (25, 50, 100, 200, 400, 800)
+
+# Seconds to let a level settle before measuring it
+SETTLE_SECONDS = 2.0
+WINDOW_SECONDS = 5.0
+
+# Bots that also decode every snapshot in full
+VERIFY_BOTS = 2
+
+# Share of the tick rate, and of the snapshots due, a level must reach
+SUSTAINED_SHARE = 0.98
+
+# Bots hover around this height
+TARGET_Y = SCREEN_HEIGHT // 2
+
+
+class Bot:
+    """One client playing its own session"""
+
+    def __init__(self, verify=False):
+        self.decoder = SnapshotDecoder() if verify else None
+        self.error = None
+        self.task = None
+
+        # Statistics
+        self.snapshots = 0
+        self.bytes = 0
+        self.flaps = 0
+        self.games = 0
+
+    async def start(self, host, port):
+        """Connect and join; return True once the server has welcomed the bot"""
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(pack_message(JOIN))
+        kind, payload = await read_message(self.reader)
+        if kind != WELCOME:
+            self.error = payload.decode(errors="replace") if kind == ERROR else f"unexpected message {kind}"
+            self.writer.close()
+            return False
+        self.task = asyncio.create_task(self.play())
+        return True
+
+    async def play(self):
+        """Read snapshots and answer them with flaps until cancelled"""
+        last_y = None
+        over = False
+        try:
+            while True:
+                kind, payload = await read_message(self.reader)
+                if kind != KEYFRAME and kind != DELTA:
+                    continue
+                self.snapshots += 1
+                self.bytes += len(payload) + 3
+                if self.decoder is not None:
+                    self.decoder.apply(kind, payload)
+                _, _, _, girl_y, _, flags = SNAPSHOT_HEADER.unpack_from(payload)
+                if flags & GAME_OVER_FLAG:
+                    if not over:
+                        over = True
+                        self.games += 1
+                        self.flap()
+                    continue
+                over = False
+                # Flap when falling below the target, as hover_policy does
+                if last_y is not None and girl_y > last_y and girl_y > TARGET_Y:
+                    self.flap()
+                last_y = girl_y
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.error = repr(exc)
+
+    def flap(self):
+        self.writer.write(pack_message(FLAP))
+        self.flaps += 1
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+        self.writer.close()
+
+
+async def server_stats(host, port):
+    """Ask the server for its counters over a separate connection"""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(pack_message(STATS))
+    kind, payload = await read_message(reader)
+    writer.close()
+    if kind != STATS_REPLY:
+        raise RuntimeError(f"unexpected reply {kind}")
+    return json.loads(payload)
+
+
+async def measure(host, port, bots, window):
+    """Sample the server and the bots over a window; return one level's results"""
+    before = await server_stats(host, port)
+    received = sum(bot.snapshots for bot in bots)
+    received_bytes = sum(bot.bytes for bot in bots)
+    start = time.perf_counter()
+    await asyncio.sleep(window)
+    elapsed = time.perf_counter() - start
+    after = await server_stats(host, port)
+    received = sum(bot.snapshots for bot in bots) - received
+    received_bytes = sum(bot.bytes for bot in bots) - received_bytes
+
+    def delta(name):
+        return after[name] - before[name]
+
+    ticks_per_second = delta("ticks") / elapsed
+    missed = delta("deferred_snapshots") + delta("skipped_snapshots")
+    due = delta("ticks") * after["sessions"]
+    snapshots_per_bot = received / len(bots) / elapsed
+    result = {
+        "sessions": after["sessions"],
+        "ticks_per_second": ticks_per_second,
+        "tick_p50_ms": after["tick_work"]["p50_ms"],
+        "tick_p95_ms": after["tick_work"]["p95_ms"],
+        "budget_ms": after["budget_ms"],
+        "dropped_ticks": delta("dropped_ticks"),
+        "overruns": delta("overruns"),
+        "deferred_snapshots": delta("deferred_snapshots"),
+        "skipped_snapshots": delta("skipped_snapshots"),
+        "snapshots_per_bot_second": snapshots_per_bot,
+        "bytes_per_session_second": received_bytes / len(bots) / elapsed,
+        "errors": [bot.error for bot in bots if bot.error],
+    }
+    result["sustained"] = (
+        ticks_per_second >= TICK_RATE * SUSTAINED_SHARE
+        and result["tick_p95_ms"] <= result["budget_ms"]
+        and not result["dropped_ticks"]
+        and missed <= due * (1 - SUSTAINED_SHARE)
+        and not result["errors"]
+    )
+    return result
+
+
+async def ramp(host, port, levels, settle, window, verify):
+    """Add bots level by level until one is not sustained; return the per-level results"""
+    bots = []
+    results = []
+    print(f"{'sessions':>9}{'ticks/s':>9}{'p50 ms':>8}{'p95 ms':>8}{'snaps/s':>9}{'B/s':>8}  sustained")
+    try:
+        for level in levels:
+            while len(bots) < level:
+                bot = Bot(verify=len(bots) < verify)
+                if not await bot.start(host, port):
+                    print(f"{level:>9}  join refused: {bot.error}")
+                    results.append({"sessions": len(bots), "refused": bot.error, "sustained": False})
+                    return results
+                bots.append(bot)
+            await asyncio.sleep(settle)
+            result = await measure(host, port, bots, window)
+            results.append(result)
+            print(f"{result['sessions']:>9}{result['ticks_per_second']:>9.1f}{result['tick_p50_ms']:>8.2f}"
+                  f"{result['tick_p95_ms']:>8.2f}{result['snapshots_per_bot_second']:>9.1f}"
+                  f"{result['bytes_per_session_second']:>8.0f}  {'yes' if result['sustained'] else 'NO'}")
+            for error in result["errors"][:3]:
+                print("  bot error:", error)
+            if not result["sustained"]:
+                break
+    finally:
+        for bot in bots:
+            bot.close()
+    return results
+
+
+def start_server(extra_args):
+    """Run server.py on a free port, pinned to one CPU where there are several"""
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    process = subprocess.Popen([sys.executable, os.path.join(REPO, "server.py"), "--port", "0", *extra_args],
+                               env=env, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("listening on "):
+        process.kill()
+        sys.exit("server did not start")
+    host, _, port = line.split()[-1].rpartition(":")
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    shared = len(cpus) < 2
+    if not shared:
+        os.sched_setaffinity(process.pid, {cpus[0]})
+        os.sched_setaffinity(0, set(cpus[1:]))
+    return process, host, int(port), shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sky Girl server load generator")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="load an already running server")
+    parser.add_argument("--levels", type=lambda text: [int(n) for n in text.split(",")], default=LEVELS,
+                        help="session counts to step through (default: %(default)s)")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS, help="seconds before measuring a level")
+    parser.add_argument("--window", type=float, default=WINDOW_SECONDS, help="seconds each level is measured")
+    parser.add_argument("--verify", type=int, default=VERIFY_BOTS, help="bots that decode every snapshot")
+    parser.add_argument("--collision", choices=("rect", "pixel"), default="rect",
+                        help="collision mode for a server started here")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+
+    process = None
+    shared = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        port = int(port)
+    else:
+        process, host, port, shared = start_server(["--collision", args.collision])
+        if shared:
+            print("one CPU: server and bots share it, so this is a lower bound")
+    try:
+        results = asyncio.run(ramp(host, port, args.levels, args.settle, args.window, args.verify))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    sustained = [result["sessions"] for result in results if result["sustained"]]
+    best = max(sustained, default=0)
+    print(f"sustained {best} sessions at {TICK_RATE} ticks/s")
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "collision": args.collision if process is not None else None,
+                "shared_cpu": shared,
+                "sustained_sessions": best,
+                "levels": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Measure cold-start latency: import time and time to the first menu frame
+
+Every run is a fresh interpreter, so nothing is shared between samples
+except the OS file cache. Each child reports how long importing the game
+took, whether the import initialized any pygame module (it must not),
+how long Game() and the first drawn and presented menu frame took, and
+how much pre-rendering the idle menu frames then have left to do.
+Medians over the runs can be saved as JSON and checked against a baseline.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--runs 10] [--save startup.json]
+    python benchmarks/bench_startup.py --baseline startup.json [--threshold 0.2]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNS = 10
+
+# Relative slowdown counted as a regression
+REGRESSION_THRESHOLD = 0.2
+
+# Differences smaller than this are noise whatever the ratio
+MIN_REGRESSION_MS = 2.0
+
+METRICS = ("pygame_import_ms", "import_ms", "init_ms", "first_frame_ms", "to_first_frame_ms", "warm_ms")
+
+
+def child(spawned):
+    """Run inside a fresh interpreter and print one JSON sample"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    sys.path.insert(0, REPO)
+
+    start = time.perf_counter()
+    import pygame
+    pygame_imported = time.perf_counter()
+    import Sky_girl_could_glider as game_module
+    imported = time.perf_counter()
+
+    # Importing must not start any pygame module
+    side_effects = [name for name, initialized in (
+        ("pygame", pygame.get_init()),
+        ("display", pygame.display.get_init()),
+        ("font", pygame.font.get_init()),
+    ) if initialized]
+
+    game = game_module.Game()
+    constructed = time.perf_counter()
+    game.draw_menu()
+    game.present()
+    first_frame = time.perf_counter()
+    shown = time.time()
+    game.warm_caches(float("inf"))
+    warmed = time.perf_counter()
+    pygame.quit()
+
+    print(json.dumps({
+        "pygame_import_ms": (pygame_imported - start) * 1000,
+        "import_ms": (imported - start) * 1000,
+        "init_ms": (constructed - imported) * 1000,
+        "first_frame_ms": (first_frame - constructed) * 1000,
+        "to_first_frame_ms": (shown - spawned) * 1000,
+        "warm_ms": (warmed - first_frame) * 1000,
+        "side_effects": side_effects,
+    }))
+
+
+def sample():
+    """Start a fresh interpreter and return its measurements"""
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    spawned = time.time()
+    output = subprocess.run([sys.executable, __file__, "--child", repr(spawned)],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    """List human-readable regressions of results against baseline"""
+    regressions = []
+    for metric in METRICS:
+        old, new = baseline["median"].get(metric), results["median"][metric]
+        if old is not None and new > old * (1 + threshold) and new - old > MIN_REGRESSION_MS:
+            regressions.append(f"{metric}: {old:.1f} -> {new:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sky Girl cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=RUNS, help="fresh interpreters to sample")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="fail on regressions against these results")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed relative slowdown (default: %(default)s)")
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        child(args.child)
+        return
+
+    samples = [sample() for _ in range(args.runs)]
+    results = {
+        "python": sys.version.split()[0],
+        "video_driver": os.environ.get("SDL_VIDEODRIVER", "dummy"),
+        "runs": args.runs,
+        "median": {metric: statistics.median(s[metric] for s in samples) for metric in METRICS},
+        "min": {metric: min(s[metric] for s in samples) for metric in METRICS},
+        "max": {metric: max(s[metric] for s in samples) for metric in METRICS},
+        "side_effects": sorted({name for s in samples for name in s["side_effects"]}),
+    }
+    print(f"{'metric':<20}{'median':>10}{'min':>10}{'max':>10}")
+    for metric in METRICS:
+        print(f"{metric:<20}{results['median'][metric]:>10.1f}{results['min'][metric]:>10.1f}"
+              f"{results['max'][metric]:>10.1f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    if results["side_effects"]:
+        print("IMPORT SIDE EFFECTS: initialized " + ", ".join(results["side_effects"]))
+        failed = True
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        failed = failed or bool(regressions)
+        if not regressions:
+            print("no regressions")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
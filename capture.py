@@ -0,0 +1,192 @@
+"""Gameplay frame capture streamed as raw RGB video
+
+Each captured frame is copied once, straight from the surface's pixel
+buffer into a slot of a preallocated ring, and a writer thread streams
+filled slots to a file or an encoder's stdin through the buffer protocol.
+During live play capture() never waits: if every slot is still queued for
+writing the frame is dropped. Offline renders pass blocking=True to keep
+every frame instead.
+
+Rendering a replay to video headlessly, faster than real time:
+    python capture.py game.sgr clip.rgb
+    python capture.py game.sgr clip.mp4 --ffmpeg
+Raw output plays back with:
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s 1024x768 -r 60 -i clip.rgb clip.mp4
+"""
+import argparse
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pygame
+
+# Frames buffered between the game loop and the writer
+CAPTURE_SLOTS = 8
+
+
+def ffmpeg_command(size, fps, output):
+    """ffmpeg arguments encoding raw RGB frames from stdin into output"""
+    width, height = size
+    return ["ffmpeg", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-", "-pix_fmt", "yuv420p", output]
+
+
+class FrameCapture:
+    """Ring of preallocated RGB frames drained to a stream by a writer thread"""
+
+    def __init__(self, size, stream, slots=CAPTURE_SLOTS, process=None):
+        width, height = size
+        self.size = size
+        self.stream = stream
+        self.process = process
+        self.frames = np.empty((slots, height, width, 3), dtype=np.uint8)
+        self.free = queue.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        self.filled = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self._writer, name="capture", daemon=True)
+        self.thread.start()
+
+        # Statistics
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+
+    @classmethod
+    def to_file(cls, size, path, slots=CAPTURE_SLOTS):
+        """Capture raw RGB frames into a file, or stdout for '-'"""
+        stream = sys.stdout.buffer if path == "-" else open(path, "wb")
+        return cls(size, stream, slots)
+
+    @classmethod
+    def to_command(cls, size, command, slots=CAPTURE_SLOTS):
+        """Capture raw RGB frames into the stdin of an encoder process"""
+        process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        return cls(size, process.stdin, slots, process)
+
+    def _writer(self):
+        """Write filled slots in order until the None sentinel"""
+        while True:
+            slot = self.filled.get()
+            if slot is None:
+                return
+            try:
+                if self.error is None:
+                    self.stream.write(memoryview(self.frames[slot]).cast("B"))
+                    self.written += 1
+            except OSError as exc:
+                # Encoder gone or disk full: stop writing, keep the game running
+                self.error = exc
+            finally:
+                self.free.put(slot)
+
+    def capture(self, surface, blocking=False):
+        """Queue a copy of the surface; return False if the frame was dropped"""
+        try:
+            slot = self.free.get(blocking)
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        pixels = pygame.surfarray.pixels3d(surface)
+        try:
+            # surfarray is indexed [x, y]; the transposed view makes this one
+            # strided copy into row-major RGB
+            np.copyto(self.frames[slot], pixels.transpose(1, 0, 2))
+        finally:
+            del pixels
+        self.filled.put(slot)
+        self.captured += 1
+        return True
+
+    def close(self):
+        """Write out every queued frame and close the stream"""
+        self.filled.put(None)
+        self.thread.join()
+        if self.stream is not sys.stdout.buffer:
+            self.stream.close()
+        else:
+            self.stream.flush()
+        if self.process is not None:
+            self.process.wait()
+
+    def stats(self):
+        """Capture counters for monitoring"""
+        return {
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "written": self.written,
+            "bytes": self.written * self.frames[0].nbytes,
+            "error": str(self.error) if self.error else None,
+        }
+
+
+def render_replay(replay, capture, quality="high"):
+    """Play a replay through the real renderer headlessly, capturing every frame"""
+    from Sky_girl_could_glider import Game, GameState
+
+    # Seed the purely visual randomness too so renders are repeatable
+    random.seed(replay.seed)
+    game = Game(quality=quality, collision=replay.collision)
+    try:
+        game.particles.rng = np.random.default_rng(replay.seed)
+        game.state = GameState.PLAYING
+        game.world.reset(replay.seed)
+
+        for flapped in replay.flaps:
+            if flapped:
+                game.world.flap()
+            game.update_game()
+            if game.state == GameState.PLAYING:
+                game.draw_game()
+            else:
+                game.draw_game_over()
+            game.present()
+            capture.capture(game.window, blocking=True)
+        return game.world
+    finally:
+        game.world.spawns.close()
+        pygame.quit()
+
+
+def main():
+    from quality import QUALITY_TIERS
+    from replay import Replay, ReplayError
+    from simulation import FPS, SCREEN_WIDTH, SCREEN_HEIGHT
+
+    parser = argparse.ArgumentParser(description="Render a replay to raw RGB video")
+    parser.add_argument("replay", help="replay file written with --record")
+    parser.add_argument("output", help="output file, or - for stdout")
+    parser.add_argument("--ffmpeg", action="store_true", help="encode with ffmpeg instead of writing raw RGB")
+    parser.add_argument("--quality", choices=[tier.name for tier in QUALITY_TIERS], default="high",
+                        help="quality tier to render at (default: %(default)s)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    try:
+        replay = Replay.load(args.replay)
+    except (OSError, ReplayError) as exc:
+        sys.exit(f"{args.replay}: {exc}")
+
+    size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+    if args.ffmpeg:
+        capture = FrameCapture.to_command(size, ffmpeg_command(size, FPS, args.output))
+    else:
+        capture = FrameCapture.to_file(size, args.output)
+    try:
+        world = render_replay(replay, capture, args.quality)
+    finally:
+        capture.close()
+    stats = capture.stats()
+    print(f"{stats['written']} frames ({len(replay) / FPS:.1f}s), score {world.score}", file=sys.stderr)
+    if stats["error"]:
+        sys.exit(f"writing {args.output} failed: {stats['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Persistent hitboxes and a sweep-and-prune broad phase
+
+Everything in the world scrolls left, so keeping hitboxes sorted by their
+left edge is cheap (the order barely changes between frames) and lets a
+query skip straight to the few boxes that can overlap along x.
+"""
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
+
+class Hitbox:
+    """Axis-aligned collision box updated in place every frame"""
+    __slots__ = ("x", "y", "width", "height", "owner", "active")
+
+    def __init__(self, x=0, y=0, width=0, height=0, owner=None):
+        self.x = int(x)
+        self.y = int(y)
+        self.width = width
+        self.height = height
+        self.owner = owner
+        self.active = True
+
+    def set(self, x, y, width, height):
+        """Move and resize the box, truncating to whole pixels like pygame.Rect"""
+        self.x = int(x)
+        self.y = int(y)
+        self.width = width
+        self.height = height
+
+    def as_tuple(self):
+        """Get the box as an (x, y, width, height) tuple"""
+        return (self.x, self.y, self.width, self.height)
+
+    def collides(self, other):
+        """Check overlap like pygame.Rect.colliderect"""
+        if self.width <= 0 or self.height <= 0 or other.width <= 0 or other.height <= 0:
+            return False
+        return (self.x < other.x + other.width and other.x < self.x + self.width
+                and self.y < other.y + other.height and other.y < self.y + self.height)
+
+
+def collidelist(box, boxes):
+    """Index of the first box in boxes that overlaps box, or -1"""
+    for i, other in enumerate(boxes):
+        if box.collides(other):
+            return i
+    return -1
+
+
+def collidelistall(box, boxes):
+    """Indices of every box in boxes that overlaps box"""
+    return [i for i, other in enumerate(boxes) if box.collides(other)]
+
+
+_by_x = attrgetter("x")
+
+
+class CollisionIndex:
+    """Hitboxes kept sorted by left edge for sweep-and-prune queries"""
+
+    def __init__(self):
+        self.boxes = []
+        self.lefts = []
+        self.max_width = 0
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def add(self, box):
+        """Start tracking a hitbox"""
+        # A recycled box may still sit in the list awaiting compaction
+        if self.dirty:
+            self._compact()
+        box.active = True
+        self.boxes.append(box)
+        if box.width > self.max_width:
+            self.max_width = box.width
+
+    def remove(self, box):
+        """Stop tracking a hitbox (compacted away on the next refresh)"""
+        box.active = False
+        self.dirty = True
+
+    def clear(self):
+        """Stop tracking every hitbox"""
+        self.boxes.clear()
+        self.lefts.clear()
+        self.max_width = 0
+        self.dirty = False
+
+    def _compact(self):
+        """Drop removed boxes from the list in place"""
+        self.boxes[:] = [box for box in self.boxes if box.active]
+        self.dirty = False
+
+    def refresh(self):
+        """Compact and re-sort after hitboxes moved; call once per frame before querying"""
+        if self.dirty:
+            self._compact()
+        boxes = self.boxes
+        # Nearly sorted already, so Timsort runs in linear time
+        boxes.sort(key=_by_x)
+        self.lefts = [box.x for box in boxes]
+
+    def candidates(self, box):
+        """Boxes whose x extent can overlap box (broad phase only)"""
+        lefts = self.lefts
+        start = bisect_right(lefts, box.x - self.max_width)
+        end = bisect_left(lefts, box.x + box.width)
+        return self.boxes[start:end]
+
+    def query(self, box):
+        """Every tracked box that overlaps box"""
+        return [other for other in self.candidates(box) if other.active and box.collides(other)]
+
+    def first_hit(self, box):
+        """The first tracked box that overlaps box, or None"""
+        for other in self.candidates(box):
+            if other.active and box.collides(other):
+                return other
+        return None
@@ -0,0 +1,87 @@
+"""Dirty-rectangle presentation for software-rendered displays
+
+Static screen content (sky gradient, menu text) lives in a cached layer.
+Each frame the areas drawn last frame are restored from that layer, the
+moving things are drawn again, and only the touched rectangles are sent
+to the display. When too much of the screen changed a plain flip is
+cheaper, so the renderer falls back to one.
+"""
+import pygame
+
+# Fall back to a full flip when dirty area exceeds this share of the screen
+MAX_DIRTY_FRACTION = 0.4
+
+
+class DirtyRectRenderer:
+    """Track dirty rects per frame and push only those to the display"""
+
+    def __init__(self, screen, max_dirty_fraction=MAX_DIRTY_FRACTION):
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.max_dirty_area = self.screen_rect.width * self.screen_rect.height * max_dirty_fraction
+        self.layer = pygame.Surface(screen.get_size()).convert(screen)
+        self.layer_key = None
+        self.previous = []
+        self.current = []
+        self.full_redraw = True
+
+        # Statistics
+        self.frames = 0
+        self.full_flips = 0
+        self.pixels_pushed = 0
+
+    def invalidate(self):
+        """Force the next frame to rebuild the layer and flip"""
+        self.layer_key = None
+
+    def begin(self, key, build):
+        """Start a frame over the static layer identified by key
+
+        build(surface) draws the static content and is only called when
+        the key changes; otherwise last frame's rects are restored from
+        the cached layer.
+        """
+        if key != self.layer_key:
+            build(self.layer)
+            self.layer_key = key
+            self.screen.blit(self.layer, (0, 0))
+            self.full_redraw = True
+        else:
+            layer = self.layer
+            self.screen.blits([(layer, rect, rect) for rect in self.previous], False)
+
+    def add(self, rect):
+        """Mark a rect (or a list of rects) drawn this frame"""
+        if rect is None:
+            return
+        if isinstance(rect, list):
+            for r in rect:
+                self.add(r)
+            return
+        rect = self.screen_rect.clip(rect)
+        if rect.width and rect.height:
+            self.current.append(rect)
+
+    def present(self):
+        """Push this frame's changes to the display"""
+        rects = self.previous + self.current
+        area = sum(rect.width * rect.height for rect in rects)
+        if self.full_redraw or area > self.max_dirty_area:
+            pygame.display.flip()
+            self.full_flips += 1
+            self.pixels_pushed += self.screen_rect.width * self.screen_rect.height
+        elif rects:
+            pygame.display.update(rects)
+            self.pixels_pushed += area
+        self.frames += 1
+        self.full_redraw = False
+        self.previous = self.current
+        self.current = []
+
+    def stats(self):
+        """Renderer counters for monitoring"""
+        return {
+            "frames": self.frames,
+            "full_flips": self.full_flips,
+            "pixels_pushed": self.pixels_pushed,
+        }
@@ -0,0 +1,178 @@
+"""Input latency measurement and late-polling frame pacing
+
+The default loop polls input, works, then sleeps in clock.tick until the
+next frame. With a vsynced display the flip then blocks until the next
+refresh, so input polled right after one refresh waits almost a whole
+frame more before it is shown. FramePacer turns that around: it sleeps
+first, until only as much time is left before the next refresh as recent
+frames needed for their work, polling input every millisecond while it
+waits. Input is then stamped within a millisecond of arriving, applied in
+the step that follows, and flipped just before the refresh.
+
+InputLatency measures the result from each flap's stamp to the step that
+applied it and to the flip that showed it. The default loop can only
+stamp events when it polls them, so its figures leave out the time they
+sat in the queue, up to a frame.
+"""
+import time
+from collections import deque
+
+from profiler import percentile
+
+# Latency samples kept per measurement
+LATENCY_SAMPLES = 600
+
+# Frames of work time the pacer plans from
+PACER_WINDOW = 60
+
+# Head start on top of the 95th percentile frame work
+PACER_MARGIN_MS = 1.0
+
+# Input poll interval while waiting; the last stretch is busy-waited
+# because sleep() overshoots
+POLL_INTERVAL_MS = 1.0
+SPIN_MS = 1.0
+
+
+def latency_summary(samples):
+    """Percentiles in ms of a latency sample deque"""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": percentile(ordered, 0.50),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+        "max_ms": ordered[-1] if ordered else 0.0,
+    }
+
+
+class InputLatency:
+    """Times each input from its stamp to the simulation step and the flip"""
+
+    def __init__(self, samples=LATENCY_SAMPLES):
+        self.pending = []     # stamps of inputs not yet simulated
+        self.in_flight = []   # stamps handed to a worker thread to simulate
+        self.simulated = []   # stamps simulated but not yet on screen
+        self.to_update = deque(maxlen=samples)
+        self.to_flip = deque(maxlen=samples)
+
+        # Statistics
+        self.inputs = 0
+
+    def pressed(self, stamp=None):
+        """Note an input, stamped when it was seen (default: now)"""
+        self.pending.append(stamp if stamp is not None else time.perf_counter())
+        self.inputs += 1
+
+    def applied(self):
+        """Note that the pending inputs reached the simulation"""
+        self._simulated(self.pending)
+
+    def submitted(self):
+        """Note that the pending inputs went to a worker thread with a batch"""
+        self.in_flight.extend(self.pending)
+        self.pending.clear()
+
+    def returned(self):
+        """Note that the batch with the submitted inputs came back to be drawn"""
+        self._simulated(self.in_flight)
+
+    def _simulated(self, stamps):
+        if not stamps:
+            return
+        now = time.perf_counter()
+        self.to_update.extend((now - stamp) * 1000 for stamp in stamps)
+        self.simulated.extend(stamps)
+        stamps.clear()
+
+    def presented(self):
+        """Note that a frame showing the simulated inputs was flipped"""
+        if not self.simulated:
+            return
+        now = time.perf_counter()
+        self.to_flip.extend((now - stamp) * 1000 for stamp in self.simulated)
+        self.simulated.clear()
+
+    def clear(self):
+        """Forget inputs in flight, e.g. when a game ends before they show"""
+        self.pending.clear()
+        self.in_flight.clear()
+        self.simulated.clear()
+
+    def stats(self):
+        """Input to update and input to flip percentiles"""
+        return {
+            "inputs": self.inputs,
+            "input_to_update": latency_summary(self.to_update),
+            "input_to_flip": latency_summary(self.to_flip),
+        }
+
+
+class FramePacer:
+    """Starts each frame as late as its recent work time allows"""
+
+    def __init__(self, fps, window=PACER_WINDOW, margin_ms=PACER_MARGIN_MS):
+        self.period = 1 / fps
+        self.margin = margin_ms / 1000
+        self.work = deque(maxlen=window)
+        self.deadline = None
+        self.started = None
+        self.flip_started = None
+        # Seconds between the starts of the last two frames
+        self.frame_seconds = 0.0
+
+        # Statistics
+        self.frames = 0
+        self.missed = 0
+
+    def budget(self):
+        """Seconds to set aside for a frame's work"""
+        if not self.work:
+            return self.period
+        return min(self.period, percentile(sorted(self.work), 0.95) + self.margin)
+
+    def wait(self, poll=None):
+        """Wait for the latest safe moment to start the frame, calling poll() meanwhile"""
+        now = time.perf_counter()
+        if self.deadline is None:
+            self.deadline = now + self.period
+        start_by = self.deadline - self.budget()
+        interval = POLL_INTERVAL_MS / 1000
+        spin = SPIN_MS / 1000
+        while True:
+            if poll is not None:
+                poll()
+            remaining = start_by - time.perf_counter()
+            if remaining <= 0:
+                break
+            if remaining > spin:
+                time.sleep(min(interval, remaining - spin))
+        started = time.perf_counter()
+        if self.started is not None:
+            self.frame_seconds = started - self.started
+        self.started = started
+
+    def flipping(self):
+        """Note that the frame's work is done and it is about to be flipped"""
+        self.flip_started = time.perf_counter()
+
+    def done(self):
+        """Note that the flip returned and set the next deadline a period on"""
+        now = time.perf_counter()
+        flip_started = self.flip_started if self.flip_started is not None else now
+        self.work.append(flip_started - self.started)
+        self.flip_started = None
+        if flip_started > self.deadline:
+            self.missed += 1
+        # A flip blocked on vsync returns at the refresh, just past the
+        # deadline; carrying on from there keeps frames locked to it
+        self.deadline = max(self.deadline, now) + self.period
+        self.frames += 1
+
+    def stats(self):
+        """Pacing counters for monitoring"""
+        return {
+            "frames": self.frames,
+            "missed": self.missed,
+            "budget_ms": self.budget() * 1000,
+        }
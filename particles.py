@@ -0,0 +1,236 @@
+from itertools import repeat
+
+import numpy as np
+import pygame
+
+# Alpha is quantized into this many buckets so sprites can be shared
+ALPHA_BUCKETS = 16
+ALPHA_STEP = 256 // ALPHA_BUCKETS
+
+# Particles up to this radius are blended directly into the pixel buffer,
+# which beats a blit call each once there are thousands of them
+SPLAT_MAX_SIZE = 2
+
+
+class ParticleSpriteCache:
+    """Pre-rendered circle sprites keyed by (color, size, alpha bucket)"""
+
+    def __init__(self):
+        self.sprites = {}
+        self.stamps = {}
+
+    def get(self, color, size, bucket):
+        """Get (and lazily render) the sprite for a particle look"""
+        key = (color, size, bucket)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            alpha = bucket * ALPHA_STEP + ALPHA_STEP // 2
+            sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*color, alpha), (size, size), size)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+            self.sprites[key] = sprite
+        return sprite
+
+    def stamp(self, size):
+        """Get the (dx, dy) pixel offsets covered by a circle sprite of a given size"""
+        offsets = self.stamps.get(size)
+        if offsets is None:
+            mask = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            pygame.draw.circle(mask, (255, 255, 255, 255), (size, size), size)
+            offsets = [tuple(p) for p in np.argwhere(pygame.surfarray.array_alpha(mask) > 0).tolist()]
+            self.stamps[size] = offsets
+        return offsets
+
+    def clear(self):
+        """Drop every cached sprite"""
+        self.sprites.clear()
+        self.stamps.clear()
+
+
+class ParticleSystem:
+    """Particles stored in contiguous arrays and updated in one vectorized step"""
+
+    def __init__(self, capacity=1024, rng=None, sprite_cache=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.sprite_cache = sprite_cache if sprite_cache is not None else ParticleSpriteCache()
+        self.palette = []
+        self.palette_index = {}
+        self.count = 0
+        self.max_count = None
+
+        # Pixels per world unit of the surface drawn to
+        self.scale = 1.0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """(Re)allocate the backing arrays, keeping live particles"""
+        n = self.count
+        old = getattr(self, "position", None)
+        position = np.zeros((capacity, 2), dtype=np.float32)
+        velocity = np.zeros((capacity, 2), dtype=np.float32)
+        life = np.zeros(capacity, dtype=np.int32)
+        max_life = np.ones(capacity, dtype=np.int32)
+        size = np.zeros(capacity, dtype=np.int32)
+        color = np.zeros(capacity, dtype=np.uint8)
+        if old is not None:
+            position[:n] = self.position[:n]
+            velocity[:n] = self.velocity[:n]
+            life[:n] = self.life[:n]
+            max_life[:n] = self.max_life[:n]
+            size[:n] = self.size[:n]
+            color[:n] = self.color[:n]
+        self.position = position
+        self.velocity = velocity
+        self.life = life
+        self.max_life = max_life
+        self.size = size
+        self.color = color
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def _color_ids(self, colors):
+        """Map RGB tuples to palette indices"""
+        ids = []
+        for color in colors:
+            color = tuple(color)
+            index = self.palette_index.get(color)
+            if index is None:
+                index = len(self.palette)
+                self.palette.append(color)
+                self.palette_index[color] = index
+            ids.append(index)
+        return np.array(ids, dtype=np.uint8)
+
+    def emit(self, x, y, count, colors, spread=10, speed=3.0, size_range=(2, 6), life_range=(20, 40)):
+        """Spawn a burst of particles around (x, y), trimmed to max_count if set"""
+        if self.max_count is not None:
+            count = min(count, self.max_count - self.count)
+        if count <= 0:
+            return
+        needed = self.count + count
+        if needed > self.capacity:
+            self._allocate(max(needed, self.capacity * 2))
+
+        rng = self.rng
+        s = slice(self.count, needed)
+        self.position[s, 0] = x + rng.integers(-spread, spread + 1, count)
+        self.position[s, 1] = y + rng.integers(-spread, spread + 1, count)
+        self.velocity[s] = rng.uniform(-speed, speed, (count, 2))
+        self.color[s] = rng.choice(self._color_ids(colors), count)
+        self.size[s] = rng.integers(size_range[0], size_range[1] + 1, count)
+        life = rng.integers(life_range[0], life_range[1] + 1, count)
+        self.life[s] = life
+        self.max_life[s] = life
+        self.count = needed
+
+    def update(self):
+        """Move, age, shrink and cull every particle"""
+        n = self.count
+        if n == 0:
+            return
+        self.position[:n] += self.velocity[:n]
+        life = self.life[:n]
+        life -= 1
+        ratio = life / self.max_life[:n]
+        np.maximum(1, (self.size[:n] * ratio).astype(np.int32), out=self.size[:n])
+
+        alive = life > 0
+        if not alive.all():
+            alive_count = int(np.count_nonzero(alive))
+            for array in (self.position, self.velocity, self.life, self.max_life, self.size, self.color):
+                array[:alive_count] = array[:n][alive]
+            self.count = alive_count
+
+    def clear(self):
+        """Remove every particle"""
+        self.count = 0
+
+    def draw(self, screen):
+        """Draw every live particle; return the rect bounding them (or None)"""
+        n = self.count
+        if n == 0:
+            return None
+        alpha = (255 * self.life[:n]) // self.max_life[:n]
+        visible = alpha > 0
+        alpha = alpha[visible]
+        size = self.size[:n][visible]
+        color = self.color[:n][visible]
+        position = self.position[:n][visible]
+        if self.scale != 1.0:
+            position = position * self.scale
+            size = np.maximum(1, np.rint(size * self.scale)).astype(size.dtype)
+        top_left = (position - size[:, None]).astype(np.int32)
+        if len(size) == 0:
+            return None
+        left, top = top_left.min(axis=0).tolist()
+        right, bottom = (top_left + 2 * size[:, None]).max(axis=0).tolist()
+        bounds = pygame.Rect(left, top, right - left, bottom - top)
+
+        if screen.get_bitsize() == 32:
+            tiny = size <= SPLAT_MAX_SIZE
+            if tiny.any():
+                self._splat(screen, top_left[tiny], size[tiny], color[tiny], alpha[tiny])
+                rest = ~tiny
+                alpha, size, color, top_left = alpha[rest], size[rest], color[rest], top_left[rest]
+        if len(size):
+            self._blit(screen, top_left, size, color, alpha // ALPHA_STEP)
+        return bounds
+
+    def _blit(self, screen, top_left, size, color, bucket):
+        """Blit particles from the sprite cache, one blits call per distinct look"""
+        code = (color.astype(np.int64) * 1024 + size) * ALPHA_BUCKETS + bucket
+        order = np.argsort(code, kind="stable")
+        code = code[order]
+        positions = top_left[order].tolist()
+        starts = np.flatnonzero(np.diff(code)) + 1
+        bounds = [0, *starts.tolist(), len(code)]
+        for start, end in zip(bounds, bounds[1:]):
+            c = int(code[start])
+            rest = c // ALPHA_BUCKETS
+            sprite = self.sprite_cache.get(self.palette[rest // 1024], rest % 1024, c % ALPHA_BUCKETS)
+            screen.blits(zip(repeat(sprite), positions[start:end]), False)
+
+    def _splat(self, screen, top_left, size, color, alpha):
+        """Alpha-blend tiny particles straight into the packed pixel buffer"""
+        width, height = screen.get_size()
+        if screen.get_pitch() != width * 4:
+            self._blit(screen, top_left, size, color, alpha // ALPHA_STEP)
+            return
+
+        # Expand every particle into the pixels its stamp covers
+        particle_ids, xs, ys = [], [], []
+        for s in range(1, SPLAT_MAX_SIZE + 1):
+            ids = np.flatnonzero(size == s)
+            if len(ids) == 0:
+                continue
+            gx, gy = top_left[ids, 0], top_left[ids, 1]
+            for dx, dy in self.sprite_cache.stamp(s):
+                particle_ids.append(ids)
+                xs.append(gx + dx)
+                ys.append(gy + dy)
+        particle_ids = np.concatenate(particle_ids)
+        xs = np.concatenate(xs)
+        ys = np.concatenate(ys)
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        particle_ids = particle_ids[inside]
+        index = ys[inside] * width + xs[inside]
+        color = color[particle_ids]
+        opacity = alpha[particle_ids].astype(np.int32)
+        palette = np.array(self.palette, dtype=np.int32)
+
+        pixels = pygame.surfarray.pixels2d(screen)
+        try:
+            flat = pixels.T.reshape(-1)
+            dest = flat[index]
+            out = dest.copy()
+            for channel, shift in enumerate(screen.get_shifts()[:3]):
+                value = ((dest >> shift) & 0xFF).astype(np.int32)
+                value += ((palette[:, channel][color] - value) * opacity) >> 8
+                out &= ~np.uint32(0xFF << shift)
+                out |= value.astype(np.uint32) << shift
+            flat[index] = out
+        finally:
+            del pixels
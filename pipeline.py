@@ -0,0 +1,158 @@
+"""Pipelined simulation: step the world on a worker thread while rendering
+
+The main thread hands the worker a batch of steps (plus any flap) and
+immediately gets back the immutable snapshot of the previous batch to
+draw. Rendering frame N therefore overlaps simulating frame N+1; pygame
+releases the GIL in blits and fills, so the two really run side by side
+on multi-core machines. Requests and results each go through a queue of
+one, so the worker is never more than one batch ahead and input is shown
+at most one frame later than in the sequential loop.
+"""
+import queue
+import threading
+from collections import deque, namedtuple
+from time import perf_counter
+
+# Read-only views carrying what the draw functions read from live entities
+GirlView = namedtuple("GirlView", "x y prev_y wing_angle is_flapping")
+CloudView = namedtuple("CloudView", "x prev_x y width height type show_lightning")
+StarView = namedtuple("StarView", "x prev_x y size glow_timer collected")
+BirdView = namedtuple("BirdView", "x prev_x y wing_flap vertical_offset prev_offset")
+
+# Snapshot of one world batch; field names mirror World so it can be drawn in its place
+WorldView = namedtuple("WorldView", [
+    "frame", "score", "game_speed", "game_over", "sky_girl", "clouds", "stars", "birds",
+    "collected",   # star positions collected during the batch
+    "steps",       # simulation steps the batch ran
+    "input_time",  # perf_counter() of the flap applied in the batch, or None
+])
+
+# Input latency samples kept
+LATENCY_SAMPLES = 600
+
+
+def snapshot(world, collected=(), steps=0, input_time=None):
+    """Copy the drawable state of a world into an immutable WorldView"""
+    girl = world.sky_girl
+    return WorldView(
+        world.frame, world.score, world.game_speed, world.game_over,
+        GirlView(girl.x, girl.y, girl.prev_y, girl.wing_angle, girl.is_flapping),
+        tuple(CloudView(c.x, c.prev_x, c.y, c.width, c.height, c.type, c.show_lightning) for c in world.clouds),
+        tuple(StarView(s.x, s.prev_x, s.y, s.size, s.glow_timer, s.collected) for s in world.stars),
+        tuple(BirdView(b.x, b.prev_x, b.y, b.wing_flap, b.vertical_offset, b.prev_offset) for b in world.birds),
+        tuple(collected), steps, input_time,
+    )
+
+
+class SimulationPipeline:
+    """Runs world steps on a worker thread, one batch ahead of rendering"""
+
+    def __init__(self, world, step=None):
+        self.world = world
+        self.step = step if step is not None else world.step
+        self.requests = queue.Queue(maxsize=1)
+        self.results = queue.Queue(maxsize=1)
+        self.in_flight = False
+        self.pending_input = None
+        self.thread = threading.Thread(target=self._worker, name="simulation", daemon=True)
+        self.thread.start()
+
+        # Metrics
+        self.started = perf_counter()
+        self.batches = 0
+        self.steps = 0
+        self.sim_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def _worker(self):
+        """Serve step requests until told to stop with None"""
+        world = self.world
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            steps, input_time = request
+            start = perf_counter()
+            try:
+                if input_time is not None:
+                    world.flap()
+                collected = []
+                done = 0
+                while done < steps and not world.game_over:
+                    self.step()
+                    collected.extend(world.collected)
+                    done += 1
+                result = snapshot(world, collected, done, input_time)
+            except Exception as exc:
+                result = exc
+            self.sim_seconds += perf_counter() - start
+            self.results.put(result)
+
+    def flap(self):
+        """Queue a flap for the next batch, remembering when it was pressed"""
+        if self.pending_input is None:
+            self.pending_input = perf_counter()
+
+    def submit(self, steps):
+        """Start simulating a batch on the worker"""
+        self.requests.put((steps, self.pending_input))
+        self.pending_input = None
+        self.in_flight = True
+
+    def collect(self):
+        """Wait for the batch in flight and return its snapshot"""
+        start = perf_counter()
+        result = self.results.get()
+        self.wait_seconds += perf_counter() - start
+        self.in_flight = False
+        if isinstance(result, Exception):
+            raise result
+        self.batches += 1
+        self.steps += result.steps
+        return result
+
+    def exchange(self, steps):
+        """Start the next batch and return the previous one's snapshot to draw"""
+        if self.in_flight:
+            previous = self.collect()
+        else:
+            # Nothing simulated yet; the world is idle so it is safe to read
+            previous = snapshot(self.world)
+        self.submit(steps)
+        return previous
+
+    def drain(self):
+        """Finish any batch in flight so the world can be touched directly"""
+        if self.in_flight:
+            return self.collect()
+        return None
+
+    def presented(self, view):
+        """Note that a snapshot reached the screen, for input latency"""
+        # Until the first batch comes back, the live world is what's drawn
+        input_time = getattr(view, "input_time", None)
+        if input_time is not None:
+            self.latencies.append((perf_counter() - input_time) * 1000)
+
+    def close(self):
+        """Stop the worker thread"""
+        self.drain()
+        self.requests.put(None)
+        self.thread.join()
+
+    def stats(self):
+        """Throughput, overlap and input latency counters"""
+        elapsed = perf_counter() - self.started
+        latencies = sorted(self.latencies)
+        batches = self.batches or 1
+        return {
+            "batches": self.batches,
+            "steps": self.steps,
+            "batches_per_second": self.batches / elapsed if elapsed > 0 else 0.0,
+            "steps_per_second": self.steps / elapsed if elapsed > 0 else 0.0,
+            "sim_ms": self.sim_seconds * 1000 / batches,
+            "wait_ms": self.wait_seconds * 1000 / batches,
+            "latency_p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+            "latency_p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+        }
@@ -0,0 +1,86 @@
+"""Object pools for short-lived game entities
+
+Entities are recycled instead of reallocated: spawn() reuses a free
+instance and resets it (with its reset() unless the pool is given
+another function), despawn() swap-removes it from the active
+list in O(1) and puts it back on the free list. In steady state the hot
+update loop creates no new entity objects.
+"""
+
+
+class EntityPool:
+    """Free list plus an active list with O(1) swap-remove"""
+
+    def __init__(self, factory, name=None, prealloc=0, reset=None):
+        self.factory = factory
+        # Called as reset(entity, *args) on spawn; defaults to factory.reset
+        self.reset = reset if reset is not None else factory.reset
+        self.name = name or getattr(factory, "__name__", "entity")
+        self.active = []
+        self.free = []
+
+        # Statistics
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        self.peak_active = 0
+
+        for _ in range(prealloc):
+            self.free.append(self._create())
+
+    def _create(self):
+        """Allocate a brand new (inactive) entity"""
+        self.created += 1
+        return self.factory()
+
+    def __len__(self):
+        return len(self.active)
+
+    def __iter__(self):
+        return iter(self.active)
+
+    def spawn(self, *args):
+        """Take an entity from the free list (or allocate one), reset it and make it active"""
+        if self.free:
+            entity = self.free.pop()
+            self.reused += 1
+        else:
+            entity = self._create()
+        self.reset(entity, *args)
+        entity.pool_slot = len(self.active)
+        self.active.append(entity)
+        if len(self.active) > self.peak_active:
+            self.peak_active = len(self.active)
+        return entity
+
+    def despawn(self, entity):
+        """Swap-remove an active entity and return it to the free list"""
+        active = self.active
+        slot = entity.pool_slot
+        last = active.pop()
+        if last is not entity:
+            active[slot] = last
+            last.pool_slot = slot
+        entity.pool_slot = -1
+        self.free.append(entity)
+        self.released += 1
+
+    def clear(self):
+        """Despawn every active entity"""
+        for entity in self.active:
+            entity.pool_slot = -1
+        self.released += len(self.active)
+        self.free.extend(self.active)
+        self.active.clear()
+
+    def stats(self):
+        """Pool counters for monitoring"""
+        return {
+            "name": self.name,
+            "active": len(self.active),
+            "free": len(self.free),
+            "created": self.created,
+            "reused": self.reused,
+            "released": self.released,
+            "peak_active": self.peak_active,
+        }
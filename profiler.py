@@ -0,0 +1,216 @@
+"""Per-phase frame profiler with an on-screen overlay and trace export
+
+Phases are timed by wrapping methods on live objects, so nothing is
+measured (and nothing costs anything) until profiling is enabled; disabling
+it puts the original methods back. Per-frame phase totals and individual
+timed calls go into fixed-size ring buffers, which can be exported as
+Chrome trace-event JSON (chrome://tracing, Perfetto) or CSV.
+"""
+import csv
+import json
+from array import array
+from collections import deque
+from time import perf_counter_ns
+
+import pygame
+
+# Frames of per-phase history kept
+PROFILE_FRAMES = 600
+
+# Individual timed calls kept for trace export
+PROFILE_EVENTS = 16384
+
+# Overlay layout
+OVERLAY_GRAPH_FRAMES = 240
+OVERLAY_GRAPH_HEIGHT = 80
+OVERLAY_GRAPH_MAX_MS = 50.0
+OVERLAY_REFRESH_FRAMES = 30
+
+# Marks an instrumented attribute that did not live on the object itself
+_MISSING = object()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    """Times instrumented methods per frame into ring buffers"""
+
+    def __init__(self, capacity=PROFILE_FRAMES, event_capacity=PROFILE_EVENTS):
+        self.capacity = capacity
+        self.phases = []
+        self.history = {}
+        self.frame_ms = array("d", bytes(8 * capacity))
+        self.current = {}
+        self.events = deque(maxlen=event_capacity)
+        self.frames = 0
+        self.frame_start = None
+        self.origin = perf_counter_ns()
+        self.patched = []
+
+    @property
+    def enabled(self):
+        return bool(self.patched)
+
+    def instrument(self, obj, attr, phase=None):
+        """Time every call of obj.attr under the given phase name"""
+        phase = phase or attr
+        original = getattr(obj, attr)
+        if phase not in self.history:
+            self.phases.append(phase)
+            self.history[phase] = array("d", bytes(8 * self.capacity))
+            self.current[phase] = 0
+        current = self.current
+        events = self.events
+
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                duration = perf_counter_ns() - start
+                current[phase] += duration
+                events.append((phase, start, duration))
+
+        own = getattr(obj, "__dict__", {}).get(attr, _MISSING)
+        setattr(obj, attr, timed)
+        self.patched.append((obj, attr, own))
+
+    def remove(self):
+        """Put every instrumented method back; profiling costs nothing again"""
+        for obj, attr, own in reversed(self.patched):
+            if own is _MISSING:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, own)
+        self.patched.clear()
+        self.frame_start = None
+
+    def tick(self):
+        """Close the frame in progress and start the next one; call once per frame"""
+        if not self.patched:
+            return
+        now = perf_counter_ns()
+        if self.frame_start is not None:
+            slot = self.frames % self.capacity
+            duration = now - self.frame_start
+            self.frame_ms[slot] = duration / 1e6
+            self.events.append(("frame", self.frame_start, duration))
+            for phase, total in self.current.items():
+                self.history[phase][slot] = total / 1e6
+            self.frames += 1
+        for phase in self.current:
+            self.current[phase] = 0
+        self.frame_start = now
+
+    def recent(self, phase=None, count=None):
+        """Last count (default all retained) values in ms, oldest first"""
+        values = self.frame_ms if phase is None else self.history[phase]
+        retained = min(self.frames, self.capacity)
+        count = retained if count is None else min(count, retained)
+        end = self.frames % self.capacity
+        start = end - count
+        if start >= 0:
+            return values[start:end].tolist()
+        return values[start:].tolist() + values[:end].tolist()
+
+    def summary(self):
+        """Frame time percentiles and mean ms per phase over the retained frames"""
+        frame_times = sorted(self.recent())
+        count = len(frame_times) or 1
+        return {
+            "frames": len(frame_times),
+            "p50": percentile(frame_times, 0.50),
+            "p95": percentile(frame_times, 0.95),
+            "p99": percentile(frame_times, 0.99),
+            "max": frame_times[-1] if frame_times else 0.0,
+            "phases": {phase: sum(self.recent(phase)) / count for phase in self.phases},
+        }
+
+    def export_chrome_trace(self, path):
+        """Write retained calls as Chrome trace-event JSON"""
+        origin = self.origin
+        events = [{
+            "name": phase,
+            "ph": "X",
+            "ts": (start - origin) / 1000,
+            "dur": duration / 1000,
+            "pid": 1,
+            "tid": 1,
+        } for phase, start, duration in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export_csv(self, path):
+        """Write one row per retained frame with ms spent in each phase"""
+        columns = [self.recent()] + [self.recent(phase) for phase in self.phases]
+        first = self.frames - len(columns[0])
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "frame_ms"] + [f"{phase}_ms" for phase in self.phases])
+            for i, row in enumerate(zip(*columns)):
+                writer.writerow([first + i] + [f"{value:.4f}" for value in row])
+
+
+class ProfilerOverlay:
+    """Frame-time graph and per-phase breakdown drawn over the game"""
+
+    def __init__(self, profiler, font, budget_ms, extra_rows=None):
+        self.profiler = profiler
+        self.font = font
+        self.budget_ms = budget_ms
+        self.extra_rows = extra_rows
+        self.text = None
+        self.text_frame = -OVERLAY_REFRESH_FRAMES
+
+    def _render_text(self):
+        """Re-render the statistics text block as label and value columns"""
+        stats = self.profiler.summary()
+        rows = [("frame p50 / p95 / p99", f"{stats['p50']:.1f} / {stats['p95']:.1f} / {stats['p99']:.1f} ms"),
+                ("frame max", f"{stats['max']:.1f} ms")]
+        rows += [(phase, f"{mean:.2f} ms") for phase, mean in stats["phases"].items()]
+        if self.extra_rows is not None:
+            rows += self.extra_rows()
+
+        white = (255, 255, 255)
+        line_height = self.font.get_linesize()
+        labels = [self.font.render(label, True, white) for label, _ in rows]
+        values = [self.font.render(value, True, white) for _, value in rows]
+        label_width = max(image.get_width() for image in labels) + 12
+        value_width = max(image.get_width() for image in values)
+        self.text = pygame.Surface((label_width + value_width, line_height * len(rows)), pygame.SRCALPHA)
+        for i, (label, value) in enumerate(zip(labels, values)):
+            self.text.blit(label, (0, i * line_height))
+            self.text.blit(value, (label_width + value_width - value.get_width(), i * line_height))
+
+    def draw(self, screen, x=None, y=8):
+        """Draw the overlay in the top right corner; return the covered rect"""
+        profiler = self.profiler
+        if self.text is None or profiler.frames - self.text_frame >= OVERLAY_REFRESH_FRAMES:
+            self._render_text()
+            self.text_frame = profiler.frames
+
+        width = max(OVERLAY_GRAPH_FRAMES, self.text.get_width()) + 12
+        height = OVERLAY_GRAPH_HEIGHT + self.text.get_height() + 18
+        if x is None:
+            x = screen.get_width() - width - 8
+        panel = pygame.Rect(x, y, width, height)
+        screen.fill((0, 0, 0), panel)
+
+        # Frame time graph with the frame budget marked
+        scale = OVERLAY_GRAPH_HEIGHT / OVERLAY_GRAPH_MAX_MS
+        bottom = y + 6 + OVERLAY_GRAPH_HEIGHT
+        for i, ms in enumerate(profiler.recent(count=OVERLAY_GRAPH_FRAMES)):
+            color = (0, 200, 0) if ms <= self.budget_ms else (230, 60, 60)
+            top = bottom - min(OVERLAY_GRAPH_HEIGHT, int(ms * scale))
+            pygame.draw.line(screen, color, (x + 6 + i, bottom), (x + 6 + i, top))
+        budget_y = bottom - int(self.budget_ms * scale)
+        pygame.draw.line(screen, (255, 255, 0), (x + 6, budget_y), (x + 6 + OVERLAY_GRAPH_FRAMES, budget_y))
+
+        screen.blit(self.text, (x + 6, bottom + 6))
+        return panel
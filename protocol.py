@@ -0,0 +1,215 @@
+"""Wire format of server.py: framed messages and delta-encoded snapshots
+
+Every message is a 3-byte header (payload length, message type) followed
+by its payload, so a client reads exactly one message at a time off a
+plain TCP stream, as it would off a WebSocket.
+
+A snapshot is what a client needs to draw a session: the frame, score,
+sky girl and every cloud, star and bird, quantized to whole pixels, each
+entity under a small net id. A keyframe lists every entity. A delta lists
+only what changed since the session's previous snapshot: ids that went
+away, entities that appeared, and for the rest just the fields that
+changed, which for one gliding across the screen is its x alone. The
+server encodes each session's delta once and sends the same bytes to
+every client that has the previous snapshot; one that missed it gets a
+keyframe instead.
+"""
+import struct
+from collections import namedtuple
+
+from simulation import bird_wing_offset
+
+# Payload length, message type
+_FRAME = struct.Struct("<HB")
+MAX_PAYLOAD = 0xFFFF
+
+# Client to server
+JOIN = 1          # start a new session and play it
+WATCH = 2         # <I session id: spectate a session
+FLAP = 3          # flap; once the game is over, start the next one
+STATS = 4         # ask for server statistics
+
+# Server to client
+WELCOME = 16      # <IH session id, ticks per second
+KEYFRAME = 17
+DELTA = 18
+STATS_REPLY = 19  # JSON
+ERROR = 20        # UTF-8 reason; the server closes the connection after it
+
+WELCOME_BODY = struct.Struct("<IH")
+WATCH_BODY = struct.Struct("<I")
+
+# Sequence number, frame, score, sky girl y and wing angle, flags
+SNAPSHOT_HEADER = struct.Struct("<IIIhbB")
+GAME_OVER_FLAG = 1
+FLAPPING_FLAG = 2
+
+# Entity kinds; a storm cloud is LIGHTNING while its bolt shows
+CLOUD = 0
+STORM = 1
+LIGHTNING = 2
+STAR = 3
+BIRD = 4
+
+# Net id, then the state fields: kind, x, y and two kind-specific values
+# (cloud width and height, star size, bird wing offset)
+_ENTITY = struct.Struct("<HBhhhh")
+_COUNTS = struct.Struct("<HHH")
+_ID = struct.Struct("<H")
+_FIELD_FORMATS = "Bhhhh"
+
+# A changed entity is its net id, a bitmask of changed fields and their values
+_CHANGES = [struct.Struct("<HB" + "".join(f for i, f in enumerate(_FIELD_FORMATS) if mask >> i & 1))
+            for mask in range(1 << len(_FIELD_FORMATS))]
+
+SnapshotHeader = namedtuple("SnapshotHeader", "seq frame score girl_y wing_angle flags")
+
+
+class ProtocolError(ValueError):
+    """A peer sent something that is not valid in this protocol"""
+
+
+def pack_message(kind, payload=b""):
+    """Frame one message"""
+    if len(payload) > MAX_PAYLOAD:
+        raise ProtocolError(f"payload of {len(payload)} bytes is too large")
+    return _FRAME.pack(len(payload), kind) + payload
+
+
+async def read_message(reader):
+    """Read one message off an asyncio stream; return (type, payload)"""
+    length, kind = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    payload = await reader.readexactly(length) if length else b""
+    return kind, payload
+
+
+def entity_states(world):
+    """Yield (entity, state tuple) for everything a client draws"""
+    for cloud in world.clouds:
+        if cloud.type != "storm":
+            kind = CLOUD
+        else:
+            kind = LIGHTNING if cloud.show_lightning else STORM
+        yield cloud, (kind, round(cloud.x), cloud.y, cloud.width, cloud.height)
+    for star in world.stars:
+        yield star, (STAR, round(star.x), round(star.y), star.size, 0)
+    for bird in world.birds:
+        yield bird, (BIRD, round(bird.x), round(bird.y + bird.vertical_offset), bird_wing_offset(bird), 0)
+
+
+class SnapshotEncoder:
+    """Delta-encodes the successive states of one session's world"""
+
+    def __init__(self):
+        self.ids = {}        # entity -> net id
+        self.free_ids = []
+        self.next_id = 0
+        self.states = {}     # net id -> state last encoded
+        self.header = None
+        self.seq = 0
+
+    def update(self, world):
+        """Take the world's current state; return the delta payload from the previous one"""
+        self.seq += 1
+        girl = world.sky_girl
+        flags = (GAME_OVER_FLAG if world.game_over else 0) | (FLAPPING_FLAG if girl.flap_timer > 0 else 0)
+        self.header = SNAPSHOT_HEADER.pack(self.seq, world.frame, world.score,
+                                           round(girl.y), round(girl.wing_angle), flags)
+
+        ids, states = self.ids, self.states
+        current = {}
+        added = []
+        changes = []
+        for entity, state in entity_states(world):
+            net_id = ids.get(entity)
+            if net_id is None:
+                net_id = self.free_ids.pop() if self.free_ids else self._new_id()
+                ids[entity] = net_id
+            current[entity] = net_id
+            old = states.get(net_id)
+            if old is None:
+                added.append(_ENTITY.pack(net_id, *state))
+            elif old != state:
+                mask = 0
+                values = []
+                for i, (old_value, value) in enumerate(zip(old, state)):
+                    if old_value != value:
+                        mask |= 1 << i
+                        values.append(value)
+                changes.append(_CHANGES[mask].pack(net_id, mask, *values))
+            states[net_id] = state
+
+        # Pooled entities come back as new spawns under the same net id,
+        # which a delta carries as changed fields
+        removed = []
+        if len(current) != len(ids):
+            for entity, net_id in ids.items():
+                if entity not in current:
+                    removed.append(_ID.pack(net_id))
+                    del states[net_id]
+                    self.free_ids.append(net_id)
+            self.ids = current
+
+        return b"".join([self.header, _COUNTS.pack(len(removed), len(added), len(changes)),
+                         *removed, *added, *changes])
+
+    def _new_id(self):
+        net_id = self.next_id
+        self.next_id += 1
+        return net_id
+
+    def keyframe(self):
+        """Payload listing the whole state as of the last update()"""
+        return b"".join([self.header, _ID.pack(len(self.states)),
+                         *(_ENTITY.pack(net_id, *state) for net_id, state in self.states.items())])
+
+
+class SnapshotDecoder:
+    """Rebuilds a session's state from the keyframes and deltas it receives"""
+
+    def __init__(self):
+        self.header = None
+        self.entities = {}   # net id -> (kind, x, y, a, b)
+
+    def apply(self, kind, payload):
+        """Apply a KEYFRAME or DELTA payload; return the new header"""
+        header = SnapshotHeader._make(SNAPSHOT_HEADER.unpack_from(payload))
+        offset = SNAPSHOT_HEADER.size
+        entities = self.entities
+        if kind == KEYFRAME:
+            (count,) = _ID.unpack_from(payload, offset)
+            offset += _ID.size
+            entities.clear()
+            for _ in range(count):
+                net_id, *state = _ENTITY.unpack_from(payload, offset)
+                offset += _ENTITY.size
+                entities[net_id] = tuple(state)
+        elif kind == DELTA:
+            if self.header is None or header.seq != self.header.seq + 1:
+                raise ProtocolError(f"delta {header.seq} does not follow snapshot "
+                                    f"{self.header.seq if self.header else None}")
+            removed, added, changed = _COUNTS.unpack_from(payload, offset)
+            offset += _COUNTS.size
+            for _ in range(removed):
+                del entities[_ID.unpack_from(payload, offset)[0]]
+                offset += _ID.size
+            for _ in range(added):
+                net_id, *state = _ENTITY.unpack_from(payload, offset)
+                offset += _ENTITY.size
+                entities[net_id] = tuple(state)
+            for _ in range(changed):
+                mask = payload[offset + _ID.size]
+                change = _CHANGES[mask]
+                net_id, _, *values = change.unpack_from(payload, offset)
+                offset += change.size
+                state = list(entities[net_id])
+                for i in range(len(state)):
+                    if mask >> i & 1:
+                        state[i] = values.pop(0)
+                entities[net_id] = tuple(state)
+        else:
+            raise ProtocolError(f"not a snapshot message: {kind}")
+        if offset != len(payload):
+            raise ProtocolError("snapshot has trailing bytes")
+        self.header = header
+        return header
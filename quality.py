@@ -0,0 +1,128 @@
+"""Adaptive quality tiers that trade effects for frame rate
+
+The controller watches a rolling average of the time each frame spends
+working (excluding the wait in clock.tick) against the frame budget. It
+steps down a tier when the average runs over the budget and back up once
+there has been plenty of headroom for a while. Separate thresholds and a
+cooldown after each change keep it from flickering between tiers.
+"""
+from collections import deque, namedtuple
+
+from simulation import FPS
+
+QualityTier = namedtuple("QualityTier", [
+    "name",
+    "max_particles",      # live particle cap, None for unlimited
+    "star_glow",          # glow halo behind stars
+    "wing_glow",          # glow surface behind flapping wings
+    "background_clouds",  # decoration clouds drawn in the sky
+    "simple_clouds",      # single-ellipse obstacle clouds
+])
+
+# Best looking first
+QUALITY_TIERS = (
+    QualityTier("high", None, True, True, 8, False),
+    QualityTier("medium", 4000, True, False, 6, False),
+    QualityTier("low", 1500, False, False, 4, True),
+    QualityTier("minimal", 500, False, False, 0, True),
+)
+
+# Rolling window, in frames, that decisions are based on
+QUALITY_WINDOW = 60
+
+# Step down above this share of the frame budget, up below the other
+DOWNGRADE_LOAD = 0.9
+UPGRADE_LOAD = 0.5
+
+# Frames to wait after a change before the next one
+QUALITY_COOLDOWN = 120
+
+# Tier changes kept for telemetry
+QUALITY_HISTORY = 64
+
+
+def tier_by_name(name):
+    """Look up a tier's index by name"""
+    for index, tier in enumerate(QUALITY_TIERS):
+        if tier.name == name:
+            return index
+    raise ValueError(f"unknown quality tier {name!r}")
+
+
+class QualityController:
+    """Picks a quality tier from rolling frame work time"""
+
+    def __init__(self, target_fps=FPS, tier=0, adaptive=True, window=QUALITY_WINDOW,
+                 cooldown=QUALITY_COOLDOWN):
+        self.budget_ms = 1000 / target_fps
+        self.index = tier
+        self.adaptive = adaptive
+        self.cooldown = cooldown
+        self.samples = deque(maxlen=window)
+        self.total = 0.0
+        self.frames = 0
+        self.last_change = 0
+        self.listeners = []
+
+        # Telemetry
+        self.changes = deque(maxlen=QUALITY_HISTORY)
+        self.frames_per_tier = [0] * len(QUALITY_TIERS)
+
+    @property
+    def tier(self):
+        return QUALITY_TIERS[self.index]
+
+    @property
+    def average_ms(self):
+        return self.total / len(self.samples) if self.samples else 0.0
+
+    def record(self, work_ms):
+        """Add one frame's work time; return the new tier if it changed, else None"""
+        samples = self.samples
+        if len(samples) == samples.maxlen:
+            self.total -= samples[0]
+        samples.append(work_ms)
+        self.total += work_ms
+        self.frames += 1
+        self.frames_per_tier[self.index] += 1
+
+        if not self.adaptive or len(samples) < samples.maxlen:
+            return None
+        if self.frames - self.last_change < self.cooldown:
+            return None
+        average = self.average_ms
+        if average > self.budget_ms * DOWNGRADE_LOAD and self.index < len(QUALITY_TIERS) - 1:
+            return self.set_tier(self.index + 1, average)
+        if average < self.budget_ms * UPGRADE_LOAD and self.index > 0:
+            return self.set_tier(self.index - 1, average)
+        return None
+
+    def set_tier(self, index, average_ms=None):
+        """Switch tiers, record the change and tell listeners; return the new tier"""
+        previous = self.tier
+        self.index = index
+        self.last_change = self.frames
+        # Measurements taken at the old tier say nothing about the new one
+        self.samples.clear()
+        self.total = 0.0
+        change = {
+            "frame": self.frames,
+            "from": previous.name,
+            "to": self.tier.name,
+            "average_ms": average_ms,
+        }
+        self.changes.append(change)
+        for listener in self.listeners:
+            listener(change)
+        return self.tier
+
+    def stats(self):
+        """Controller telemetry for monitoring"""
+        return {
+            "tier": self.tier.name,
+            "adaptive": self.adaptive,
+            "average_ms": self.average_ms,
+            "budget_ms": self.budget_ms,
+            "frames_per_tier": {tier.name: count for tier, count in zip(QUALITY_TIERS, self.frames_per_tier)},
+            "changes": list(self.changes),
+        }
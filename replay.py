@@ -0,0 +1,212 @@
+"""Deterministic replays: record a game's seed and flaps, re-simulate headlessly
+
+A replay is the world seed plus one bit per simulated frame saying whether
+the sky girl flapped before that step. Since the simulation core only
+draws randomness from its seeded RNG and counts time in frames, that is
+enough to rebuild every frame of the game exactly. The file stores the
+collision mode the game was played with, and the final score and a state
+hash so a re-simulation can be checked.
+
+Usage:
+    python replay.py game.sgr [--seek FRAME] [--snapshot-interval N]
+"""
+import argparse
+import bisect
+import copy
+import hashlib
+import os
+import struct
+import sys
+import time
+import zlib
+
+from simulation import COLLISION_MODES, FPS, World, make_collider
+
+REPLAY_MAGIC = b"SGRP"
+# Version 2: spawns are drawn from seeded SpawnSchedule chunks
+# Version 3: the collision mode is stored, as an index into COLLISION_MODES
+# Version 4: pixel collision uses the sky girl's body mask, without wings
+REPLAY_VERSION = 4
+
+# magic, version, seed, frames, final score, state hash, collision mode
+_HEADER = struct.Struct("<4sBQIQ8sB")
+
+# Frames between snapshots kept by ReplayPlayer for seeking
+SNAPSHOT_INTERVAL = 600
+
+
+class ReplayError(ValueError):
+    """Raised for malformed replay files"""
+
+
+def state_hash(world):
+    """Stable 8-byte digest of everything that decides how a game continues"""
+    girl = world.sky_girl
+    state = [world.frame, world.score, world.spawn_timer, world.game_over,
+             girl.y, girl.velocity_y, girl.flap_timer]
+    for cloud in world.clouds:
+        state.append((cloud.x, cloud.y, cloud.width, cloud.height, cloud.type, cloud.lightning_timer))
+    for star in world.stars:
+        state.append((star.x, star.y, star.size))
+    for bird in world.birds:
+        state.append((bird.x, bird.y, bird.wing_flap))
+    return hashlib.blake2b(repr(state).encode(), digest_size=8).digest()
+
+
+class Replay:
+    """Seed plus per-frame flap inputs of one game"""
+
+    def __init__(self, seed, flaps=None, final_score=0, final_hash=bytes(8), collision="rect"):
+        self.seed = seed
+        self.flaps = bytearray(flaps or ())
+        self.final_score = final_score
+        self.final_hash = final_hash
+        self.collision = collision
+
+    def __len__(self):
+        return len(self.flaps)
+
+    def to_bytes(self):
+        """Encode as header plus a zlib-compressed flap bitset"""
+        bits = bytearray((len(self.flaps) + 7) // 8)
+        for frame, flapped in enumerate(self.flaps):
+            if flapped:
+                bits[frame >> 3] |= 1 << (frame & 7)
+        header = _HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, len(self.flaps),
+                              self.final_score, self.final_hash, COLLISION_MODES.index(self.collision))
+        return header + zlib.compress(bytes(bits), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode bytes written by to_bytes()"""
+        if len(data) < _HEADER.size:
+            raise ReplayError("replay too short")
+        magic, version, seed, frames, final_score, final_hash, collision = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ReplayError("not a replay file")
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        if collision >= len(COLLISION_MODES):
+            raise ReplayError(f"unknown collision mode {collision}")
+        try:
+            bits = zlib.decompress(data[_HEADER.size:])
+        except zlib.error as exc:
+            raise ReplayError(f"corrupt flap data: {exc}") from None
+        if len(bits) != (frames + 7) // 8:
+            raise ReplayError("flap data does not match frame count")
+        flaps = bytearray((bits[frame >> 3] >> (frame & 7)) & 1 for frame in range(frames))
+        return cls(seed, flaps, final_score, final_hash, COLLISION_MODES[collision])
+
+    def save(self, path):
+        """Write the replay to a file"""
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """Read a replay from a file"""
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def replay_path(path, seed):
+    """Per-game file name for a recording path: game.sgr -> game-SEED.sgr"""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{seed}{ext}"
+
+
+class ReplayRecorder:
+    """Collects the inputs of a live game, one call per simulated frame"""
+
+    def __init__(self, seed, collision="rect"):
+        self.replay = Replay(seed, collision=collision)
+
+    def record(self, world):
+        """Note whether the world was flapped since its last step; call before step()"""
+        self.replay.flaps.append(world.flapped)
+
+    def finish(self, world):
+        """Stamp the final score and state hash; return the finished replay"""
+        self.replay.final_score = world.score
+        self.replay.final_hash = state_hash(world)
+        return self.replay
+
+
+class ReplayPlayer:
+    """Re-simulates a replay headlessly, with seeking through periodic snapshots"""
+
+    def __init__(self, replay, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.replay = replay
+        self.snapshot_interval = snapshot_interval
+        self.world = World(seed=replay.seed, collider=make_collider(replay.collision))
+        self.snapshot_frames = [0]
+        self.snapshots = [copy.deepcopy(self.world)]
+
+    @property
+    def frame(self):
+        return self.world.frame
+
+    def step(self):
+        """Apply the recorded input for the next frame and simulate it"""
+        world = self.world
+        if self.replay.flaps[world.frame]:
+            world.flap()
+        world.step()
+        if world.frame % self.snapshot_interval == 0 and world.frame > self.snapshot_frames[-1]:
+            self.snapshot_frames.append(world.frame)
+            self.snapshots.append(copy.deepcopy(world))
+
+    def seek(self, frame):
+        """Put the world at the given frame, restoring the nearest earlier snapshot"""
+        frame = max(0, min(frame, len(self.replay)))
+        index = bisect.bisect_right(self.snapshot_frames, frame) - 1
+        if frame < self.world.frame or self.snapshot_frames[index] > self.world.frame:
+            self.world = copy.deepcopy(self.snapshots[index])
+        while self.world.frame < frame:
+            self.step()
+        return self.world
+
+    def run(self):
+        """Play to the end of the replay; return the final world"""
+        return self.seek(len(self.replay))
+
+    def verify(self):
+        """Play to the end; return True if score and state hash match the recording"""
+        world = self.run()
+        return world.score == self.replay.final_score and state_hash(world) == self.replay.final_hash
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-simulate a Sky Girl replay")
+    parser.add_argument("path", help="replay file written with --record")
+    parser.add_argument("--seek", type=int, help="stop at this frame and report its state")
+    parser.add_argument("--snapshot-interval", type=int, default=SNAPSHOT_INTERVAL,
+                        help="frames between seek snapshots (default: %(default)s)")
+    args = parser.parse_args()
+
+    try:
+        replay = Replay.load(args.path)
+    except (OSError, ReplayError) as exc:
+        sys.exit(f"{args.path}: {exc}")
+    player = ReplayPlayer(replay, args.snapshot_interval)
+
+    start = time.perf_counter()
+    if args.seek is not None:
+        world = player.seek(args.seek)
+        elapsed = time.perf_counter() - start
+        print(f"frame {world.frame}: score {world.score}, hash {state_hash(world).hex()}")
+    else:
+        ok = player.verify()
+        elapsed = time.perf_counter() - start
+        world = player.world
+        print(f"frames {world.frame} ({replay.collision} collision), score {world.score} (recorded {replay.final_score}), "
+              f"hash {state_hash(world).hex()} (recorded {replay.final_hash.hex()})")
+        print("OK" if ok else "MISMATCH")
+    speed = world.frame / FPS / elapsed if elapsed > 0 else float("inf")
+    print(f"simulated in {elapsed:.3f}s ({speed:.0f}x real time)")
+    if args.seek is None and not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
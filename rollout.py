@@ -0,0 +1,213 @@
+"""Parallel headless rollouts for tuning the difficulty curve
+
+Games are split into chunks of seeds and spread over a
+ProcessPoolExecutor. Each worker builds its own worlds and policy from
+plain, picklable arguments, plays its chunk and sends back only a small
+aggregate (histograms of survival time and score), so nothing is shared
+between processes and throughput scales with the number of cores.
+Aggregates are merged as chunks finish, which lets long sweeps report
+progress while they run.
+
+Usage:
+    python rollout.py --games 10000 --policy hover
+    python rollout.py --set speed_divisor=150 --sweep cloud_interval_floor=40,60,80
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+# --collision pixel imports pygame; keep its banner out of the JSON output
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from simulation import (COLLISION_MODES, DEFAULT_DIFFICULTY, FPS, World, hover_policy, make_collider, play,
+                        random_policy)
+
+POLICIES = {
+    "random": random_policy,
+    "hover": hover_policy,
+}
+
+# Games per task sent to a worker
+CHUNK_SIZE = 100
+
+# Survival time histogram resolution, in frames
+SURVIVAL_BUCKET = FPS
+
+# Games that reach this are counted as survived
+MAX_FRAMES = 60 * 60 * FPS
+
+
+class RolloutStats:
+    """Mergeable histograms of survival frames and score"""
+
+    def __init__(self):
+        self.games = 0
+        self.survived = 0
+        self.total_frames = 0
+        self.total_score = 0
+        self.frames = Counter()
+        self.scores = Counter()
+
+    def add(self, frames, score, survived=False):
+        """Count one finished game"""
+        self.games += 1
+        self.survived += survived
+        self.total_frames += frames
+        self.total_score += score
+        self.frames[frames // SURVIVAL_BUCKET * SURVIVAL_BUCKET] += 1
+        self.scores[score] += 1
+
+    def merge(self, other):
+        """Fold another aggregate into this one"""
+        self.games += other.games
+        self.survived += other.survived
+        self.total_frames += other.total_frames
+        self.total_score += other.total_score
+        self.frames.update(other.frames)
+        self.scores.update(other.scores)
+        return self
+
+    @staticmethod
+    def _percentile(histogram, fraction):
+        """Value at a fraction of the way through a histogram"""
+        total = sum(histogram.values())
+        if not total:
+            return 0
+        rank = fraction * (total - 1)
+        seen = 0
+        for value in sorted(histogram):
+            seen += histogram[value]
+            if seen > rank:
+                return value
+        return max(histogram)
+
+    def summary(self):
+        """Distribution figures; survival times in seconds"""
+        games = self.games or 1
+        return {
+            "games": self.games,
+            "survival_rate": self.survived / games,
+            "mean_seconds": self.total_frames / games / FPS,
+            "p10_seconds": self._percentile(self.frames, 0.10) / FPS,
+            "p50_seconds": self._percentile(self.frames, 0.50) / FPS,
+            "p90_seconds": self._percentile(self.frames, 0.90) / FPS,
+            "mean_score": self.total_score / games,
+            "p50_score": self._percentile(self.scores, 0.50),
+            "p90_score": self._percentile(self.scores, 0.90),
+            "max_score": max(self.scores, default=0),
+        }
+
+
+def run_chunk(difficulty, policy_name, policy_args, seeds, max_frames=MAX_FRAMES, collision="rect"):
+    """Play one game per seed in a worker process; return their RolloutStats"""
+    make_policy = POLICIES[policy_name]
+    stats = RolloutStats()
+    world = World(difficulty=difficulty, collider=make_collider(collision))
+    for seed in seeds:
+        world.reset(seed)
+        # The policy gets its own stream so it doesn't perturb spawning
+        policy = make_policy(rng=random.Random(seed ^ 0x5EED), **policy_args)
+        frames = play(world, policy, max_frames)
+        stats.add(frames, world.score, survived=not world.game_over)
+    return stats
+
+
+def run_rollouts(difficulty, games, policy_name="random", policy_args=None, workers=None,
+                 first_seed=0, chunk_size=CHUNK_SIZE, max_frames=MAX_FRAMES, executor=None,
+                 collision="rect"):
+    """Play games in parallel, yielding the merged RolloutStats after each finished chunk"""
+    policy_args = policy_args or {}
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = []
+        for start in range(first_seed, first_seed + games, chunk_size):
+            seeds = range(start, min(start + chunk_size, first_seed + games))
+            futures.append(executor.submit(run_chunk, difficulty, policy_name, policy_args, seeds, max_frames,
+                                           collision))
+        total = RolloutStats()
+        for future in as_completed(futures):
+            yield total.merge(future.result())
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+# Difficulty fields World divides or takes a modulo by, which must stay positive
+POSITIVE_FIELDS = tuple(name for name in DEFAULT_DIFFICULTY._fields if name.endswith(("_divisor", "_floor")))
+
+
+def parse_assignment(text, sweep=False):
+    """Parse name=value (or name=v1,v2,... for sweeps) against DifficultyConfig fields"""
+    name, _, values = text.partition("=")
+    if name not in DEFAULT_DIFFICULTY._fields or not values:
+        raise argparse.ArgumentTypeError(
+            f"expected FIELD=VALUE with FIELD one of {', '.join(DEFAULT_DIFFICULTY._fields)}")
+    kind = type(getattr(DEFAULT_DIFFICULTY, name))
+    try:
+        parsed = [kind(value) for value in values.split(",")] if sweep else [kind(values)]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad value for {name}: {values}") from None
+    if name in POSITIVE_FIELDS and min(parsed) <= 0:
+        raise argparse.ArgumentTypeError(f"{name} must be positive, got {values}")
+    return name, parsed if sweep else parsed[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel headless rollouts for difficulty tuning")
+    parser.add_argument("--games", type=int, default=1000, help="games per difficulty config")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--policy", choices=list(POLICIES), default="hover", help="flap policy")
+    parser.add_argument("--flap-chance", type=float, help="random policy: chance to flap each frame")
+    parser.add_argument("--max-seconds", type=float, default=MAX_FRAMES / FPS,
+                        help="cut games off (as survived) after this long")
+    parser.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE",
+                        type=parse_assignment, help="override a difficulty field")
+    parser.add_argument("--sweep", action="append", default=[], metavar="FIELD=V1,V2,...",
+                        type=lambda text: parse_assignment(text, sweep=True),
+                        help="try every combination of these difficulty values")
+    parser.add_argument("--collision", choices=COLLISION_MODES, default="rect",
+                        help="obstacle collision by sprite mask or by hitbox rectangle (default: %(default)s)")
+    parser.add_argument("--progress", action="store_true", help="print running totals as chunks finish")
+    args = parser.parse_args()
+
+    policy_args = {}
+    if args.flap_chance is not None:
+        if args.policy != "random":
+            parser.error("--flap-chance only applies to the random policy")
+        policy_args["flap_chance"] = args.flap_chance
+    base = DEFAULT_DIFFICULTY._replace(**dict(args.set))
+    names = [name for name, _ in args.sweep]
+    max_frames = int(args.max_seconds * FPS)
+
+    # One pool for the whole sweep so workers are started once
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for values in product(*(values for _, values in args.sweep)):
+            difficulty = base._replace(**dict(zip(names, values)))
+            start = time.perf_counter()
+            for stats in run_rollouts(difficulty, args.games, args.policy, policy_args,
+                                      max_frames=max_frames, executor=executor,
+                                      collision=args.collision):
+                if args.progress:
+                    print(f"  {stats.games}/{args.games} games", file=sys.stderr)
+            elapsed = time.perf_counter() - start
+            result = {
+                "difficulty": difficulty._asdict(),
+                "policy": args.policy,
+                "collision": args.collision,
+                **stats.summary(),
+                "games_per_second": stats.games / elapsed,
+                "frames_per_second": stats.total_frames / elapsed,
+            }
+            print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""Asyncio server hosting many headless Sky Girl sessions
+
+Each session is a World with the same rules as the game, played by the
+client that started it (JOIN) and watched by any number of spectators
+(WATCH). Clients send FLAP; like SPACE in the game, it flaps while
+playing and starts the next game once one is over. All sessions advance
+together on one fixed-rate tick task: every tick steps each live session
+once, then broadcasts each changed session's delta snapshot (see
+protocol.py), encoded once and shared by all its clients.
+
+Simulation always runs in full, so every session keeps exact game time;
+if the loop stalls, up to MAX_CATCHUP_TICKS are stepped at once and any
+further time is dropped. Broadcasting is what gets budgeted: it stops
+once the tick has used TICK_BUDGET of its period, and the sessions it
+did not reach go first on the next tick. Writes never wait on a client.
+One whose unsent data passes CLIENT_BUFFER_LIMIT skips snapshots (and
+gets a keyframe when it catches up), and is dropped if it stays behind
+for SLOW_CLIENT_TIMEOUT. New sessions are refused while recent ticks run
+over ADMIT_BUDGET.
+
+Usage:
+    python server.py [--port 7777] [--max-sessions N] [--scores scores.sgt]
+"""
+import argparse
+import asyncio
+import json
+import random
+import struct
+import time
+from collections import deque
+
+from latency import latency_summary
+from profiler import percentile
+from protocol import (DELTA, ERROR, FLAP, JOIN, KEYFRAME, STATS, STATS_REPLY, WATCH, WATCH_BODY,
+                      WELCOME, WELCOME_BODY, ProtocolError, SnapshotEncoder, pack_message, read_message)
+from simulation import COLLISION_MODES, FPS, World, make_collider
+from telemetry import GAME_OVER, GAME_QUIT, GAME_SAMPLE, GAME_START, TelemetryStore
+
+DEFAULT_PORT = 7777
+
+# Sessions step at the game's own rate, so game time matches
+TICK_RATE = FPS
+
+# Share of a tick's period it may spend before broadcasting stops for that tick
+TICK_BUDGET = 0.8
+
+# New sessions are refused while the 95th percentile tick uses more than this share
+ADMIT_BUDGET = 0.7
+
+# Ticks stepped at once to catch up after a stall; beyond this, time is dropped
+MAX_CATCHUP_TICKS = 5
+
+# Tick work samples kept for the statistics and admission
+TICK_WINDOW = 300
+
+# Unsent bytes allowed to queue for a client before its snapshots are skipped
+CLIENT_BUFFER_LIMIT = 64 * 1024
+
+# Seconds a client may stay over the limit before it is disconnected
+SLOW_CLIENT_TIMEOUT = 5.0
+
+
+class Client:
+    """One connection: the player of a session or a spectator"""
+
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.session = None
+        # Holds the session's last snapshot, so the shared delta applies
+        self.synced = False
+        self.behind_since = None
+
+    def send(self, kind, payload=b""):
+        """Queue a message without waiting for it to be written"""
+        if not self.writer.is_closing():
+            data = pack_message(kind, payload)
+            self.writer.write(data)
+            self.server.bytes_sent += len(data)
+
+    def close(self, reason=None):
+        """Send an optional ERROR reason, then hang up"""
+        if reason is not None:
+            self.send(ERROR, reason.encode())
+        self.writer.close()
+
+    def send_snapshot(self, session, now):
+        """Send the session's delta, or a keyframe if out of sync; skip it while backed up"""
+        server = self.server
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > CLIENT_BUFFER_LIMIT:
+            self.synced = False
+            server.skipped_snapshots += 1
+            if self.behind_since is None:
+                self.behind_since = now
+            elif now - self.behind_since > SLOW_CLIENT_TIMEOUT:
+                # Don't wait for the backlog to flush
+                server.slow_disconnects += 1
+                self.writer.transport.abort()
+            return
+        self.behind_since = None
+        if self.synced:
+            data = session.delta_message
+            server.deltas += 1
+        else:
+            data = session.keyframe_message()
+            server.keyframes += 1
+            self.synced = True
+        self.writer.write(data)
+        server.bytes_sent += len(data)
+
+
+class Session:
+    """One game: a World, the client playing it and its spectators"""
+
+    def __init__(self, session_id, player, collider, telemetry=None):
+        self.id = session_id
+        self.player = player
+        self.clients = [player]
+        self.telemetry = telemetry
+        self.world = World(collider=collider)
+        self.encoder = SnapshotEncoder()
+        self.flap_pending = False
+        # Stepped since the last broadcast
+        self.changed = True
+        self.delta_message = None
+        self.keyframe = None
+        self.start()
+
+    def start(self):
+        """Begin a game with a fresh seed"""
+        self.world.reset(random.getrandbits(64))
+        self.changed = True
+        self.push_telemetry(GAME_START)
+
+    def push_telemetry(self, kind):
+        if self.telemetry is not None:
+            world = self.world
+            self.telemetry.push(kind, world.seed, world.frame, world.score, world.game_speed)
+
+    def step(self):
+        """Apply the pending flap and advance one frame, as the game does"""
+        world = self.world
+        if self.flap_pending:
+            self.flap_pending = False
+            if world.game_over:
+                self.start()
+            else:
+                world.flap()
+        if world.game_over:
+            return
+        world.step()
+        self.changed = True
+        if world.frame % FPS == 0:
+            self.push_telemetry(GAME_SAMPLE)
+        if world.game_over:
+            self.push_telemetry(GAME_OVER)
+
+    def encode(self):
+        """Encode the current state as the delta every synced client gets next"""
+        self.delta_message = pack_message(DELTA, self.encoder.update(self.world))
+        self.keyframe = None
+        self.changed = False
+
+    def keyframe_message(self):
+        """The current state in full, encoded at most once per broadcast"""
+        if self.keyframe is None:
+            self.keyframe = pack_message(KEYFRAME, self.encoder.keyframe())
+        return self.keyframe
+
+    def broadcast(self, now):
+        """Send what changed to every client; clients out of sync get a keyframe even if nothing did"""
+        changed = self.changed
+        if changed:
+            self.encode()
+        for client in self.clients:
+            if changed or not client.synced:
+                client.send_snapshot(self, now)
+
+    def watch(self, client):
+        """Add a spectator; it is sent a keyframe on the next broadcast"""
+        client.session = self
+        client.synced = False
+        self.clients.append(client)
+
+    def leave(self, client):
+        """Remove a client; return True if it was the player, which ends the session"""
+        self.clients.remove(client)
+        if client is not self.player:
+            return False
+        if not self.world.game_over:
+            self.push_telemetry(GAME_QUIT)
+        for spectator in self.clients:
+            spectator.session = None
+            spectator.close("session ended")
+        self.clients.clear()
+        return True
+
+
+class GameServer:
+    """Runs every session on one fixed-rate tick and serves their clients"""
+
+    def __init__(self, collision="rect", max_sessions=0, scores_path=None):
+        # Masks are read-only and ticks run one at a time, so sessions share one collider
+        self.collider = make_collider(collision)
+        self.max_sessions = max_sessions
+        self.telemetry = TelemetryStore(scores_path) if scores_path is not None else None
+        self.period = 1 / TICK_RATE
+        self.sessions = {}
+        self.next_session_id = 1
+        self.clients = 0
+        # Index of the session the next broadcast starts with
+        self.cursor = 0
+        self.work = deque(maxlen=TICK_WINDOW)
+
+        # Statistics
+        self.ticks = 0
+        self.dropped_ticks = 0
+        self.overruns = 0
+        self.deferred_snapshots = 0
+        self.keyframes = 0
+        self.deltas = 0
+        self.skipped_snapshots = 0
+        self.slow_disconnects = 0
+        self.bytes_sent = 0
+        self.refused = 0
+
+    def full(self):
+        """Whether new sessions should be refused"""
+        if self.max_sessions and len(self.sessions) >= self.max_sessions:
+            return True
+        return percentile(sorted(self.work), 0.95) > ADMIT_BUDGET * self.period * 1000
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection until it closes or breaks the protocol"""
+        client = Client(self, writer)
+        self.clients += 1
+        try:
+            while True:
+                kind, payload = await read_message(reader)
+                session = client.session
+                if kind == FLAP:
+                    if session is not None and client is session.player:
+                        session.flap_pending = True
+                elif kind == JOIN:
+                    if session is not None:
+                        raise ProtocolError("already in a session")
+                    if self.full():
+                        self.refused += 1
+                        client.close("server full")
+                        return
+                    session = Session(self.next_session_id, client, self.collider, self.telemetry)
+                    self.next_session_id += 1
+                    self.sessions[session.id] = session
+                    client.session = session
+                    client.send(WELCOME, WELCOME_BODY.pack(session.id, TICK_RATE))
+                elif kind == WATCH:
+                    if session is not None:
+                        raise ProtocolError("already in a session")
+                    (session_id,) = WATCH_BODY.unpack(payload)
+                    session = self.sessions.get(session_id)
+                    if session is None:
+                        client.close(f"no session {session_id}")
+                        return
+                    session.watch(client)
+                    client.send(WELCOME, WELCOME_BODY.pack(session.id, TICK_RATE))
+                elif kind == STATS:
+                    client.send(STATS_REPLY, json.dumps(self.stats()).encode())
+                else:
+                    raise ProtocolError(f"unknown message type {kind}")
+        except ProtocolError as exc:
+            client.close(str(exc))
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error):
+            pass
+        except asyncio.CancelledError:
+            # The server is shutting down; just clean up
+            pass
+        finally:
+            self.clients -= 1
+            session = client.session
+            if session is not None and session.leave(client):
+                del self.sessions[session.id]
+            writer.close()
+
+    def tick(self, steps, now):
+        """Step every session, then broadcast within what is left of the budget"""
+        start = time.perf_counter()
+        sessions = list(self.sessions.values())
+        for _ in range(steps):
+            for session in sessions:
+                session.step()
+        self.ticks += steps
+
+        # Sessions the last tick had no time for go first
+        count = len(sessions)
+        first = self.cursor % count if count else 0
+        deadline = start + self.period * TICK_BUDGET
+        for sent in range(count):
+            if time.perf_counter() > deadline:
+                self.deferred_snapshots += count - sent
+                self.cursor = first + sent
+                break
+            sessions[(first + sent) % count].broadcast(now)
+
+        elapsed = time.perf_counter() - start
+        self.work.append(elapsed * 1000)
+        if elapsed > self.period:
+            self.overruns += 1
+
+    async def run_ticks(self):
+        """Tick at TICK_RATE forever, catching up (within limits) after stalls"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            now = loop.time()
+            steps = int((now - next_tick) / self.period) + 1
+            if steps > MAX_CATCHUP_TICKS:
+                self.dropped_ticks += steps - MAX_CATCHUP_TICKS
+                next_tick += (steps - MAX_CATCHUP_TICKS) * self.period
+                steps = MAX_CATCHUP_TICKS
+            next_tick += steps * self.period
+            self.tick(steps, now)
+
+    async def serve(self, host, port):
+        """Listen and tick until cancelled"""
+        listener = await asyncio.start_server(self.handle_client, host, port)
+        host, port = listener.sockets[0].getsockname()[:2]
+        print(f"listening on {host}:{port}", flush=True)
+        ticker = asyncio.create_task(self.run_ticks())
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            ticker.cancel()
+
+    def close(self):
+        """Record unfinished games and flush telemetry"""
+        if self.telemetry is not None:
+            for session in self.sessions.values():
+                if not session.world.game_over:
+                    session.push_telemetry(GAME_QUIT)
+            self.telemetry.close()
+
+    def stats(self):
+        """Tick, broadcast and backpressure counters for monitoring"""
+        return {
+            "sessions": len(self.sessions),
+            "playing": sum(not session.world.game_over for session in self.sessions.values()),
+            "clients": self.clients,
+            "tick_rate": TICK_RATE,
+            "ticks": self.ticks,
+            "dropped_ticks": self.dropped_ticks,
+            "overruns": self.overruns,
+            "budget_ms": self.period * TICK_BUDGET * 1000,
+            "tick_work": latency_summary(self.work),
+            "deferred_snapshots": self.deferred_snapshots,
+            "keyframes": self.keyframes,
+            "deltas": self.deltas,
+            "skipped_snapshots": self.skipped_snapshots,
+            "slow_disconnects": self.slow_disconnects,
+            "bytes_sent": self.bytes_sent,
+            "refused": self.refused,
+            "full": self.full(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Sky Girl sessions over TCP")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="port to listen on, 0 for any free one (default: %(default)s)")
+    parser.add_argument("--max-sessions", type=int, default=0,
+                        help="refuse new sessions beyond this many, 0 for no fixed limit")
+    parser.add_argument("--collision", choices=COLLISION_MODES, default="rect",
+                        help="obstacle collision by sprite mask or by hitbox rectangle (default: %(default)s)")
+    parser.add_argument("--scores", metavar="PATH",
+                        help="keep high scores and session telemetry in PATH (see telemetry.py)")
+    args = parser.parse_args()
+
+    server = GameServer(args.collision, args.max_sessions, args.scores)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
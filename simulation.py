@@ -0,0 +1,534 @@
+"""Pygame-free simulation core for Sky Girl - Cloud Glider
+
+Everything here steps without a display, clock or pygame import so that
+games can be simulated headlessly at thousands of frames per second.
+"""
+import math
+import random
+from collections import deque, namedtuple
+
+from collision import CollisionIndex, Hitbox
+from pooling import EntityPool
+
+# World constants
+SCREEN_WIDTH = 1024
+SCREEN_HEIGHT = 768
+FPS = 60
+
+# Milliseconds of game time that pass per simulated frame
+FRAME_MS = 1000 / FPS
+
+# Difficulty curve. Spawn intervals (in frames) shrink from start as
+# score / divisor grows, down to the floor; game speed grows likewise
+DifficultyConfig = namedtuple("DifficultyConfig", [
+    "cloud_interval_start", "cloud_interval_floor", "cloud_interval_divisor",
+    "star_interval_start", "star_interval_floor", "star_interval_divisor",
+    "bird_interval_start", "bird_interval_floor", "bird_interval_divisor",
+    "storm_chance",
+    "speed_start", "speed_divisor",
+], defaults=[120, 60, 10, 80, 30, 5, 200, 120, 8, 0.3, 1.0, 100])
+
+DEFAULT_DIFFICULTY = DifficultyConfig()
+
+# Pre-rolled random parts of one spawn; the spawn frame itself follows
+# from the score, so World still decides when each one enters
+CloudSpawn = namedtuple("CloudSpawn", "y type width height speed")
+StarSpawn = namedtuple("StarSpawn", "y size speed")
+BirdSpawn = namedtuple("BirdSpawn", "y speed vertical_movement")
+
+# Spawns rolled together from one seeded RNG
+SPAWN_CHUNK = 32
+
+# Obstacle collision modes a World (and a replay) can use
+COLLISION_MODES = ("rect", "pixel")
+
+
+def roll_cloud(rng, storm_chance=DEFAULT_DIFFICULTY.storm_chance):
+    """Roll a cloud spawn"""
+    cloud_type = "storm" if rng.random() < storm_chance else "normal"
+    y = rng.randint(50, SCREEN_HEIGHT - 150)
+    speed = rng.uniform(2, 4)
+    if cloud_type == "storm":
+        width = rng.randint(80, 120)
+        height = rng.randint(50, 70)
+    else:
+        width = rng.randint(60, 100)
+        height = rng.randint(40, 60)
+    return CloudSpawn(y, cloud_type, width, height, speed)
+
+
+def roll_star(rng):
+    """Roll a star spawn"""
+    return StarSpawn(rng.randint(50, SCREEN_HEIGHT - 50), rng.randint(8, 12), rng.uniform(1, 3))
+
+
+def roll_bird(rng):
+    """Roll a bird spawn"""
+    return BirdSpawn(rng.randint(100, SCREEN_HEIGHT - 200), rng.uniform(3, 5), rng.uniform(0.5, 1.5))
+
+
+def spawn_chunk(seed, kind, index, difficulty=DEFAULT_DIFFICULTY):
+    """Roll chunk index of one kind's spawn sequence; the result depends only on the arguments"""
+    rng = random.Random(f"{seed}:{kind}:{index}")
+    if kind == "cloud":
+        return [roll_cloud(rng, difficulty.storm_chance) for _ in range(SPAWN_CHUNK)]
+    if kind == "star":
+        return [roll_star(rng) for _ in range(SPAWN_CHUNK)]
+    return [roll_bird(rng) for _ in range(SPAWN_CHUNK)]
+
+
+# Chunks are rolled on demand here; worldgen.BackgroundSpawnSchedule rolls
+# them ahead of time on a producer thread. Both give the same spawns for
+# the same seed
+class SpawnSchedule:
+    """Upcoming spawns of a seeded world, each kind an endless sequence rolled a chunk at a time"""
+
+    KINDS = ("cloud", "star", "bird")
+
+    def __init__(self):
+        self.seed = None
+        self.difficulty = DEFAULT_DIFFICULTY
+        self.pending = {kind: deque() for kind in self.KINDS}
+        self.next_chunk = dict.fromkeys(self.KINDS, 0)
+
+    def reset(self, seed, difficulty=DEFAULT_DIFFICULTY):
+        """Start the sequences over for a new seed"""
+        self.seed = seed
+        self.difficulty = difficulty
+        for kind in self.KINDS:
+            self.pending[kind].clear()
+            self.next_chunk[kind] = 0
+
+    def fetch(self, kind, index):
+        """Get chunk index of a kind's sequence"""
+        return spawn_chunk(self.seed, kind, index, self.difficulty)
+
+    def next(self, kind):
+        """Take the next spawn of a kind"""
+        pending = self.pending[kind]
+        if not pending:
+            pending.extend(self.fetch(kind, self.next_chunk[kind]))
+            self.next_chunk[kind] += 1
+        return pending.popleft()
+
+    def close(self):
+        """Release any resources; nothing to do when rolling on demand"""
+
+
+class SkyGirl:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.prev_y = y
+        self.width = 48
+        self.height = 48
+        self.velocity_y = 0
+        self.gravity = 0.5
+        self.flap_power = -8
+        self.max_fall_speed = 10
+
+        # Animation
+        self.flap_animation = 0
+        self.wing_angle = 0
+        self.is_flapping = False
+        self.flap_timer = 0
+
+        self.hitbox = Hitbox(owner=self)
+        self.update_hitbox()
+
+    def flap(self):
+        """Make the girl flap upward"""
+        self.velocity_y = self.flap_power
+        self.is_flapping = True
+        self.flap_timer = 10
+
+    def update(self, time_ms):
+        """Update girl's position and animation"""
+        self.prev_y = self.y
+
+        # Apply gravity
+        self.velocity_y += self.gravity
+        if self.velocity_y > self.max_fall_speed:
+            self.velocity_y = self.max_fall_speed
+
+        # Update position
+        self.y += self.velocity_y
+
+        # Keep girl on screen
+        if self.y < 0:
+            self.y = 0
+            self.velocity_y = 0
+        elif self.y > SCREEN_HEIGHT - self.height:
+            self.y = SCREEN_HEIGHT - self.height
+            self.velocity_y = 0
+
+        # Update animation
+        if self.flap_timer > 0:
+            self.flap_timer -= 1
+            self.wing_angle = math.sin(self.flap_timer * 0.5) * 30
+        else:
+            self.is_flapping = False
+            self.wing_angle = math.sin(time_ms * 0.01) * 15
+
+        self.update_hitbox()
+
+    def update_hitbox(self):
+        """Move the collision box to the current position"""
+        self.hitbox.set(self.x + 8, self.y + 8, self.width - 16, self.height - 16)
+
+    def get_rect(self):
+        """Get collision rectangle"""
+        return self.hitbox.as_tuple()
+
+class Cloud:
+    __slots__ = ("x", "y", "prev_x", "type", "rng", "speed", "width", "height",
+                 "lightning_timer", "show_lightning", "hitbox", "pool_slot")
+
+    def __init__(self, *args):
+        self.hitbox = Hitbox(owner=self)
+        self.pool_slot = -1
+        if args:
+            self.reset(*args)
+
+    def reset(self, x, y, cloud_type="normal", rng=random):
+        """(Re)initialize the cloud for a new spawn, rolling its size and speed"""
+        speed = rng.uniform(2, 4)
+        if cloud_type == "storm":
+            width = rng.randint(80, 120)
+            height = rng.randint(50, 70)
+        else:
+            width = rng.randint(60, 100)
+            height = rng.randint(40, 60)
+        self.place(x, CloudSpawn(y, cloud_type, width, height, speed), rng)
+
+    def place(self, x, spawn, rng=random):
+        """(Re)initialize the cloud from a pre-rolled CloudSpawn"""
+        self.x = x
+        self.y = spawn.y
+        self.prev_x = x
+        self.type = spawn.type
+        self.rng = rng
+        self.speed = spawn.speed
+        self.width = spawn.width
+        self.height = spawn.height
+
+        # Lightning animation for storm clouds
+        self.lightning_timer = 0
+        self.show_lightning = False
+
+        self.hitbox.set(x, spawn.y, self.width, self.height)
+
+    def update(self, game_speed):
+        """Update cloud position"""
+        self.prev_x = self.x
+        self.x -= self.speed * game_speed
+        self.hitbox.x = int(self.x)
+
+        # Lightning animation for storm clouds
+        if self.type == "storm":
+            self.lightning_timer += 1
+            if self.lightning_timer > 60:
+                self.show_lightning = self.rng.random() < 0.1
+                if self.show_lightning:
+                    self.lightning_timer = 0
+
+    def get_rect(self):
+        """Get collision rectangle"""
+        return self.hitbox.as_tuple()
+
+class Star:
+    __slots__ = ("x", "y", "prev_x", "size", "speed", "glow_timer", "collected", "hitbox", "pool_slot")
+
+    def __init__(self, *args):
+        self.hitbox = Hitbox(owner=self)
+        self.pool_slot = -1
+        if args:
+            self.reset(*args)
+
+    def reset(self, x, y, rng=random):
+        """(Re)initialize the star for a new spawn, rolling its size and speed"""
+        self.place(x, StarSpawn(y, rng.randint(8, 12), rng.uniform(1, 3)))
+
+    def place(self, x, spawn):
+        """(Re)initialize the star from a pre-rolled StarSpawn"""
+        self.x = x
+        self.y = y = spawn.y
+        self.prev_x = x
+        self.size = spawn.size
+        self.speed = spawn.speed
+        self.glow_timer = 0
+        self.collected = False
+
+        self.hitbox.set(x - self.size, y - self.size, self.size * 2, self.size * 2)
+
+    def update(self, game_speed):
+        """Update star position"""
+        self.prev_x = self.x
+        self.x -= self.speed * game_speed
+        self.glow_timer += 0.2
+        self.hitbox.x = int(self.x - self.size)
+
+    def get_rect(self):
+        """Get collision rectangle"""
+        return self.hitbox.as_tuple()
+
+class Bird:
+    __slots__ = ("x", "y", "prev_x", "width", "height", "speed", "wing_flap",
+                 "vertical_movement", "vertical_offset", "prev_offset", "hitbox", "pool_slot")
+
+    def __init__(self, *args):
+        self.hitbox = Hitbox(owner=self)
+        self.pool_slot = -1
+        if args:
+            self.reset(*args)
+
+    def reset(self, x, y, rng=random):
+        """(Re)initialize the bird for a new spawn, rolling its speed and bobbing"""
+        self.place(x, BirdSpawn(y, rng.uniform(3, 5), rng.uniform(0.5, 1.5)))
+
+    def place(self, x, spawn):
+        """(Re)initialize the bird from a pre-rolled BirdSpawn"""
+        self.x = x
+        self.y = spawn.y
+        self.prev_x = x
+        self.width = 30
+        self.height = 20
+        self.speed = spawn.speed
+        self.wing_flap = 0
+        self.vertical_movement = spawn.vertical_movement
+        self.vertical_offset = 0
+        self.prev_offset = 0
+
+        self.hitbox.set(x, spawn.y, self.width, self.height)
+
+    def update(self, game_speed):
+        """Update bird position"""
+        self.prev_x = self.x
+        self.prev_offset = self.vertical_offset
+        self.x -= self.speed * game_speed
+        self.wing_flap += 0.3
+        self.vertical_offset = math.sin(self.wing_flap) * self.vertical_movement
+        hitbox = self.hitbox
+        hitbox.x = int(self.x)
+        hitbox.y = int(self.y + self.vertical_offset)
+
+    def get_rect(self):
+        """Get collision rectangle"""
+        return self.hitbox.as_tuple()
+
+def bird_wing_offset(bird):
+    """Quantized wing offset for a bird's current wing phase"""
+    return int(math.sin(bird.wing_flap * 2) * 5)
+
+
+class World:
+    """One game of Sky Girl: entities, score and the per-frame rules"""
+
+    def __init__(self, rng=None, prealloc=0, seed=None, difficulty=DEFAULT_DIFFICULTY, spawns=None,
+                 collider=None):
+        self.rng = rng if rng is not None else random.Random()
+        self.seed = None
+        self.difficulty = difficulty
+
+        # Obstacle narrow phase with a first_hit(world) method (see
+        # masks.PixelCollider); None ends the game on any hitbox overlap
+        self.collider = collider
+
+        # What spawns next, pre-rolled from the seed (see SpawnSchedule)
+        self.spawns = spawns if spawns is not None else SpawnSchedule()
+
+        # Recycled entities; clouds/stars/birds are the pools' active lists
+        self.cloud_pool = EntityPool(Cloud, "clouds", prealloc, Cloud.place)
+        self.star_pool = EntityPool(Star, "stars", prealloc, Star.place)
+        self.bird_pool = EntityPool(Bird, "birds", prealloc, Bird.place)
+        self.clouds = self.cloud_pool.active
+        self.stars = self.star_pool.active
+        self.birds = self.bird_pool.active
+
+        # Broad-phase indices over persistent hitboxes
+        self.obstacles = CollisionIndex()
+        self.star_index = CollisionIndex()
+
+        # Positions of stars collected this frame, for effects
+        self.collected = []
+
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Reset world to initial state, reseeding its RNG if a seed is given"""
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        self.spawns.reset(seed if seed is not None else self.rng.getrandbits(64), self.difficulty)
+        self.sky_girl = SkyGirl(100, SCREEN_HEIGHT // 2)
+        self.cloud_pool.clear()
+        self.star_pool.clear()
+        self.bird_pool.clear()
+        self.obstacles.clear()
+        self.star_index.clear()
+        self.collected.clear()
+
+        self.score = 0
+        self.game_speed = self.difficulty.speed_start
+        self.spawn_timer = 0
+        self.background_offset = 0
+        self.frame = 0
+        self.game_over = False
+        self.flapped = False
+
+    def pool_stats(self):
+        """Entity pool counters for monitoring"""
+        return [pool.stats() for pool in (self.cloud_pool, self.star_pool, self.bird_pool)]
+
+    def flap(self):
+        """Make the sky girl flap"""
+        self.sky_girl.flap()
+        self.flapped = True
+
+    def spawn_objects(self):
+        """Spawn clouds, stars, and birds"""
+        spawns = self.spawns
+        d = self.difficulty
+        self.spawn_timer += 1
+
+        # Spawn clouds
+        if self.spawn_timer % max(d.cloud_interval_floor,
+                                  d.cloud_interval_start - int(self.score / d.cloud_interval_divisor)) == 0:
+            cloud = self.cloud_pool.spawn(SCREEN_WIDTH, spawns.next("cloud"), self.rng)
+            self.obstacles.add(cloud.hitbox)
+
+        # Spawn stars
+        if self.spawn_timer % max(d.star_interval_floor,
+                                  d.star_interval_start - int(self.score / d.star_interval_divisor)) == 0:
+            star = self.star_pool.spawn(SCREEN_WIDTH, spawns.next("star"))
+            self.star_index.add(star.hitbox)
+
+        # Spawn birds
+        if self.spawn_timer % max(d.bird_interval_floor,
+                                  d.bird_interval_start - int(self.score / d.bird_interval_divisor)) == 0:
+            bird = self.bird_pool.spawn(SCREEN_WIDTH, spawns.next("bird"))
+            self.obstacles.add(bird.hitbox)
+
+    def update_clouds(self, game_speed):
+        """Move clouds, despawning those that left the screen"""
+        # Walking backwards lets despawn() swap-remove without skipping anything
+        obstacles = self.obstacles
+        clouds = self.clouds
+        for i in range(len(clouds) - 1, -1, -1):
+            cloud = clouds[i]
+            cloud.update(game_speed)
+            if cloud.x < -cloud.width:
+                obstacles.remove(cloud.hitbox)
+                self.cloud_pool.despawn(cloud)
+
+    def update_stars(self, game_speed):
+        """Move stars, despawning those that left the screen"""
+        star_index = self.star_index
+        stars = self.stars
+        for i in range(len(stars) - 1, -1, -1):
+            star = stars[i]
+            star.update(game_speed)
+            if star.x < -star.size:
+                star_index.remove(star.hitbox)
+                self.star_pool.despawn(star)
+
+    def update_birds(self, game_speed):
+        """Move birds, despawning those that left the screen"""
+        obstacles = self.obstacles
+        birds = self.birds
+        for i in range(len(birds) - 1, -1, -1):
+            bird = birds[i]
+            bird.update(game_speed)
+            if bird.x < -bird.width:
+                obstacles.remove(bird.hitbox)
+                self.bird_pool.despawn(bird)
+
+    def check_collisions(self):
+        """End the game on an obstacle hit and collect touched stars"""
+        girl_box = self.sky_girl.hitbox
+
+        # Check collisions with sky girl
+        obstacles = self.obstacles
+        obstacles.refresh()
+        if self.collider is not None:
+            hit = self.collider.first_hit(self)
+        else:
+            hit = obstacles.first_hit(girl_box)
+        if hit is not None:
+            self.game_over = True
+
+        # Check collection
+        star_index = self.star_index
+        star_index.refresh()
+        for box in star_index.query(girl_box):
+            star = box.owner
+            star.collected = True
+            self.score += 10
+            self.collected.append((star.x, star.y))
+            star_index.remove(box)
+            self.star_pool.despawn(star)
+
+    def step(self):
+        """Advance the world by one frame"""
+        self.flapped = False
+        self.collected.clear()
+        self.frame += 1
+
+        # Update sky girl
+        self.sky_girl.update(self.frame * FRAME_MS)
+
+        # Update game speed based on score
+        self.game_speed = self.difficulty.speed_start + (self.score / self.difficulty.speed_divisor)
+
+        # Spawn objects
+        self.spawn_objects()
+
+        # Move everything; hitboxes follow in place
+        self.update_clouds(self.game_speed)
+        self.update_stars(self.game_speed)
+        self.update_birds(self.game_speed)
+
+        self.check_collisions()
+
+        # Update background
+        self.background_offset -= self.game_speed
+        if self.background_offset <= -100:
+            self.background_offset = 0
+
+
+def make_collider(mode):
+    """Collider for World(collider=...) by mode name; None means the rect hitboxes
+
+    Only "pixel" imports pygame (see masks.PixelCollider).
+    """
+    if mode == "rect":
+        return None
+    if mode == "pixel":
+        from masks import PixelCollider
+        return PixelCollider()
+    raise ValueError(f"unknown collision mode {mode!r}")
+
+
+def random_policy(flap_chance=0.08, rng=None):
+    """Build a policy that flaps at random with a fixed chance per frame"""
+    rng = rng if rng is not None else random.Random()
+    return lambda world: rng.random() < flap_chance
+
+
+def hover_policy(target_y=SCREEN_HEIGHT // 2, jitter=60, rng=None):
+    """Build a scripted policy that flaps when falling below a (jittered) target height"""
+    rng = rng if rng is not None else random.Random()
+
+    def policy(world):
+        girl = world.sky_girl
+        return girl.velocity_y > 0 and girl.y > target_y + rng.uniform(-jitter, jitter)
+    return policy
+
+
+def play(world, policy, max_frames=100000):
+    """Run one headless game until game over or max_frames; return frames played"""
+    while world.frame < max_frames and not world.game_over:
+        if policy(world):
+            world.flap()
+        world.step()
+    return world.frame
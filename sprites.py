@@ -0,0 +1,354 @@
+"""Pre-rendered entity frames packed into LRU-evicted atlas pages
+
+Each distinct look of an entity (cloud size and type, bird wing phase,
+star size and glow pulse, quantized sky girl wing angle) is rendered once
+into a shared atlas page, so drawing an entity is a single area blit.
+"""
+import math
+from collections import OrderedDict
+
+import pygame
+
+from simulation import bird_wing_offset
+from viewport import Viewport
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+YELLOW = (255, 255, 0)
+GOLD = (255, 215, 0)
+PINK = (255, 192, 203)
+DARK_GRAY = (64, 64, 64)
+
+ATLAS_PAGE_SIZE = 1024
+ATLAS_MAX_PAGES = 4
+
+# Animation quantization
+BIRD_WING_OFFSETS = range(-5, 6)
+STAR_SIZES = range(8, 13)
+STAR_GLOW_OFFSETS = range(-3, 4)
+WING_ANGLES = range(-30, 31)
+
+
+def render_cloud(width, height, storm, lightning, simple=False):
+    """Render a cloud frame; returns (surface, (offset_x, offset_y))"""
+    color = DARK_GRAY if storm else WHITE
+    extra = 42 if lightning else 0
+    surface = pygame.Surface((width, height + 10 + extra), pygame.SRCALPHA)
+
+    # Cloud body, shifted down 10px so the top ellipse fits
+    pygame.draw.ellipse(surface, color, (0, 10, width, height))
+    if not simple:
+        pygame.draw.ellipse(surface, color, (20, 0, width - 20, height - 10))
+        pygame.draw.ellipse(surface, color, (10, 20, width - 30, height - 20))
+
+    # Lightning for storm clouds
+    if lightning:
+        lightning_x = width // 2
+        lightning_y = height + 10
+        pygame.draw.lines(surface, YELLOW, False, [
+            (lightning_x, lightning_y),
+            (lightning_x - 10, lightning_y + 20),
+            (lightning_x + 5, lightning_y + 20),
+            (lightning_x - 5, lightning_y + 40)
+        ], 3)
+    return surface, (0, -10)
+
+
+def render_bird(wing_offset):
+    """Render a bird frame for one wing offset; returns (surface, offset)"""
+    surface = pygame.Surface((44, 26), pygame.SRCALPHA)
+    ox, oy = 5, 5
+
+    # Bird body
+    pygame.draw.ellipse(surface, BLACK, (ox, oy, 30, 20))
+
+    # Wings
+    pygame.draw.ellipse(surface, DARK_GRAY, (ox - 5, oy - wing_offset, 15, 10))
+    pygame.draw.ellipse(surface, DARK_GRAY, (ox + 20, oy - wing_offset, 15, 10))
+
+    # Beak
+    pygame.draw.polygon(surface, YELLOW, [
+        (ox + 30, oy + 10),
+        (ox + 38, oy + 7),
+        (ox + 38, oy + 13)
+    ])
+    return surface, (-ox, -oy)
+
+
+def render_star(size, glow_size):
+    """Render a star frame, glowing unless glow_size is 0; returns (surface, offset)"""
+    extent = max(glow_size * 4, size * 2 + 2)
+    center = extent // 2
+    surface = pygame.Surface((extent, extent), pygame.SRCALPHA)
+
+    # Glow effect
+    if glow_size:
+        pygame.draw.circle(surface, (255, 255, 0, 50), (center, center), glow_size * 2)
+
+    # Star shape
+    star_points = []
+    for i in range(10):
+        angle = i * math.pi / 5
+        radius = size if i % 2 == 0 else size // 2
+        star_points.append((center + math.cos(angle) * radius, center + math.sin(angle) * radius))
+    pygame.draw.polygon(surface, GOLD, star_points)
+    pygame.draw.polygon(surface, YELLOW, star_points, 2)
+    return surface, (-center, -center)
+
+
+def render_sky_girl_body():
+    """Create a simple sprite surface for the sky girl"""
+    sprite = pygame.Surface((48, 48), pygame.SRCALPHA)
+
+    # Body (pink dress)
+    pygame.draw.ellipse(sprite, PINK, (16, 20, 16, 20))
+
+    # Head
+    pygame.draw.circle(sprite, (255, 220, 177), (24, 16), 8)
+
+    # Hair
+    pygame.draw.circle(sprite, (139, 69, 19), (24, 12), 10)
+
+    # Eyes
+    pygame.draw.circle(sprite, BLACK, (21, 14), 2)
+    pygame.draw.circle(sprite, BLACK, (27, 14), 2)
+    return sprite
+
+
+def render_sky_girl(wing_angle, flapping):
+    """Render the sky girl with wings at an angle; returns (surface, offset)"""
+    surface = pygame.Surface((60, 48), pygame.SRCALPHA)
+
+    wing_points_left = [(15, 15), (5, 5 + wing_angle), (0, 15), (5, 25 - wing_angle), (15, 15)]
+    wing_points_right = [(45, 15), (55, 5 + wing_angle), (60, 15), (55, 25 - wing_angle), (45, 15)]
+
+    # Wing glow effect
+    if flapping:
+        glow_surface = pygame.Surface((60, 30), pygame.SRCALPHA)
+        pygame.draw.polygon(glow_surface, (255, 255, 255, 100), wing_points_left)
+        pygame.draw.polygon(glow_surface, (255, 255, 255, 100), wing_points_right)
+        surface.blit(glow_surface, (0, 5))
+
+    # Wings behind the body
+    wing_surface = pygame.Surface((60, 30), pygame.SRCALPHA)
+    pygame.draw.polygon(wing_surface, (255, 255, 255, 180), wing_points_left)
+    pygame.draw.polygon(wing_surface, (255, 255, 255, 180), wing_points_right)
+    surface.blit(wing_surface, (0, 5))
+
+    surface.blit(render_sky_girl_body(), (6, 0))
+    return surface, (-6, 0)
+
+
+class AtlasPage:
+    """One atlas surface filled left to right in shelves"""
+
+    def __init__(self, size):
+        self.size = size
+        self.surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+        self.keys = []
+        self.reset()
+
+    def reset(self):
+        """Forget everything packed into the page"""
+        self.surface.fill((0, 0, 0, 0))
+        self.keys.clear()
+        self.shelf_x = 0
+        self.shelf_y = 0
+        self.shelf_height = 0
+
+    def place(self, width, height):
+        """Reserve a width x height area; return its Rect or None if full"""
+        x, y, shelf_height = self.shelf_x, self.shelf_y, self.shelf_height
+        if x + width > self.size:
+            # Start a new shelf below this one
+            x, y, shelf_height = 0, y + shelf_height, 0
+        # A frame that doesn't fit leaves the page as it was, so a smaller
+        # one can still use the rest of the current shelf
+        if y + height > self.size or width > self.size:
+            return None
+        self.shelf_x = x + width
+        self.shelf_y = y
+        self.shelf_height = max(shelf_height, height)
+        return pygame.Rect(x, y, width, height)
+
+
+class SpriteAtlas:
+    """Frames packed into a bounded set of pages, evicting the least recently used page"""
+
+    def __init__(self, page_size=ATLAS_PAGE_SIZE, max_pages=ATLAS_MAX_PAGES):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+        self.entries = {}
+        self.next_page_id = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, build):
+        """Get (surface, area, offset) for key, rendering it with build() on a miss"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            page_id = entry[3]
+            if page_id is not None:
+                self.pages.move_to_end(page_id)
+            return entry[:3]
+
+        self.misses += 1
+        frame, offset = build()
+        entry = self._pack(key, frame, offset)
+        self.entries[key] = entry
+        return entry[:3]
+
+    def _pack(self, key, frame, offset):
+        """Copy a frame into a page and build its entry"""
+        width, height = frame.get_size()
+        if width > self.page_size or height > self.page_size:
+            # Too big for a page; keep it as a standalone surface
+            return (frame, None, offset, None)
+
+        for page_id in reversed(self.pages):
+            rect = self.pages[page_id].place(width, height)
+            if rect is not None:
+                break
+        else:
+            page_id = self._new_page()
+            rect = self.pages[page_id].place(width, height)
+
+        page = self.pages[page_id]
+        self.pages.move_to_end(page_id)
+        page.surface.blit(frame, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        page.keys.append(key)
+        return (page.surface, rect, offset, page_id)
+
+    def _new_page(self):
+        """Add a page, recycling the least recently used one when at the limit"""
+        if len(self.pages) >= self.max_pages:
+            page_id, page = self.pages.popitem(last=False)
+            for key in page.keys:
+                del self.entries[key]
+            page.reset()
+            self.evictions += 1
+        else:
+            page = AtlasPage(self.page_size)
+        page_id = self.next_page_id
+        self.next_page_id += 1
+        self.pages[page_id] = page
+        return page_id
+
+    def clear(self):
+        """Drop every page and entry"""
+        self.pages.clear()
+        self.entries.clear()
+
+    def stats(self):
+        """Cache counters for monitoring"""
+        return {
+            "entries": len(self.entries),
+            "pages": len(self.pages),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SpriteCache:
+    """Entity frame lookups on top of a SpriteAtlas"""
+
+    def __init__(self, atlas=None, viewport=None):
+        self.atlas = atlas if atlas is not None else SpriteAtlas()
+        self.viewport = viewport if viewport is not None else Viewport(1, 1)
+        self.scale = self.viewport.scale
+
+        # Detail switches (see quality.py)
+        self.star_glow = True
+        self.wing_glow = True
+        self.simple_clouds = False
+
+    def set_viewport(self, viewport):
+        """Render frames for a new viewport, dropping frames at another scale"""
+        if viewport.scale != self.scale:
+            self.atlas.clear()
+        self.viewport = viewport
+        self.scale = viewport.scale
+
+    def _frame(self, key, build):
+        """Atlas lookup that renders misses at the viewport's scale"""
+        return self.atlas.get(key, lambda: self._scaled(build))
+
+    def _scaled(self, build):
+        """Run a render function and resample its frame and offset to the viewport"""
+        frame, (offset_x, offset_y) = build()
+        if self.viewport.identity:
+            return frame, (offset_x, offset_y)
+        scale = self.scale
+        return self.viewport.scale_surface(frame), (round(offset_x * scale), round(offset_y * scale))
+
+    def cloud_frame(self, cloud):
+        """Frame for a cloud's size, type and lightning state"""
+        storm = cloud.type == "storm"
+        lightning = storm and cloud.show_lightning
+        simple = self.simple_clouds
+        key = ("cloud", cloud.width, cloud.height, storm, lightning, simple)
+        return self._frame(key, lambda: render_cloud(cloud.width, cloud.height, storm, lightning, simple))
+
+    def bird_frame(self, bird):
+        """Frame for a bird's current wing phase"""
+        wing_offset = bird_wing_offset(bird)
+        return self._frame(("bird", wing_offset), lambda: render_bird(wing_offset))
+
+    def star_frame(self, star):
+        """Frame for a star's size and current glow pulse"""
+        glow_size = star.size + int(math.sin(star.glow_timer) * 3) if self.star_glow else 0
+        return self._frame(("star", star.size, glow_size), lambda: render_star(star.size, glow_size))
+
+    def sky_girl_frame(self, wing_angle, flapping):
+        """Frame for the sky girl at a wing angle quantized to whole degrees"""
+        angle = int(round(wing_angle))
+        flapping = flapping and self.wing_glow
+        return self._frame(("girl", angle, flapping), lambda: render_sky_girl(angle, flapping))
+
+    def warm_steps(self):
+        """Pre-render every bird, star and sky girl frame, yielding after each one"""
+        for wing_offset in BIRD_WING_OFFSETS:
+            self._frame(("bird", wing_offset), lambda: render_bird(wing_offset))
+            yield
+        for size in STAR_SIZES:
+            for glow_offset in STAR_GLOW_OFFSETS:
+                glow_size = size + glow_offset
+                self._frame(("star", size, glow_size), lambda: render_star(size, glow_size))
+                yield
+        for angle in WING_ANGLES:
+            for flapping in (False, True):
+                self._frame(("girl", angle, flapping), lambda: render_sky_girl(angle, flapping))
+                yield
+
+    def warm(self):
+        """Pre-render every bird, star and sky girl frame"""
+        for _ in self.warm_steps():
+            pass
+
+    def warm_clouds(self, sizes):
+        """Pre-render cloud frames for (width, height, storm) triples"""
+        simple = self.simple_clouds
+        for width, height, storm in sizes:
+            self._frame(("cloud", width, height, storm, False, simple),
+                           lambda: render_cloud(width, height, storm, False, simple))
+
+    def blit(self, screen, frame, x, y):
+        """Draw a frame whose anchor lands at world point (x, y); return the covered rect"""
+        surface, area, (offset_x, offset_y) = frame
+        scale = self.scale
+        return screen.blit(surface, (x * scale + offset_x, y * scale + offset_y), area)
@@ -0,0 +1,305 @@
+"""Session telemetry and high scores, persisted without stalling the game
+
+The game pushes fixed-size records (a game started, a once-a-second
+progress sample, a game ended) into an in-memory queue; pushing never
+blocks, and if the queue is full the record is dropped and counted. A
+writer thread batch-appends queued records to an append-only file,
+flushing every batch and fsyncing at most every FSYNC_INTERVAL seconds.
+
+Each record carries a CRC32. When the writer opens the file it scans it
+once: a record cut short or corrupted by a crash ends the log, and the
+file is truncated back to the last good record before anything is
+appended. The same scan fills the in-memory top-N high score index, so
+it costs nothing extra and happens off the main thread; scores from the
+current session are added to the index as soon as they are pushed.
+
+Usage:
+    python telemetry.py scores.sgt [--top N]
+"""
+import argparse
+import bisect
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, namedtuple
+
+from simulation import FPS
+
+TELEMETRY_MAGIC = b"SGTL"
+TELEMETRY_VERSION = 1
+_HEADER = struct.Struct("<4sB")
+
+# kind, unix time, seed, frame, score, game speed; then a CRC32 of those
+_BODY = struct.Struct("<BdQIIf")
+_CRC = struct.Struct("<I")
+RECORD_SIZE = _BODY.size + _CRC.size
+
+# Record kinds
+GAME_START = 1
+GAME_SAMPLE = 2
+GAME_OVER = 3
+GAME_QUIT = 4
+KIND_NAMES = {GAME_START: "start", GAME_SAMPLE: "sample", GAME_OVER: "game_over", GAME_QUIT: "quit"}
+
+# Records waiting for the writer before new ones are dropped
+TELEMETRY_QUEUE = 4096
+
+# Most records written per batch
+WRITE_BATCH = 256
+
+# Seconds between fsyncs while records keep coming
+FSYNC_INTERVAL = 2.0
+
+# High scores kept in the index
+HIGH_SCORE_SLOTS = 10
+
+TelemetryRecord = namedtuple("TelemetryRecord", "kind time seed frame score game_speed")
+HighScore = namedtuple("HighScore", "score frames seed time")
+
+
+class TelemetryError(ValueError):
+    """The file is not a telemetry log this version can read"""
+
+
+def pack_record(kind, seed, frame, score, game_speed, when=None):
+    """Encode one fixed-size record with its checksum"""
+    body = _BODY.pack(kind, when if when is not None else time.time(), seed, frame, score, game_speed)
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def read_records(f):
+    """Yield (offset after, record) for each intact record, stopping at the first bad one"""
+    header = f.read(_HEADER.size)
+    if not header:
+        return
+    if len(header) < _HEADER.size:
+        raise TelemetryError("telemetry header cut short")
+    magic, version = _HEADER.unpack(header)
+    if magic != TELEMETRY_MAGIC:
+        raise TelemetryError("not a telemetry file")
+    if version != TELEMETRY_VERSION:
+        raise TelemetryError(f"unsupported telemetry version {version}")
+    offset = _HEADER.size
+    while True:
+        data = f.read(RECORD_SIZE)
+        if len(data) < RECORD_SIZE:
+            return
+        body = data[:_BODY.size]
+        (crc,) = _CRC.unpack_from(data, _BODY.size)
+        if zlib.crc32(body) != crc:
+            return
+        offset += RECORD_SIZE
+        yield offset, TelemetryRecord(*_BODY.unpack(body))
+
+
+class HighScoreIndex:
+    """Best scores, highest first and earliest first among equals"""
+
+    def __init__(self, slots=HIGH_SCORE_SLOTS):
+        self.slots = slots
+        self.keys = []
+        self.entries = []
+
+    def add(self, entry):
+        """Insert an entry if it makes the table; return its rank or None"""
+        key = (-entry.score, entry.time)
+        rank = bisect.bisect_right(self.keys, key)
+        if rank >= self.slots:
+            return None
+        self.keys.insert(rank, key)
+        self.entries.insert(rank, entry)
+        del self.keys[self.slots:], self.entries[self.slots:]
+        return rank
+
+    def top(self, count=None):
+        return self.entries[:count]
+
+
+class TelemetryStore:
+    """Non-blocking telemetry queue with a background appending writer"""
+
+    def __init__(self, path, slots=HIGH_SCORE_SLOTS, max_queued=TELEMETRY_QUEUE,
+                 fsync_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.lock = threading.Lock()
+        self.index = HighScoreIndex(slots)
+        # Bumped whenever the index changes, so callers can cache what they draw
+        self.version = 0
+        self.loaded = threading.Event()
+        self.error = None
+
+        # Statistics
+        self.pushed = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.fsyncs = 0
+        self.recovered_bytes = 0
+
+        self.thread = threading.Thread(target=self._writer, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def push(self, kind, seed, frame, score, game_speed=0.0):
+        """Queue a record; never blocks, drops it if the writer is far behind"""
+        if kind == GAME_OVER:
+            self._add_score(HighScore(score, frame, seed, time.time()))
+        try:
+            self.queue.put_nowait(pack_record(kind, seed, frame, score, game_speed))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.pushed += 1
+        return True
+
+    def _add_score(self, entry):
+        with self.lock:
+            if self.index.add(entry) is not None:
+                self.version += 1
+
+    def top(self, count=None):
+        """Best scores seen so far; complete once loaded is set"""
+        with self.lock:
+            return self.index.top(count)
+
+    def _open(self):
+        """Open the log for appending, recovering from a torn tail and loading scores"""
+        f = open(self.path, "a+b")
+        scores = []
+        try:
+            size = f.seek(0, os.SEEK_END)
+            if size < _HEADER.size:
+                # A new file, or one cut short while its header was written
+                self.recovered_bytes = size
+                f.truncate(0)
+                f.write(_HEADER.pack(TELEMETRY_MAGIC, TELEMETRY_VERSION))
+                f.flush()
+                os.fsync(f.fileno())
+            else:
+                f.seek(0)
+                good = _HEADER.size
+                for good, record in read_records(f):
+                    if record.kind == GAME_OVER:
+                        scores.append(HighScore(record.score, record.frame, record.seed, record.time))
+                if size > good:
+                    # A crash left part of a record (or garbage) after the last good one
+                    self.recovered_bytes = size - good
+                    f.truncate(good)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except (OSError, TelemetryError):
+            f.close()
+            raise
+        with self.lock:
+            for entry in scores:
+                self.index.add(entry)
+            self.version += 1
+        return f
+
+    def _writer(self):
+        """Append queued records in batches until the None sentinel"""
+        try:
+            f = self._open()
+        except (OSError, TelemetryError) as exc:
+            # Keep serving in-memory scores; records are discarded
+            self.error = exc
+            self.loaded.set()
+            while self.queue.get() is not None:
+                pass
+            return
+        self.loaded.set()
+
+        last_sync = time.monotonic()
+        unsynced = False
+        closing = False
+        with f:
+            while not closing:
+                try:
+                    record = self.queue.get(timeout=self.fsync_interval)
+                except queue.Empty:
+                    record = b""
+                batch = []
+                while record is not None:
+                    if record:
+                        batch.append(record)
+                    if len(batch) >= WRITE_BATCH:
+                        break
+                    try:
+                        record = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                closing = record is None
+                try:
+                    if batch:
+                        f.write(b"".join(batch))
+                        f.flush()
+                        self.written += len(batch)
+                        self.batches += 1
+                        unsynced = True
+                    now = time.monotonic()
+                    if unsynced and (closing or now - last_sync >= self.fsync_interval):
+                        os.fsync(f.fileno())
+                        self.fsyncs += 1
+                        last_sync = now
+                        unsynced = False
+                except OSError as exc:
+                    # Disk full or gone: stop persisting, keep the game running
+                    self.error = exc
+                    break
+        if not closing:
+            while self.queue.get() is not None:
+                pass
+
+    def close(self):
+        """Write out everything queued, fsync and stop the writer"""
+        self.queue.put(None)
+        self.thread.join()
+
+    def stats(self):
+        """Writer counters for monitoring"""
+        return {
+            "pushed": self.pushed,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "fsyncs": self.fsyncs,
+            "queued": self.queue.qsize(),
+            "recovered_bytes": self.recovered_bytes,
+            "error": str(self.error) if self.error else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a Sky Girl telemetry log")
+    parser.add_argument("path", help="telemetry file written with --scores")
+    parser.add_argument("--top", type=int, default=HIGH_SCORE_SLOTS, help="high scores to list")
+    args = parser.parse_args()
+
+    kinds = Counter()
+    index = HighScoreIndex(args.top)
+    good = _HEADER.size
+    try:
+        with open(args.path, "rb") as f:
+            for good, record in read_records(f):
+                kinds[record.kind] += 1
+                if record.kind == GAME_OVER:
+                    index.add(HighScore(record.score, record.frame, record.seed, record.time))
+            total = f.seek(0, os.SEEK_END)
+    except (OSError, TelemetryError) as exc:
+        sys.exit(f"{args.path}: {exc}")
+
+    print(", ".join(f"{kinds[kind]} {name}" for kind, name in KIND_NAMES.items()))
+    if total > good:
+        print(f"{total - good} trailing bytes after the last good record")
+    for rank, entry in enumerate(index.top(), 1):
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.time))
+        print(f"{rank:>3}. {entry.score:>6}  {entry.frames / FPS:>7.1f}s  seed {entry.seed:<20} {when}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""BatchEnv games play out like the scalar World with the same seed"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from batch_env import BatchEnv
+from simulation import DEFAULT_DIFFICULTY, DifficultyConfig, World
+
+GAMES = 16
+MAX_FRAMES = 4000
+
+
+@pytest.mark.parametrize("difficulty", [
+    DEFAULT_DIFFICULTY,
+    DifficultyConfig(cloud_interval_floor=20, star_interval_start=20, star_interval_floor=4, speed_divisor=50),
+])
+def test_matches_world(difficulty):
+    env = BatchEnv(GAMES, seed=7, auto_reset=False, difficulty=difficulty)
+    worlds = [World(difficulty=difficulty) for _ in range(GAMES)]
+    for world, seed in zip(worlds, env.seeds.tolist()):
+        world.reset(seed)
+
+    rng = random.Random(0)
+    while not env.done.all() and env.frame.max() < MAX_FRAMES:
+        actions = np.array([rng.random() < 0.06 for _ in range(GAMES)])
+        for world, flap in zip(worlds, actions):
+            if not world.game_over:
+                if flap:
+                    world.flap()
+                world.step()
+        env.step(actions)
+        assert env.done.tolist() == [world.game_over for world in worlds]
+        assert env.score.tolist() == [world.score for world in worlds]
+        assert env.frame.tolist() == [world.frame for world in worlds]
+    assert env.done.all()
+
+
+def test_out_of_slots_grows_instead_of_dropping():
+    env = BatchEnv(2, seed=1)
+    slots = env.star_active.shape[1]
+    env.star_active[:] = True
+    env.spawn_timer[:] = DEFAULT_DIFFICULTY.star_interval_start - 1
+    env.step([False, False])
+    assert env.slot_growths == 1
+    assert env.star_active.shape[1] == 2 * slots
+    assert env.star_active[:, slots].all()
+
+
+def test_reset_with_seeds():
+    env = BatchEnv(3, seed=1)
+    env.reset(np.array([False, True, True]), seeds=[11, 12])
+    assert env.seeds.tolist()[1:] == [11, 12]
+    with pytest.raises(ValueError):
+        env.reset(seeds=[1])
@@ -0,0 +1,29 @@
+"""Headless replay rendering with capture.py"""
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from capture import FrameCapture, render_replay
+from replay import Replay
+from simulation import SCREEN_HEIGHT, SCREEN_WIDTH
+
+FRAMES = 30
+
+
+def test_render_replay_cleans_up(tmp_path):
+    replay = Replay(5, [frame % 12 == 0 for frame in range(FRAMES)])
+    path = tmp_path / "clip.rgb"
+    capture = FrameCapture.to_file((SCREEN_WIDTH, SCREEN_HEIGHT), str(path))
+    try:
+        world = render_replay(replay, capture, "low")
+    finally:
+        capture.close()
+    assert world.frame == FRAMES
+    assert not world.spawns.thread.is_alive()
+    assert not pygame.get_init()
+    assert path.stat().st_size == FRAMES * SCREEN_WIDTH * SCREEN_HEIGHT * 3
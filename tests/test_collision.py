@@ -0,0 +1,70 @@
+"""The sweep-and-prune index agrees with pygame.Rect.colliderect"""
+import os
+import random
+import sys
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from collision import CollisionIndex, Hitbox, collidelist, collidelistall
+
+BOXES = 60
+QUERIES = 200
+
+
+def random_box(rng, owner=None):
+    return Hitbox(rng.uniform(-50, 400), rng.uniform(-50, 400), rng.randint(0, 80), rng.randint(0, 80), owner)
+
+
+def overlapping(box, boxes):
+    rect = pygame.Rect(box.as_tuple())
+    return [other for other in boxes if rect.colliderect(pygame.Rect(other.as_tuple()))]
+
+
+def test_collides_matches_colliderect():
+    rng = random.Random(1)
+    for _ in range(2000):
+        a, b = random_box(rng), random_box(rng)
+        assert a.collides(b) == pygame.Rect(a.as_tuple()).colliderect(pygame.Rect(b.as_tuple()))
+    # Touching edges do not overlap
+    assert not Hitbox(0, 0, 10, 10).collides(Hitbox(10, 0, 10, 10))
+    assert Hitbox(0, 0, 10, 10).collides(Hitbox(9, 9, 10, 10))
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(2)
+    index = CollisionIndex()
+    boxes = [random_box(rng, owner=i) for i in range(BOXES)]
+    for box in boxes:
+        index.add(box)
+
+    for frame in range(20):
+        # Scroll everything left, and recycle a few boxes
+        for box in boxes:
+            box.x -= rng.randint(0, 6)
+        for box in rng.sample(boxes, 5):
+            index.remove(box)
+            boxes.remove(box)
+        for _ in range(5):
+            box = random_box(rng, owner=frame)
+            index.add(box)
+            boxes.append(box)
+        index.refresh()
+        assert len(index) == len(boxes)
+
+        for _ in range(QUERIES // 20):
+            query = random_box(rng)
+            expected = overlapping(query, boxes)
+            assert sorted(map(id, index.query(query))) == sorted(map(id, expected))
+            hit = index.first_hit(query)
+            assert (hit is None) == (not expected)
+            assert hit is None or hit in expected
+
+
+def test_collidelist():
+    boxes = [Hitbox(0, 0, 10, 10), Hitbox(50, 50, 10, 10), Hitbox(5, 5, 10, 10)]
+    assert collidelist(Hitbox(8, 8, 4, 4), boxes) == 0
+    assert collidelistall(Hitbox(8, 8, 4, 4), boxes) == [0, 2]
+    assert collidelist(Hitbox(30, 30, 4, 4), boxes) == -1
@@ -0,0 +1,23 @@
+"""Command-line argument types of the game"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import Sky_girl_could_glider as game_module
+
+
+@pytest.mark.parametrize("text", ["0", "-0.5", "1.5", "nan", "half"])
+def test_render_scale_rejects(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        game_module.render_scale(text)
+
+
+def test_render_scale_accepts():
+    assert game_module.render_scale("0.5") == 0.5
+    assert game_module.render_scale("1") == 1.0
@@ -0,0 +1,45 @@
+"""Pixel collision footprint of the sky girl"""
+import os
+import subprocess
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+import pygame
+
+from masks import MaskCache, PixelCollider
+from simulation import BirdSpawn, World
+
+
+def test_girl_mask_is_body_and_head():
+    mask, offset = MaskCache().girl()
+    assert offset == (0, 0)
+    assert mask.get_size() == (48, 48)
+    # Hair to dress hem, well inside the 60 px wingspan
+    assert mask.get_bounding_rects() == [pygame.Rect(14, 2, 20, 38)]
+
+
+def bird_world(x, y):
+    world = World(collider=PixelCollider())
+    world.reset(1)
+    bird = world.bird_pool.spawn(x, BirdSpawn(y, 0, 0))
+    world.obstacles.add(bird.hitbox)
+    world.obstacles.refresh()
+    return world
+
+
+def test_wings_do_not_collide():
+    girl_y = bird_world(0, 0).sky_girl.y
+    # Level with the girl's left wing tip, clear of her body
+    world = bird_world(100 - 6 - 20, girl_y + 10)
+    assert world.collider.first_hit(world) is None
+    world = bird_world(100 + 10, girl_y + 20)
+    assert world.collider.first_hit(world) is not None
+
+
+def test_rect_mode_does_not_import_pygame():
+    code = "import sys, replay, rollout; sys.exit('pygame' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=REPO).returncode == 0
@@ -0,0 +1,37 @@
+"""Smoke test: the pipelined game loop runs from the menu through play"""
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pytest
+
+import Sky_girl_could_glider as game_module
+
+FRAMES = 120
+
+
+def test_pipelined_run_with_flaps():
+    game = game_module.Game(pipelined=True, max_fps=0)
+    frames = []
+    handle_events = game.handle_events
+
+    def scripted_events():
+        # Start from the menu, flap now and then, quit after FRAMES
+        frames.append(game.state)
+        if len(frames) == 2 or len(frames) % 10 == 0:
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+        if len(frames) == FRAMES:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+        return handle_events()
+
+    game.handle_events = scripted_events
+    with pytest.raises(SystemExit):
+        game.run()
+
+    assert frames[0] == game_module.GameState.MENU
+    assert game_module.GameState.PLAYING in frames
+    assert game.pipeline.batches > 0
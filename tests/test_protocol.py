@@ -0,0 +1,88 @@
+"""Snapshots decode to the state they were encoded from"""
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from protocol import (DELTA, FLAP, KEYFRAME, MAX_PAYLOAD, WELCOME, ProtocolError, SnapshotDecoder,
+                      SnapshotEncoder, entity_states, pack_message, read_message)
+from simulation import World, hover_policy
+
+MAX_FRAMES = 2000
+
+# A decoder joining late starts from a keyframe this often
+LATE_JOIN_FRAMES = 97
+
+
+def assert_decoded(decoder, world):
+    assert sorted(decoder.entities.values()) == sorted(state for _, state in entity_states(world))
+    assert (decoder.header.frame, decoder.header.score) == (world.frame, world.score)
+    assert decoder.header.girl_y == round(world.sky_girl.y)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_round_trip(seed):
+    world = World()
+    world.reset(seed)
+    policy = hover_policy(rng=random.Random(seed))
+    encoder = SnapshotEncoder()
+    decoder = SnapshotDecoder()
+    late = SnapshotDecoder()
+    for _ in range(2):
+        while not world.game_over and world.frame < MAX_FRAMES:
+            if policy(world):
+                world.flap()
+            world.step()
+            delta = encoder.update(world)
+            if decoder.header is None:
+                decoder.apply(KEYFRAME, encoder.keyframe())
+            else:
+                decoder.apply(DELTA, delta)
+            assert_decoded(decoder, world)
+
+            if world.frame % LATE_JOIN_FRAMES == 0:
+                late.apply(KEYFRAME, encoder.keyframe())
+            elif late.header is not None:
+                late.apply(DELTA, delta)
+            if late.header is not None:
+                assert late.entities == decoder.entities
+        # The next game keeps streaming deltas on the same encoder
+        world.reset(seed + 100)
+
+
+def test_rejects_out_of_order_and_malformed():
+    world = World()
+    world.reset(1)
+    encoder = SnapshotEncoder()
+    decoder = SnapshotDecoder()
+    world.step()
+    first = encoder.update(world)
+    with pytest.raises(ProtocolError):
+        decoder.apply(DELTA, first)
+    decoder.apply(KEYFRAME, encoder.keyframe())
+    world.step()
+    encoder.update(world)
+    world.step()
+    with pytest.raises(ProtocolError):
+        decoder.apply(DELTA, encoder.update(world))
+    with pytest.raises(ProtocolError):
+        decoder.apply(KEYFRAME, encoder.keyframe() + b"\0")
+    with pytest.raises(ProtocolError):
+        decoder.apply(FLAP, encoder.keyframe())
+
+
+def test_message_framing():
+    async def read_all(data):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [await read_message(reader), await read_message(reader)]
+
+    data = pack_message(FLAP) + pack_message(WELCOME, b"hello")
+    assert asyncio.run(read_all(data)) == [(FLAP, b""), (WELCOME, b"hello")]
+    with pytest.raises(ProtocolError):
+        pack_message(WELCOME, bytes(MAX_PAYLOAD + 1))
@@ -0,0 +1,75 @@
+"""Replays round-trip through their file format and re-simulate exactly"""
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import Sky_girl_could_glider as game_module
+from replay import REPLAY_VERSION, Replay, ReplayError, ReplayPlayer, replay_path, state_hash
+
+
+def test_bytes_round_trip():
+    replay = Replay(2**64 - 1, [1, 0, 0, 1, 1, 0, 0, 0, 1], 30, bytes(range(8)), "pixel")
+    loaded = Replay.from_bytes(replay.to_bytes())
+    assert (loaded.seed, loaded.flaps, loaded.final_score, loaded.final_hash, loaded.collision) == \
+           (replay.seed, replay.flaps, replay.final_score, replay.final_hash, replay.collision)
+
+
+def test_rejects_other_versions_and_corruption():
+    data = bytearray(Replay(1, [1, 0]).to_bytes())
+    data[4] = REPLAY_VERSION - 1
+    with pytest.raises(ReplayError):
+        Replay.from_bytes(bytes(data))
+    with pytest.raises(ReplayError):
+        Replay.from_bytes(Replay(1, [1, 0]).to_bytes()[:-2])
+
+
+def test_replay_path():
+    assert replay_path("game.sgr", 42) == "game-42.sgr"
+    assert replay_path(os.path.join("runs", "game"), 7) == os.path.join("runs", "game-7")
+
+
+def play_recorded_game(game, rng):
+    """Play one game to game over with a hovering policy; return the state hash at frame 300"""
+    game.state = game_module.GameState.PLAYING
+    game.reset_game()
+    middle = None
+    while game.state == game_module.GameState.PLAYING:
+        if game.world.sky_girl.y > 380 and rng.random() < 0.5:
+            game.world.flap()
+        game.update_game()
+        if game.world.frame == 300:
+            middle = state_hash(game.world)
+    return middle
+
+
+@pytest.mark.parametrize("collision", ["rect", "pixel"])
+def test_recorded_games_verify(tmp_path, collision):
+    game = game_module.Game(record_path=str(tmp_path / "game.sgr"), collision=collision)
+    rng = random.Random(3)
+    try:
+        middles = {}
+        for _ in range(2):
+            middle = play_recorded_game(game, rng)
+            middles[game.world.seed] = middle
+    finally:
+        game.world.spawns.close()
+
+    assert any(middle is not None for middle in middles.values())
+
+    # One file per game, named by its seed
+    assert sorted(os.listdir(tmp_path)) == sorted(f"game-{seed}.sgr" for seed in middles)
+    for seed, middle in middles.items():
+        replay = Replay.load(replay_path(str(tmp_path / "game.sgr"), seed))
+        assert replay.collision == collision
+        player = ReplayPlayer(replay, snapshot_interval=100)
+        assert player.verify()
+        if middle is not None:
+            assert state_hash(player.seek(300)) == middle
+            assert player.seek(50).frame == 50
+            assert state_hash(player.seek(300)) == middle
@@ -0,0 +1,28 @@
+"""rollout.py command-line parsing"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from rollout import parse_assignment
+
+
+def test_parse_assignment():
+    assert parse_assignment("speed_divisor=150") == ("speed_divisor", 150)
+    assert parse_assignment("storm_chance=0") == ("storm_chance", 0.0)
+    assert parse_assignment("cloud_interval_floor=40,60", sweep=True) == ("cloud_interval_floor", [40, 60])
+
+
+@pytest.mark.parametrize("text, sweep", [
+    ("speed_divisor=0", False),
+    ("star_interval_floor=-5", False),
+    ("bird_interval_divisor=8,0", True),
+    ("no_such_field=1", False),
+    ("speed_divisor=fast", False),
+])
+def test_parse_assignment_rejects(text, sweep):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_assignment(text, sweep)
@@ -0,0 +1,67 @@
+"""Shelf packing and page eviction of the sprite atlas"""
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from sprites import AtlasPage, SpriteAtlas
+
+
+def test_place_packs_shelves_without_overlap():
+    rng = random.Random(1)
+    page = AtlasPage(256)
+    placed = []
+    while True:
+        rect = page.place(rng.randint(5, 60), rng.randint(5, 60))
+        if rect is None:
+            break
+        assert page.surface.get_rect().contains(rect)
+        assert rect.collidelist(placed) == -1
+        placed.append(rect)
+    assert len(placed) > 10
+
+
+def test_miss_leaves_the_shelf_usable():
+    page = AtlasPage(100)
+    assert page.place(60, 60) == pygame.Rect(0, 0, 60, 60)
+    # No room on a new shelf below; the rest of this one stays open
+    assert page.place(60, 50) is None
+    assert page.place(30, 20) == pygame.Rect(60, 0, 30, 20)
+    assert page.place(120, 10) is None
+    page.reset()
+    assert page.place(100, 100) == pygame.Rect(0, 0, 100, 100)
+
+
+def frame(color, size=(40, 40)):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill(color)
+    return lambda: (surface, (1, 2))
+
+
+def test_atlas_copies_frames_and_evicts_least_recently_used_page():
+    atlas = SpriteAtlas(page_size=64, max_pages=2)
+    surface, area, offset = atlas.get("red", frame((255, 0, 0, 255)))
+    assert offset == (1, 2)
+    assert surface.get_at(area.topleft) == (255, 0, 0, 255)
+    assert atlas.get("red", frame((0, 0, 255, 255)))[1] == area
+
+    # One 40x40 frame per 64x64 page
+    atlas.get("green", frame((0, 255, 0, 255)))
+    atlas.get("red", frame((255, 0, 0, 255)))
+    atlas.get("blue", frame((0, 0, 255, 255)))
+    assert "red" in atlas and "blue" in atlas and "green" not in atlas
+    assert atlas.stats()["evictions"] == 1
+    surface, area, _ = atlas.get("blue", frame((0, 0, 0, 0)))
+    assert surface.get_at(area.topleft) == (0, 0, 255, 255)
+
+
+def test_oversized_frame_stays_standalone():
+    atlas = SpriteAtlas(page_size=32, max_pages=1)
+    surface, area, _ = atlas.get("big", frame((1, 2, 3, 255), (40, 10)))
+    assert area is None and surface.get_size() == (40, 10)
+    assert atlas.stats()["pages"] == 0
@@ -0,0 +1,86 @@
+"""Telemetry log persistence, torn-tail recovery and high scores"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from telemetry import (GAME_OVER, GAME_START, RECORD_SIZE, TELEMETRY_MAGIC, TELEMETRY_VERSION, _HEADER,
+                       TelemetryStore, read_records)
+
+HEADER = _HEADER.pack(TELEMETRY_MAGIC, TELEMETRY_VERSION)
+
+
+def write_games(path, scores):
+    store = TelemetryStore(str(path))
+    for seed, score in enumerate(scores):
+        store.push(GAME_START, seed, 0, 0)
+        store.push(GAME_OVER, seed, 600, score)
+    store.close()
+    assert store.error is None
+    return store
+
+
+def records(path):
+    with open(path, "rb") as f:
+        return [record for _, record in read_records(f)]
+
+
+def test_records_persist(tmp_path):
+    path = tmp_path / "scores.sgt"
+    write_games(path, [30, 10, 20])
+    assert path.stat().st_size == len(HEADER) + 6 * RECORD_SIZE
+    assert [(r.kind, r.seed, r.score) for r in records(path)][-2:] == [(GAME_START, 2, 0), (GAME_OVER, 2, 20)]
+
+    store = TelemetryStore(str(path))
+    store.loaded.wait()
+    assert [entry.score for entry in store.top()] == [30, 20, 10]
+    store.close()
+
+
+@pytest.mark.parametrize("tail", [7, RECORD_SIZE - 1])
+def test_torn_tail_is_truncated(tmp_path, tail):
+    path = tmp_path / "scores.sgt"
+    write_games(path, [30, 10])
+    size = path.stat().st_size
+    # A crash mid-append leaves part of a record after the last good one
+    with open(path, "ab") as f:
+        f.write(b"\xff" * tail)
+
+    store = write_games(path, [50])
+    assert store.recovered_bytes == tail
+    assert path.stat().st_size == size + 2 * RECORD_SIZE
+    assert [r.score for r in records(path) if r.kind == GAME_OVER] == [30, 10, 50]
+
+
+def test_corrupt_record_ends_the_log(tmp_path):
+    path = tmp_path / "scores.sgt"
+    write_games(path, [30, 10])
+    with open(path, "r+b") as f:
+        f.seek(len(HEADER) + 2 * RECORD_SIZE + 5)
+        f.write(b"\0\0\0")
+
+    store = write_games(path, [40])
+    assert store.recovered_bytes == 2 * RECORD_SIZE
+    assert [r.score for r in records(path) if r.kind == GAME_OVER] == [30, 40]
+
+
+def test_header_cut_short(tmp_path):
+    path = tmp_path / "scores.sgt"
+    path.write_bytes(HEADER[:3])
+    store = write_games(path, [5])
+    assert store.recovered_bytes == 3
+    assert [r.score for r in records(path) if r.kind == GAME_OVER] == [5]
+
+
+def test_not_a_telemetry_file(tmp_path):
+    path = tmp_path / "scores.sgt"
+    path.write_bytes(b"hello world")
+    store = TelemetryStore(str(path))
+    store.push(GAME_OVER, 1, 600, 70)
+    store.close()
+    # Scores still show in memory; the file is left alone
+    assert store.error is not None
+    assert [entry.score for entry in store.top()] == [70]
+    assert path.read_bytes() == b"hello world"
@@ -0,0 +1,63 @@
+"""BackgroundSpawnSchedule gives exactly the spawns of the on-demand SpawnSchedule"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import worldgen
+from replay import state_hash
+from simulation import DEFAULT_DIFFICULTY, SPAWN_CHUNK, DifficultyConfig, SpawnSchedule, World, hover_policy, play
+from worldgen import BackgroundSpawnSchedule
+
+SPAWNS = 3 * SPAWN_CHUNK + 5
+
+
+def take(schedule, seed, difficulty, counts):
+    schedule.reset(seed, difficulty)
+    return [schedule.next(kind) for kind, count in counts for _ in range(count)]
+
+
+@pytest.fixture
+def background():
+    schedule = BackgroundSpawnSchedule(ahead=2)
+    yield schedule
+    schedule.close()
+
+
+def test_same_sequences_across_resets(background):
+    difficulty = DifficultyConfig(storm_chance=0.8)
+    counts = [("cloud", SPAWNS), ("star", SPAWNS), ("bird", 10), ("cloud", SPAWN_CHUNK)]
+    for seed in (1, 2**64 - 1, 1):
+        assert take(background, seed, difficulty, counts) == take(SpawnSchedule(), seed, difficulty, counts)
+    # Partly consumed sequences start over on reset
+    take(background, 5, difficulty, [("star", 7)])
+    assert take(background, 6, difficulty, counts) == take(SpawnSchedule(), 6, difficulty, counts)
+
+
+def test_same_sequences_when_producer_falls_behind(background, monkeypatch):
+    def slow_spawn_chunk(*args):
+        time.sleep(0.002)
+        return spawn_chunk(*args)
+
+    spawn_chunk = worldgen.spawn_chunk
+    monkeypatch.setattr(worldgen, "spawn_chunk", slow_spawn_chunk)
+    counts = [("cloud", SPAWNS), ("bird", SPAWNS)]
+    for seed in range(3):
+        expected = take(SpawnSchedule(), seed, DEFAULT_DIFFICULTY, counts)
+        assert take(background, seed, DEFAULT_DIFFICULTY, counts) == expected
+    assert background.stats()["rolled_inline"] > 0
+
+
+def test_same_games(background):
+    for seed in range(5):
+        results = []
+        for spawns in (SpawnSchedule(), background):
+            world = World(spawns=spawns)
+            world.reset(seed)
+            play(world, hover_policy(rng=random.Random(seed)), 5000)
+            results.append((world.frame, world.score, state_hash(world)))
+        assert results[0] == results[1]
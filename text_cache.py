@@ -0,0 +1,119 @@
+"""Cached text surfaces for the HUD and menus
+
+Font.render is slow compared to a blit, and almost every string on screen
+is the same from one frame to the next. Rendered strings are kept in a
+bounded LRU keyed by (font, text, color); shadowed text is pre-composited
+into one surface; and strings with digits are assembled from cached
+glyphs, so a changing score never goes through Font.render at all.
+"""
+import re
+from collections import OrderedDict
+
+import pygame
+
+TEXT_CACHE_SIZE = 256
+
+# Splits text into digits and the runs between them
+_DIGIT_RUNS = re.compile(r"(\d)")
+
+
+class TextCache:
+    """Bounded LRU of rendered text surfaces"""
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.glyphs = OrderedDict()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _lookup(self, cache, key):
+        """Get a cached surface and mark it recently used"""
+        surface = cache.get(key)
+        if surface is not None:
+            cache.move_to_end(key)
+        return surface
+
+    def _store(self, cache, key, surface):
+        """Cache a surface, evicting the least recently used past the limit"""
+        cache[key] = surface
+        if len(cache) > self.max_entries:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def _glyph(self, font, text, color):
+        """Render (or reuse) a digit or a run of text between digits"""
+        key = (font, text, color)
+        surface = self._lookup(self.glyphs, key)
+        if surface is None:
+            surface = self._store(self.glyphs, key, font.render(text, True, color))
+        return surface
+
+    def _assemble(self, font, text, color):
+        """Build a string containing digits out of cached pieces"""
+        pieces = [self._glyph(font, run, color) for run in _DIGIT_RUNS.split(text) if run]
+        width = sum(piece.get_width() for piece in pieces)
+        surface = pygame.Surface((width, font.get_height()), pygame.SRCALPHA)
+        x = 0
+        for piece in pieces:
+            surface.blit(piece, (x, 0))
+            x += piece.get_width()
+        return surface
+
+    def render(self, font, text, color):
+        """Get the antialiased rendering of text"""
+        key = (font, text, color)
+        surface = self._lookup(self.entries, key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        if _DIGIT_RUNS.search(text):
+            surface = self._assemble(font, text, color)
+        else:
+            surface = font.render(text, True, color)
+        return self._store(self.entries, key, surface)
+
+    def warm_glyphs(self, font, runs, color):
+        """Pre-render the pieces that strings with digits are assembled from"""
+        for run in runs:
+            self._glyph(font, run, color)
+
+    def render_shadowed(self, font, text, color, shadow_color, offset=1):
+        """Get text with a drop shadow offset down-right, as a single surface"""
+        key = (font, text, color, shadow_color, offset)
+        surface = self._lookup(self.entries, key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        image = self.render(font, text, color)
+        shadow = self.render(font, text, shadow_color)
+        surface = pygame.Surface((image.get_width() + offset, image.get_height() + offset), pygame.SRCALPHA)
+        surface.blit(shadow, (offset, offset))
+        surface.blit(image, (0, 0))
+        return self._store(self.entries, key, surface)
+
+    def clear(self):
+        """Drop every cached surface"""
+        self.entries.clear()
+        self.glyphs.clear()
+
+    def stats(self):
+        """Cache counters for monitoring"""
+        return {
+            "entries": len(self.entries),
+            "glyphs": len(self.glyphs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,55 @@
+"""Fixed-timestep accumulator that decouples simulation rate from render rate
+
+Real elapsed time is fed in once per rendered frame and converted into a
+whole number of fixed simulation steps. The leftover fraction is exposed
+as alpha so the renderer can interpolate between the previous and current
+simulation states.
+"""
+from simulation import FPS
+
+# Longest stretch of real time one rendered frame may catch up on; anything
+# beyond it (a stall, a dragged window) is dropped instead of simulated
+MAX_FRAME_SECONDS = 0.25
+
+
+def lerp(previous, current, alpha):
+    """Linear interpolation between two simulation states"""
+    return previous + (current - previous) * alpha
+
+
+class FixedTimestep:
+    """Accumulates real time and hands out fixed simulation steps"""
+
+    def __init__(self, step_rate=FPS, max_frame_seconds=MAX_FRAME_SECONDS, time_scale=1.0):
+        self.step_seconds = 1.0 / step_rate
+        self.max_frame_seconds = max_frame_seconds
+        self.time_scale = time_scale
+        self.accumulator = 0.0
+
+        # Statistics
+        self.steps = 0
+        self.frames = 0
+        self.dropped_seconds = 0.0
+
+    def advance(self, elapsed_seconds):
+        """Add real time; return how many simulation steps to run now"""
+        if elapsed_seconds > self.max_frame_seconds:
+            # Too far behind: let the game slow down rather than spiral
+            # into ever longer frames trying to catch up
+            self.dropped_seconds += elapsed_seconds - self.max_frame_seconds
+            elapsed_seconds = self.max_frame_seconds
+        self.accumulator += elapsed_seconds * self.time_scale
+        steps = int(self.accumulator / self.step_seconds)
+        self.accumulator -= steps * self.step_seconds
+        self.steps += steps
+        self.frames += 1
+        return steps
+
+    @property
+    def alpha(self):
+        """How far (0..1) rendering is between the previous and current step"""
+        return min(1.0, self.accumulator / self.step_seconds)
+
+    def reset(self):
+        """Forget accumulated time"""
+        self.accumulator = 0.0
@@ -0,0 +1,45 @@
+"""Mapping from world coordinates to a (possibly smaller) render target
+
+The simulation and every draw call work in world units, the 1024x768
+playfield. A viewport scales those into the pixels of the surface actually
+being drawn, so the scene can be rendered at reduced resolution and
+upscaled to the window once per frame.
+"""
+import pygame
+
+
+class Viewport:
+    """Uniform scale from world units to render target pixels"""
+
+    def __init__(self, world_width, world_height, scale=1.0):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.scale = scale
+        self.width = max(1, round(world_width * scale))
+        self.height = max(1, round(world_height * scale))
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    @property
+    def identity(self):
+        return self.scale == 1.0
+
+    def to_screen(self, x, y):
+        """World point to target pixels"""
+        return (x * self.scale, y * self.scale)
+
+    def length(self, value):
+        """World distance to whole target pixels, never below one"""
+        return max(1, round(value * self.scale))
+
+    def scale_surface(self, surface, smooth=True):
+        """Resample a world-sized surface to target pixels"""
+        if self.identity:
+            return surface
+        width, height = surface.get_size()
+        size = (self.length(width), self.length(height))
+        if smooth and surface.get_bitsize() in (24, 32):
+            return pygame.transform.smoothscale(surface, size)
+        return pygame.transform.scale(surface, size)
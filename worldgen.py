@@ -0,0 +1,118 @@
+"""Spawn chunks rolled ahead of the game loop on a producer thread
+
+A World draws the random parts of every spawn (cloud type and size, y,
+speeds) from a SpawnSchedule, a chunk of SPAWN_CHUNK at a time. Each chunk
+is a pure function of (seed, kind, index), so a producer thread can roll
+the next few chunks of each kind into bounded queues while the game runs,
+and the loop only pops ready-made spawns. If the producer ever falls
+behind, the chunk is rolled on the spot instead of waited for; either way
+the spawns are exactly those of the on-demand SpawnSchedule.
+"""
+import threading
+from collections import deque
+
+from simulation import SpawnSchedule, spawn_chunk
+
+# Chunks of each kind rolled ahead of the one in use
+SPAWN_QUEUE_CHUNKS = 4
+
+
+class BackgroundSpawnSchedule(SpawnSchedule):
+    """SpawnSchedule whose chunks are rolled ahead by a producer thread"""
+
+    def __init__(self, ahead=SPAWN_QUEUE_CHUNKS):
+        super().__init__()
+        self.ahead = ahead
+        self.condition = threading.Condition()
+        self.ready = {kind: deque() for kind in self.KINDS}
+        # Index of the chunk each kind's producer queue continues with
+        self.produce_from = dict.fromkeys(self.KINDS, 0)
+        self.generation = 0
+        self.closed = False
+
+        # Statistics
+        self.produced = 0
+        self.prefetched = 0
+        self.rolled_inline = 0
+        self.discarded = 0
+
+        self.thread = threading.Thread(target=self._producer, name="worldgen", daemon=True)
+        self.thread.start()
+
+    def _wanted(self):
+        """The kind with the shortest queue that has room, or None; call with the lock held"""
+        if self.seed is None:
+            return None
+        kind = min(self.KINDS, key=lambda kind: len(self.ready[kind]))
+        return kind if len(self.ready[kind]) < self.ahead else None
+
+    def _producer(self):
+        """Keep every kind's queue topped up until closed"""
+        condition = self.condition
+        while True:
+            with condition:
+                kind = self._wanted()
+                while kind is None and not self.closed:
+                    condition.wait()
+                    kind = self._wanted()
+                if self.closed:
+                    return
+                seed, difficulty, generation = self.seed, self.difficulty, self.generation
+                index = self.produce_from[kind] + len(self.ready[kind])
+
+            # Roll outside the lock so the game never waits on it
+            chunk = spawn_chunk(seed, kind, index, difficulty)
+
+            with condition:
+                # Drop chunks made stale by a reset or an inline roll meanwhile
+                if generation == self.generation and index == self.produce_from[kind] + len(self.ready[kind]):
+                    self.ready[kind].append(chunk)
+                    self.produced += 1
+                else:
+                    self.discarded += 1
+
+    def reset(self, seed, difficulty=None):
+        """Start the sequences over for a new seed and roll ahead for it"""
+        with self.condition:
+            super().reset(seed, difficulty if difficulty is not None else self.difficulty)
+            self.generation += 1
+            for kind in self.KINDS:
+                self.ready[kind].clear()
+                self.produce_from[kind] = 0
+            self.condition.notify()
+
+    def fetch(self, kind, index):
+        """Take a pre-rolled chunk, or roll it here if the producer hasn't yet"""
+        with self.condition:
+            ready = self.ready[kind]
+            if ready and self.produce_from[kind] == index:
+                self.produce_from[kind] = index + 1
+                self.prefetched += 1
+                chunk = ready.popleft()
+                self.condition.notify()
+                return chunk
+            # Whatever is queued is behind; the producer continues after this one
+            ready.clear()
+            self.produce_from[kind] = index + 1
+            self.rolled_inline += 1
+            seed, difficulty = self.seed, self.difficulty
+            self.condition.notify()
+        return spawn_chunk(seed, kind, index, difficulty)
+
+    def close(self):
+        """Stop the producer thread"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+    def stats(self):
+        """Producer counters for monitoring"""
+        with self.condition:
+            return {
+                "produced": self.produced,
+                "prefetched": self.prefetched,
+                "rolled_inline": self.rolled_inline,
+                "discarded": self.discarded,
+                "queued": {kind: len(self.ready[kind]) for kind in self.KINDS},
+            }